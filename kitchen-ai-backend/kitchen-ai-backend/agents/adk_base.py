@@ -4,30 +4,151 @@ Simulates Agent Development Kit functionality for demo
 """
 
 import asyncio
+import itertools
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, AsyncIterator, Awaitable, Callable, Set, Tuple, Union
 from abc import ABC, abstractmethod
 
+from .alerts import AlertBus
+from .cache import ResultCache, normalize_data
+from .databus import DataBus
+from .eventstore import EventStore
+from .intents import Intent, IntentRouter
+from .metrics import EngineMetrics, MetricsRegistry
+from .resilience import AgentGuard, CircuitBreaker, agent_fault, is_agent_fault
+from .scheduler import AdmissionError, AgentUnavailableError, TaskScheduler, PRIORITY_NORMAL
+from .simulation import ServiceTimeModel, get_simulation
+from .state import ActivityTracker
+
 logger = logging.getLogger(__name__)
 
+# Site (kitchen/tenant) served when a request doesn't name one
+DEFAULT_SITE = "default"
+
+def site_agent_id(agent_id: str, site_id: str = DEFAULT_SITE) -> str:
+    """Engine key for a site's instance of an agent - the default site keeps the bare id"""
+    return agent_id if site_id == DEFAULT_SITE else f"{agent_id}@{site_id}"
+
+# Process-wide task ids: a counter is cheaper than formatting timestamps and
+# can't collide between concurrent requests
+_task_ids = itertools.count(1)
+# Shared read-only payload for tasks created without data
+EMPTY_DATA: Mapping[str, Any] = MappingProxyType({})
+
+def next_task_id() -> int:
+    return next(_task_ids)
+
+def wall_time(monotonic_ts: float) -> float:
+    """Unix time for a time.monotonic() reading taken in this process"""
+    return time.time() - (time.monotonic() - monotonic_ts)
+
+def _restore_task(task_id, task_type, data, priority, created_at, agent_id, timeout=None) -> "Task":
+    task = Task(task_id, task_type, data, priority, timeout)
+    task.created_at = created_at
+    task.agent_id = agent_id
+    return task
+
 # Simplified ADK-style Task and Agent classes for demo
 class Task:
-    """Simplified Task class (ADK-style)"""
-    def __init__(self, task_id: str, task_type: str, data: Dict[str, Any]):
+    """Simplified Task class (ADK-style)
+
+    A slotted record, since every request allocates at least one. Ids are
+    integers from a per-process counter unless given (Task.create allocates
+    one), and timestamps are time.monotonic() readings - see wall_time().
+    data is held by reference, never copied; agents must treat it as
+    read-only. timeout, when set, replaces the engine's deadline for the
+    task (seconds from submission, so it survives pickling to a shard).
+    """
+    __slots__ = ("id", "type", "data", "priority", "timeout", "created_at", "started_at", "agent_id")
+
+    def __init__(self, task_id: Union[int, str], task_type: str, data: Optional[Mapping[str, Any]] = None,
+                 priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None):
         self.id = task_id
         self.type = task_type
-        self.data = data
-        self.created_at = datetime.now()
+        self.data = EMPTY_DATA if data is None else data
+        self.priority = priority  # lower value = scheduled first
+        self.timeout = timeout
+        self.created_at = time.monotonic()
+        self.started_at: Optional[float] = None  # set when a worker picks it up
+        self.agent_id: Optional[str] = None
+
+    @classmethod
+    def create(cls, task_type: str, data: Optional[Mapping[str, Any]] = None,
+               priority: int = PRIORITY_NORMAL) -> "Task":
+        """New task with the next process-wide id"""
+        return cls(next(_task_ids), task_type, data, priority)
+
+    def __reduce__(self):
+        # Tasks are pickled to remote shards; EMPTY_DATA (a mappingproxy) can't be
+        data = dict(self.data) if self.data is EMPTY_DATA else self.data
+        return _restore_task, (self.id, self.type, data, self.priority, self.created_at, self.agent_id,
+                               self.timeout)
+
+    def __repr__(self) -> str:
+        return f"Task({self.id!r}, {self.type!r}, priority={self.priority})"
 
 class Agent(ABC):
     """Base Agent class (ADK-style)"""
-    def __init__(self, agent_id: str):
-        self.agent_id = agent_id
-        self.tasks_completed = 0
-        self.status = "idle"
+    
+    # Read-only task types whose results may be cached: {task_type: ttl_seconds}
+    cacheable_tasks: Dict[str, float] = {}
+    # Mutating task types and the cached task types they make stale
+    invalidates: Dict[str, List[str]] = {}
+    # Task types that publish or draw state without staling a cache; never hedged
+    side_effect_tasks: Set[str] = set()
+    # Voice intents this agent handles, in precedence order: {intent: [phrases]}
+    intents: Dict[str, List[str]] = {}
+    # Slot vocabularies for voice commands: {slot: {phrase: value}}
+    intent_slots: Dict[str, Dict[str, str]] = {}
+    # Human-readable summary of what the agent does
+    capabilities: List[str] = []
+    # Task types process_task handles; any other type is labelled "other" in metrics
+    task_types: Set[str] = set()
+    # Seconds a task may take from submission before it is cancelled (None = engine default)
+    default_deadline: Optional[float] = None
+    # Per task type deadlines, overriding default_deadline: {task_type: seconds}
+    task_deadlines: Dict[str, float] = {}
+    # Latency-critical task types to hedge: {task_type: seconds before a second attempt}.
+    # Tasks with side effects are never hedged, even if listed here.
+    hedged_tasks: Dict[str, float] = {}
+    # Simulated processing time per invocation (KITCHEN_SERVICE_TIMES overrides it)
+    service_time = ServiceTimeModel("none")
+    
+    def __init__(self, agent_id: str, site_id: str = DEFAULT_SITE):
+        self.agent_type = agent_id  # bare id shared by every site's instance
+        self.agent_id = site_agent_id(agent_id, site_id)
+        self.site_id = site_id
+        self.activity = ActivityTracker()  # in-flight and completed counts, updated by the engine
+        # Seeded per agent and site when KITCHEN_SEED is set, so runs are reproducible
+        simulation = get_simulation()
+        self.rng = simulation.rng(agent_id, site_id)
+        self._service_rng = simulation.rng(agent_id, site_id, "service_time")
+        self.service_time_model = simulation.service_time(agent_id, self.service_time)
         self.created_at = datetime.now()
-        logger.info(f"🤖 Agent {agent_id} initialized")
+        self.store: Optional[EventStore] = None
+        self.alert_bus: Optional[AlertBus] = None
+        self.data_bus: Optional[DataBus] = None
+        self._published_alerts: Optional[List[Dict[str, Any]]] = None
+        logger.info(f"🤖 Agent {self.agent_id} initialized")
+    
+    @property
+    def status(self) -> str:
+        """busy while any task is in flight, else idle"""
+        return self.activity.status
+    
+    @property
+    def tasks_completed(self) -> int:
+        return self.activity.completed
+    
+    async def simulate_processing(self):
+        """Wait one sampled service time, standing in for model or integration latency"""
+        delay = self.service_time_model.sample(self._service_rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
     
     @abstractmethod
     async def process_task(self, task: Task) -> Dict[str, Any]:
@@ -36,51 +157,528 @@ class Agent(ABC):
     
     async def handle_voice_command(self, transcript: str) -> Dict[str, Any]:
         """Default voice command handler"""
-        task = Task(
-            task_id=f"voice_{datetime.now().timestamp()}",
-            task_type="voice_command",
-            data={"transcript": transcript}
-        )
+        task = Task.create("voice_command", {"transcript": transcript})
         return await self.process_task(task)
+    
+    @classmethod
+    def intent_router(cls) -> IntentRouter:
+        """Router over this agent class's own intents, compiled once per class"""
+        router = cls.__dict__.get("_intent_router")
+        if router is None:
+            router = IntentRouter()
+            router.register_agent(cls.__name__, cls.intents, cls.intent_slots)
+            cls._intent_router = router
+        return router
+    
+    def resolve_intent(self, task: Task) -> Intent:
+        """Intent passed in by the API router, or routed here for direct callers"""
+        intent = task.data.get("intent")
+        if intent:
+            return Intent.from_dict(intent)
+        return self.intent_router().route(task.data.get("transcript", ""))
+    
+    def cache_ttl(self, task: Task) -> Optional[float]:
+        """Seconds a result for this task may be served from cache (None = don't cache)"""
+        return self.cacheable_tasks.get(task.type)
+    
+    def deadline(self, task: Task) -> Optional[float]:
+        """Seconds this task may take, queueing included (None = the engine default)"""
+        if task.timeout is not None:
+            return task.timeout
+        return self.task_deadlines.get(task.type, self.default_deadline)
+    
+    def has_side_effects(self, task: Task) -> bool:
+        """Whether running this task changes state, so it must run exactly once"""
+        return task.type in self.invalidates or task.type in self.side_effect_tasks
+    
+    def hedge_after(self, task: Task) -> Optional[float]:
+        """Seconds before a second attempt of this task starts (None = never)"""
+        if self.has_side_effects(task):
+            return None
+        return self.hedged_tasks.get(task.type)
+    
+    def task_label(self, task: Task) -> str:
+        """task_type label for this task's engine metrics
+        
+        Task types come from clients, so undeclared ones share the "other"
+        label to keep the metric's label set bounded.
+        """
+        return task.type if task.type in self.task_types else "other"
+    
+    def instrument(self, registry: MetricsRegistry):
+        """Hook for agent-specific metrics, called once when registered on an instrumented engine
+        
+        Create metrics with registry.counter/gauge/histogram and record them
+        from process_task; registering the same name twice returns the same metric.
+        """
+        pass
+    
+    def publish_alerts(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Report the agent's current alerts; subscribers only hear about changes"""
+        if self.alert_bus is not None and alerts != self._published_alerts:
+            self.alert_bus.update(self.site_id, self.agent_type, alerts)
+            self._published_alerts = alerts
+        return alerts
+    
+    def attach_data_bus(self, bus: DataBus):
+        """Share state with the site's other agents through its data bus"""
+        self.data_bus = bus
+        self.publish_state()
+    
+    def publish_state(self):
+        """Publish everything this agent shares on the data bus - called on
+        attach; afterwards agents publish just the keys that change"""
+    
+    def publish(self, topic: str, key: Any, value: Any):
+        """Set one key of a data bus topic (no-op without a bus)"""
+        if self.data_bus is not None:
+            self.data_bus.publish(topic, key, value)
+    
+    def snapshot_state(self) -> Optional[Dict[str, Any]]:
+        """JSON-ready copy of the agent's durable state (None = nothing to persist)
+        
+        It is serialized on a writer thread, so it must not share containers
+        that later changes mutate in place.
+        """
+        return None
+    
+    def restore_state(self, state: Dict[str, Any]):
+        """Replace durable state with a snapshot taken by snapshot_state"""
+        pass
+    
+    def apply_event(self, event: Dict[str, Any]):
+        """Re-apply a logged event during replay - must not record it again"""
+        pass
+    
+    def attach_store(self, store: EventStore):
+        """Restore from the store's latest snapshot plus its event tail, then log to it"""
+        state, events = store.load()
+        if state is not None:
+            self.restore_state(state)
+        replayed = 0
+        for event in events:
+            self.apply_event(event)
+            replayed += 1
+        self.store = store
+        logger.info(f"💾 Agent {self.agent_id} restored (snapshot @ {store.snapshot_seq}, {replayed} events replayed)")
+    
+    def record_event(self, event: Dict[str, Any]):
+        """Log a state change that has just been applied, snapshotting when due
+        
+        Call it right after mutating, with no await in between, so the log
+        order matches the order changes were applied. The snapshot state is
+        captured here for the same reason; only writing it leaves the loop.
+        """
+        if self.store is None:
+            return
+        self.store.append(event)
+        if self.store.snapshot_due:
+            state = self.snapshot_state()
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.store.snapshot(state)  # no loop to keep responsive
+            else:
+                self.store.snapshot_in_background(state)
+    
+    def close_store(self):
+        """Snapshot any unsnapshotted events and release the store"""
+        if self.store is None:
+            return
+        if self.store.events_since_snapshot:
+            self.store.snapshot(self.snapshot_state())
+        self.store.close()
+        self.store = None
+    
+    async def process_batch(self, tasks: List[Task]) -> List[Dict[str, Any]]:
+        """Process several tasks in one invocation, one result per task in order
+        
+        The default just loops over process_task; agents with a fixed
+        per-invocation cost override this to pay it once per batch.
+        """
+        return await self._run_batch(tasks, self.process_task)
+    
+    async def _run_batch(self, tasks: List[Task],
+                         handler: Callable[[Task], Awaitable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run handler for each task, reporting failures per item"""
+        results = []
+        for task in tasks:
+            try:
+                results.append(await handler(task))
+            except Exception as e:
+                logger.error(f"❌ Batch item {task.id} failed: {e}")
+                results.append(agent_fault(str(e)))
+        return results
 
 class AgentEngine:
     """Simplified Agent Engine (ADK-style)"""
-    def __init__(self):
+    def __init__(self, scheduler: Optional[TaskScheduler] = None, max_batch_size: int = 50,
+                 cache: Optional[ResultCache] = None, metrics: Optional[MetricsRegistry] = None,
+                 default_deadline: Optional[float] = None, breaker: Optional[Dict[str, Any]] = None,
+                 hedging: bool = True):
+        """default_deadline applies to agents that set none (None = no deadline).
+        breaker holds CircuitBreaker settings shared by every agent's breaker;
+        hedging=False turns hedged_tasks off engine-wide."""
         self.agents: Dict[str, Agent] = {}
-        self.active_tasks: Dict[str, Task] = {}
+        self.guards: Dict[str, AgentGuard] = {}
+        self.active_tasks: Set[Task] = set()
+        self._active_lock = threading.Lock()
+        self.scheduler = scheduler or TaskScheduler()
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.metrics = metrics
+        self.default_deadline = default_deadline
+        self.breaker_settings = breaker or {}
+        self.hedging = hedging
+        # Task lifecycle observers: on_task_start / on_task_end / on_task_rejected
+        self.observers: List[Any] = []
+        if metrics is not None:
+            self.add_observer(EngineMetrics(metrics, self))
+    
+    def add_observer(self, observer: Any):
+        """Receive task lifecycle callbacks (see EngineMetrics for the interface)"""
+        self.observers.append(observer)
     
-    def register_agent(self, agent: Agent):
-        """Register an agent with the engine"""
+    def register_agent(self, agent: Agent, concurrency: Optional[int] = None,
+                       queue_size: Optional[int] = None):
+        """Register an agent with the engine
+        
+        concurrency caps the agent's in-flight tasks; queue_size bounds how many
+        more may wait before new tasks are rejected with QueueFullError.
+        """
         self.agents[agent.agent_id] = agent
+        self.guards[agent.agent_id] = AgentGuard(CircuitBreaker(agent.agent_id, **self.breaker_settings))
+        self.scheduler.configure(agent.agent_id, concurrency, queue_size)
+        if self.metrics is not None:
+            agent.instrument(self.metrics)
         logger.info(f"📝 Agent {agent.agent_id} registered")
     
     async def execute_task(self, agent_id: str, task: Task) -> Dict[str, Any]:
-        """Execute task on specific agent"""
+        """Execute task on specific agent
+        
+        The task waits in the agent's bounded queue; AdmissionError propagates to
+        the caller when the queue is full so it can shed load instead of waiting.
+        Cacheable tasks are answered from the result cache when possible, and
+        identical concurrent ones share a single execution. A task that misses
+        its deadline is cancelled and returns an error with timed_out set;
+        while the agent's breaker is open, CircuitOpenError is raised instead.
+        """
         if agent_id not in self.agents:
             return {"error": f"Agent {agent_id} not found"}
         
         agent = self.agents[agent_id]
-        self.active_tasks[task.id] = task
+        ttl = agent.cache_ttl(task) if self.cache is not None else None
+        if ttl:
+            key = (agent_id, task.type, normalize_data(task.data))
+            return await self.cache.get_or_compute(key, ttl, lambda: self._submit(agent, task))
+        return await self._submit(agent, task)
+    
+    def _deadline(self, agent: Agent, task: Task) -> Optional[float]:
+        deadline = agent.deadline(task)
+        return self.default_deadline if deadline is None else deadline
+    
+    def _admit(self, agent: Agent, task: Optional[Task]) -> AgentGuard:
+        """The agent's guard, if its breaker lets a task through"""
+        guard = self.guards[agent.agent_id]
+        try:
+            guard.breaker.allow()
+        except AdmissionError as e:
+            for observer in self.observers:
+                observer.on_task_rejected(agent, task, e)
+            raise
+        return guard
+    
+    async def _submit(self, agent: Agent, task: Task) -> Dict[str, Any]:
+        """Run a task through the agent's breaker, deadline and worker pool"""
+        guard = self._admit(agent, task)
+        started_at = time.perf_counter()
+        outcome = None
+        try:
+            deadline = self._deadline(agent, task)
+            hedge_after = self._hedge_after(agent, task)
+            if hedge_after is None:
+                attempt = self._attempt(agent, task)
+            else:
+                attempt = self._hedged(agent, task, guard, hedge_after)
+            result = await asyncio.wait_for(attempt, deadline)
+            outcome = not is_agent_fault(result)
+            return result
+        except asyncio.TimeoutError:
+            outcome = False
+            guard.timed_out += 1
+            logger.warning(f"⌛ {task.type} on {agent.agent_id} missed its {deadline:g}s deadline")
+            return {**agent_fault(f"{task.type} on {agent.agent_id} timed out after {deadline:g}s"),
+                    "timed_out": True}
+        finally:
+            if outcome is None:
+                guard.breaker.release()
+            else:
+                guard.breaker.record(outcome, time.perf_counter() - started_at)
+    
+    def _hedge_after(self, agent: Agent, task: Task) -> Optional[float]:
+        """The agent's hedge delay for this task; None when hedging is off or undecidable"""
+        if not self.hedging:
+            return None
+        try:
+            return agent.hedge_after(task)
+        except Exception as e:
+            # Malformed task data - run it once and let the agent report the error
+            logger.warning(f"⚠️ Not hedging {task.type} on {agent.agent_id}: {e}")
+            return None
+    
+    async def _attempt(self, agent: Agent, task: Task) -> Dict[str, Any]:
+        """Queue a task on the agent's worker pool and wait for it"""
+        queued_at = time.perf_counter()
+        try:
+            return await self.scheduler.submit(
+                agent.agent_id, lambda: self._run_task(agent, task, queued_at), task.priority
+            )
+        except AdmissionError as e:
+            for observer in self.observers:
+                observer.on_task_rejected(agent, task, e)
+            raise
+    
+    async def _hedged(self, agent: Agent, task: Task, guard: AgentGuard, hedge_after: float) -> Dict[str, Any]:
+        """Start a second attempt if the first is still running after hedge_after
+        
+        The second attempt goes to another worker of the same pool - the
+        agent's site state lives in one instance, so its workers are its
+        replicas. No hedge is sent while tasks are queued: it would only wait
+        behind them and add load. The first successful result wins and the
+        other attempt is cancelled.
+        """
+        primary = asyncio.ensure_future(self._attempt(agent, task))
+        attempts = {primary}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+            pool = self.scheduler.pools.get(agent.agent_id)
+            if not done and pool is not None and pool.queued == 0:
+                attempts.add(asyncio.ensure_future(self._attempt(agent, task)))
+                guard.hedged += 1
+            # Successes first; a failure is only returned once nothing else is running
+            best, pending = None, attempts
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                best = min(done | ({best} if best else set()), key=self._attempt_rank)
+                if self._attempt_rank(best) == 0:
+                    if best is not primary:
+                        guard.hedge_wins += 1
+                    break
+            if best.cancelled():
+                raise AgentUnavailableError(agent.agent_id, f"{task.type} on {agent.agent_id} was cancelled")
+            return best.result()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+    
+    @staticmethod
+    def _attempt_rank(attempt: asyncio.Future) -> int:
+        """0 for a usable result, 1 for an agent fault, 2 for a cancelled attempt"""
+        if attempt.cancelled():
+            return 2
+        if attempt.exception() is not None or is_agent_fault(attempt.result()):
+            return 1
+        return 0
+    
+    def _invalidate_cache(self, agent: Agent, task: Task):
+        """Drop cached results made stale by a completed mutating task"""
+        if self.cache is not None and task.type in agent.invalidates:
+            self.cache.invalidate(agent.agent_id, agent.invalidates[task.type])
+    
+    async def _run_task(self, agent: Agent, task: Task, queued_at: float) -> Dict[str, Any]:
+        """Run a task on a scheduler worker"""
+        self._track(agent, task)
+        started_at = time.perf_counter()
+        for observer in self.observers:
+            observer.on_task_start(agent, task, started_at - queued_at)
+        ok = False
+        agent.activity.begin()
         
         try:
             result = await agent.process_task(task)
-            agent.tasks_completed += 1
-            agent.status = "idle"
+            self._invalidate_cache(agent, task)
+            ok = "error" not in result
             return result
         except Exception as e:
             logger.error(f"❌ Task execution failed: {e}")
-            return {"error": str(e)}
+            return agent_fault(str(e))
         finally:
-            if task.id in self.active_tasks:
-                del self.active_tasks[task.id]
+            agent.activity.end(failed=0 if ok else 1)
+            self._untrack(task)
+            duration = time.perf_counter() - started_at
+            for observer in self.observers:
+                observer.on_task_end(agent, task, duration, ok)
+    
+    def _track(self, agent: Agent, task: Task):
+        task.agent_id = agent.agent_id
+        task.started_at = time.monotonic()
+        # Keyed by identity: ids from different API processes can repeat on a shard server
+        with self._active_lock:
+            self.active_tasks.add(task)
+    
+    def _untrack(self, task: Task):
+        with self._active_lock:
+            self.active_tasks.discard(task)
+    
+    def list_active_tasks(self) -> List[Dict[str, Any]]:
+        """Tasks currently running on a worker, longest-running first"""
+        with self._active_lock:
+            running = list(self.active_tasks)
+        now = time.monotonic()
+        running.sort(key=lambda task: task.started_at)
+        return [
+            {
+                "task_id": task.id,
+                "type": task.type,
+                "agent_id": task.agent_id,
+                "priority": task.priority,
+                "started_at": datetime.fromtimestamp(wall_time(task.started_at)).isoformat(),
+                "running_ms": round((now - task.started_at) * 1000, 2)
+            }
+            for task in running
+        ]
+    
+    async def execute_batch(self, agent_id: str, tasks: List[Task]) -> List[Dict[str, Any]]:
+        """Execute many tasks on one agent, one scheduler slot per chunk
+        
+        Results come back in task order. Tasks are chunked by max_batch_size so
+        a single huge batch can't monopolise a worker.
+        """
+        if agent_id not in self.agents:
+            return [{"error": f"Agent {agent_id} not found"} for _ in tasks]
+        if not tasks:
+            return []
+        
+        agent = self.agents[agent_id]
+        guard = self._admit(agent, None)
+        queued_at = time.perf_counter()
+        outcome = None
+        try:
+            # Inside the try, so nothing between admission and here can leak the breaker slot
+            chunks = [tasks[i:i + self.max_batch_size] for i in range(0, len(tasks), self.max_batch_size)]
+            deadlines = [self._deadline(agent, task) for task in tasks]
+            deadline = None if None in deadlines else max(deadlines)
+            results = await asyncio.wait_for(asyncio.gather(*(
+                self.scheduler.submit(
+                    agent_id,
+                    lambda chunk=chunk: self._run_batch(agent, chunk, queued_at),
+                    min(task.priority for task in chunk)
+                )
+                for chunk in chunks
+            )), deadline)
+            flat = [result for chunk_results in results for result in chunk_results]
+            outcome = not any(is_agent_fault(result) for result in flat)
+            return flat
+        except asyncio.TimeoutError:
+            outcome = False
+            guard.timed_out += len(tasks)
+            logger.warning(f"⌛ Batch of {len(tasks)} on {agent_id} missed its {deadline:g}s deadline")
+            error = {**agent_fault(f"Batch on {agent_id} timed out after {deadline:g}s"), "timed_out": True}
+            return [dict(error) for _ in tasks]
+        except AdmissionError as e:
+            for observer in self.observers:
+                observer.on_task_rejected(agent, None, e)
+            raise
+        finally:
+            if outcome is None:
+                guard.breaker.release()
+            else:
+                guard.breaker.record(outcome, time.perf_counter() - queued_at)
+    
+    async def stream_batch(self, items: List[Tuple[str, Task]]) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+        """Run (agent_id, task) pairs grouped per agent, yielding results in input order"""
+        async for item in stream_grouped(items, self.execute_batch):
+            yield item
+    
+    async def _run_batch(self, agent: Agent, tasks: List[Task], queued_at: float) -> List[Dict[str, Any]]:
+        """Run a batch on a scheduler worker
+        
+        Every task in the batch is recorded with the batch's queue wait and
+        duration - that is the latency its caller saw.
+        """
+        for task in tasks:
+            self._track(agent, task)
+        started_at = time.perf_counter()
+        for observer in self.observers:
+            for task in tasks:
+                observer.on_task_start(agent, task, started_at - queued_at)
+        results: List[Dict[str, Any]] = []
+        agent.activity.begin(len(tasks))
+        
+        try:
+            results = await agent.process_batch(tasks)
+            for task in tasks:
+                self._invalidate_cache(agent, task)
+            return results
+        except Exception as e:
+            logger.error(f"❌ Batch execution failed: {e}")
+            results = [agent_fault(str(e)) for _ in tasks]
+            return results
+        finally:
+            succeeded = sum(1 for result in results if "error" not in result)
+            agent.activity.end(len(tasks), failed=len(tasks) - succeeded)
+            for task in tasks:
+                self._untrack(task)
+            duration = time.perf_counter() - started_at
+            for observer in self.observers:
+                for index, task in enumerate(tasks):
+                    ok = index < len(results) and "error" not in results[index]
+                    observer.on_task_end(agent, task, duration, ok)
     
     def get_agent_status(self) -> Dict[str, Any]:
         """Get status of all agents"""
+        queues = self.scheduler.stats()
         return {
             agent_id: {
-                "status": agent.status,
-                "tasks_completed": agent.tasks_completed,
-                "uptime": str(datetime.now() - agent.created_at)
+                **agent.activity.snapshot(),
+                "uptime": str(datetime.now() - agent.created_at),
+                "queue": queues.get(agent_id, {}),
+                **self.guards[agent_id].stats()
             }
             for agent_id, agent in self.agents.items()
         }
+    
+    async def shutdown(self):
+        """Stop all agent worker pools"""
+        await self.scheduler.shutdown()
+
+
+async def stream_grouped(items: List[Tuple[str, Task]],
+                         execute_batch: Callable[[str, List[Task]], Awaitable[List[Dict[str, Any]]]]
+                         ) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+    """Group (agent_id, task) pairs per agent and yield (index, agent_id, result) in input order
+    
+    Every agent's group starts immediately; results are yielded as soon as all
+    earlier items are done. Admission failures, and items a batch returned no
+    result for, are reported per item.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, (agent_id, _) in enumerate(items):
+        groups.setdefault(agent_id, []).append(index)
+    
+    loop = asyncio.get_running_loop()
+    futures = [loop.create_future() for _ in items]
+    
+    async def run_group(agent_id: str, indexes: List[int]):
+        try:
+            results = await execute_batch(agent_id, [items[i][1] for i in indexes])
+        except AdmissionError as e:
+            results = [{"error": str(e), "status_code": e.status_code} for _ in indexes]
+        except Exception as e:
+            logger.error(f"❌ Batch for {agent_id} failed: {e}")
+            results = [{"error": str(e)} for _ in indexes]
+        if len(results) != len(indexes):
+            logger.error(f"❌ Batch for {agent_id} returned {len(results)} results for {len(indexes)} tasks")
+        for position, index in enumerate(indexes):
+            if position < len(results):
+                futures[index].set_result(results[position])
+            else:
+                futures[index].set_result({"error": f"No result returned for task {items[index][1].id}"})
+    
+    runners = [asyncio.create_task(run_group(agent_id, indexes)) for agent_id, indexes in groups.items()]
+    try:
+        for index, (agent_id, _) in enumerate(items):
+            yield index, agent_id, await futures[index]
+    finally:
+        for runner in runners:
+            runner.cancel()
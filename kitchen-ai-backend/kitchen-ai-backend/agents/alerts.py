@@ -0,0 +1,164 @@
+"""
+Alert pub/sub for Kitchen AI
+Agents publish alert changes (raised / cleared) as their state changes, and
+displays subscribe over SSE or WebSocket instead of polling. Each event is
+encoded once and fanned out to per-subscriber bounded buffers, so a slow
+display only ever loses its own oldest events.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SEVERITIES = {"low": 0, "medium": 1, "high": 2}
+DEFAULT_BUFFER = 256
+
+
+def severity_rank(severity: Optional[str]) -> int:
+    if severity is None:
+        return 0
+    if severity not in SEVERITIES:
+        raise ValueError(f"Unknown severity '{severity}' (choose from {', '.join(SEVERITIES)})")
+    return SEVERITIES[severity]
+
+
+class AlertEvent:
+    """One alert change, JSON-encoded once for every subscriber"""
+    __slots__ = ("id", "site_id", "severity", "rank", "data", "sse")
+
+    def __init__(self, event_id: int, payload: Dict[str, Any]):
+        self.id = event_id
+        self.site_id = payload["site_id"]
+        self.severity = payload.get("severity", "low")
+        self.rank = SEVERITIES.get(self.severity, 0)
+        self.data = json.dumps({"id": event_id, **payload}, default=str)
+        self.sse = f"id: {event_id}\nevent: alert\ndata: {self.data}\n\n".encode()
+
+
+class Subscription:
+    """A subscriber's filters and its bounded event buffer (oldest dropped first)"""
+
+    def __init__(self, bus: "AlertBus", sites: Optional[Set[str]], min_rank: int, buffer: int):
+        self.bus = bus
+        self.sites = sites
+        self.min_rank = min_rank
+        self.events: deque = deque(maxlen=buffer)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, event: AlertEvent):
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[AlertEvent]:
+        """Next event, or None if timeout passes first (use it for keepalives)"""
+        if not self.events:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.events.popleft()
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class AlertBus:
+    """In-process alert fan-out with per-site subscriber indexes
+
+    Publishers report their full current alert list under a source key; the
+    bus diffs it against the previous list and only publishes the changes.
+    It also keeps every active alert so new subscribers start from the
+    current state.
+    """
+
+    def __init__(self, buffer: int = DEFAULT_BUFFER):
+        self.buffer = buffer
+        self._ids = itertools.count(1)
+        self._by_site: Dict[Optional[str], Set[Subscription]] = {}  # None = all sites
+        self._active: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}  # (site, agent) -> {key: alert}
+        self.published = 0
+
+    # ---- subscribers ---------------------------------------------------
+
+    def subscribe(self, sites: Optional[Iterable[str]] = None,
+                  min_severity: Optional[str] = None) -> Subscription:
+        site_set = set(sites) if sites else None
+        subscription = Subscription(self, site_set, severity_rank(min_severity), self.buffer)
+        for site in site_set or [None]:
+            self._by_site.setdefault(site, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for site in subscription.sites or [None]:
+            subscribers = self._by_site.get(site)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_site[site]
+
+    # ---- publishers ----------------------------------------------------
+
+    def publish(self, payload: Dict[str, Any]) -> AlertEvent:
+        event = AlertEvent(next(self._ids), payload)
+        self.published += 1
+        for subscribers in (self._by_site.get(event.site_id), self._by_site.get(None)):
+            if subscribers:
+                for subscription in subscribers:
+                    if event.rank >= subscription.min_rank:
+                        subscription.push(event)
+        return event
+
+    def update(self, site_id: str, agent_id: str, alerts: List[Dict[str, Any]]) -> int:
+        """Replace a source's current alerts, publishing raised/cleared changes; returns how many"""
+        current = {alert_key(alert): alert for alert in alerts}
+        previous = self._active.get((site_id, agent_id), {})
+        changes = 0
+        now = time.time()
+        for key, alert in current.items():
+            if previous.get(key) != alert:
+                self.publish({"site_id": site_id, "agent": agent_id, "state": "raised", "ts": now, **alert})
+                changes += 1
+        for key, alert in previous.items():
+            if key not in current:
+                self.publish({"site_id": site_id, "agent": agent_id, "state": "cleared", "ts": now, **alert})
+                changes += 1
+        if current:
+            self._active[(site_id, agent_id)] = current
+        else:
+            self._active.pop((site_id, agent_id), None)
+        return changes
+
+    def active(self, sites: Optional[Iterable[str]] = None,
+               min_severity: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Currently raised alerts matching the filters"""
+        site_set = set(sites) if sites else None
+        min_rank = severity_rank(min_severity)
+        return [
+            {"site_id": site_id, "agent": agent_id, **alert}
+            for (site_id, agent_id), alerts in self._active.items()
+            if site_set is None or site_id in site_set
+            for alert in alerts.values()
+            if SEVERITIES.get(alert.get("severity", "low"), 0) >= min_rank
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        subscribers = {sub for subs in self._by_site.values() for sub in subs}
+        return {
+            "subscribers": len(subscribers),
+            "active_alerts": sum(len(alerts) for alerts in self._active.values()),
+            "published": self.published,
+            "dropped": sum(sub.dropped for sub in subscribers)
+        }
+
+
+def alert_key(alert: Dict[str, Any]) -> str:
+    """Identity of an alert across updates: its type, plus the item it is about"""
+    item = alert.get("item")
+    return f"{alert['type']}:{item}" if item else alert["type"]
@@ -0,0 +1,131 @@
+"""
+Micro-batching for Kitchen AI
+Requests that arrive within a few milliseconds of each other are collected
+and dispatched to the agent as one batch, and each caller gets its own
+result back. Identical requests in the same window are coalesced into one
+batch item. A batch is flushed when it reaches max_batch_size, or max_wait
+after its first request arrived, whichever comes first. A longer wait
+favours throughput and a shorter one favours latency.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (group, items) -> one result per item, in order; e.g. a site's execute_batch
+BatchExecutor = Callable[[str, List[Any]], Awaitable[List[Any]]]
+
+
+class _PendingBatch:
+    __slots__ = ("items", "futures", "by_key", "timer")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.by_key: Dict[Hashable, asyncio.Future] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Collects submissions per group (site) and runs them as batches
+
+    A caller that is cancelled stops waiting without cancelling the batch,
+    because other callers may share its item. An executor error is raised to
+    every caller in the batch, and so is a missing result to each caller whose
+    item got none.
+    """
+
+    def __init__(self, executor: BatchExecutor, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._running: set = set()
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.flushed_full = 0
+
+    async def submit(self, group: str, item: Any, key: Optional[Hashable] = None) -> Any:
+        """Queue item for the group's next batch and wait for its result
+
+        Items with the same non-None key in one window share a single result.
+        """
+        self.submitted += 1
+        batch = self._pending.get(group)
+        if batch is None:
+            batch = self._pending[group] = _PendingBatch()
+            batch.timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush, group)
+
+        future = batch.by_key.get(key) if key is not None else None
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if key is not None:
+                batch.by_key[key] = future
+            if len(batch.items) >= self.max_batch_size:
+                self.flushed_full += 1
+                self._flush(group)
+        return await asyncio.shield(future)
+
+    def _flush(self, group: str):
+        batch = self._pending.pop(group, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        runner = asyncio.ensure_future(self._dispatch(group, batch))
+        self._running.add(runner)
+        runner.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, group: str, batch: _PendingBatch):
+        self.batches += 1
+        self.batched_items += len(batch.items)
+        try:
+            results = await self.executor(group, batch.items)
+        except asyncio.CancelledError:
+            for future in batch.futures:
+                if not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if len(results) != len(batch.items):
+            logger.error(f"❌ Batch executor returned {len(results)} results for {len(batch.items)} items")
+        for index, future in enumerate(batch.futures):
+            if future.done():
+                continue
+            if index < len(results):
+                future.set_result(results[index])
+            else:
+                future.set_exception(RuntimeError(f"Batch executor returned no result for item {index}"))
+
+    async def shutdown(self):
+        """Dispatch whatever is still collecting and wait for in-flight batches"""
+        for group in list(self._pending):
+            self._flush(group)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "flushed_full": self.flushed_full,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "collecting": sum(len(batch.items) for batch in self._pending.values())
+        }
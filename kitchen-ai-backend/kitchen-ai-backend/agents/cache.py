@@ -0,0 +1,144 @@
+"""
+Result cache for read-only agent tasks
+TTL expiry, LRU eviction under a memory cap, and single-flight coalescing
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from .encoding import dumps
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]  # (agent_id, task type, normalized data)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Dict[str, Any], expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+# Free-text fields whose case and spacing never change the answer. Every other
+# value (item names, supplier names) is an identifier and stays byte-exact
+TEXT_FIELDS = ("transcript",)
+
+
+def normalize_data(data: Dict[str, Any], text_fields: Iterable[str] = TEXT_FIELDS) -> str:
+    """Canonical string for task data so equivalent requests share a key"""
+    normalized = dict(data)
+    for key in text_fields:
+        value = normalized.get(key)
+        if isinstance(value, str):
+            normalized[key] = " ".join(value.lower().split())
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """LRU + TTL cache of agent results keyed on (agent_id, task type, data)
+
+    Concurrent misses for the same key share one computation. Invalidation bumps
+    a per-agent generation so computations already in flight don't repopulate
+    the cache with stale results.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_or_compute(self, key: CacheKey, ttl: float,
+                             compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return a fresh cached result or run compute once for all concurrent callers"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self._remove(key)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The fill runs as its own task so a cancelled caller can't abort it for the others
+            inflight = asyncio.ensure_future(self._fill(key, ttl, compute))
+            self._inflight[key] = inflight
+        return await asyncio.shield(inflight)
+
+    async def _fill(self, key: CacheKey, ttl: float,
+                    compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        agent_id = key[0]
+        generation = self._generations.get(agent_id, 0)
+        try:
+            result = await compute()
+        finally:
+            self._inflight.pop(key, None)
+
+        # Errors aren't cached, and neither are results invalidated mid-flight
+        if "error" not in result and self._generations.get(agent_id, 0) == generation:
+            self._store(key, result, ttl)
+        return result
+
+    def _store(self, key: CacheKey, value: Dict[str, Any], ttl: float):
+        size = len(dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def invalidate(self, agent_id: str, task_types: Optional[Iterable[str]] = None):
+        """Drop cached results for an agent, optionally only for some task types"""
+        self._generations[agent_id] = self._generations.get(agent_id, 0) + 1
+        types = set(task_types) if task_types is not None else None
+        stale = [
+            key for key in self._entries
+            if key[0] == agent_id and (types is None or key[1] in types)
+        ]
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,302 @@
+"""
+Shared data bus for Kitchen AI
+Each site has one DataBus that its agents publish state to: per-SKU stock
+from the Sourcing Agent, per-item verdicts and kitchen conditions from the
+Quality Agent. A topic is a keyed table, and every change bumps the bus
+version. Publishing a value equal to the current one is a no-op, so only
+real changes travel.
+
+Materialized views subscribe to topics and update on each change, so a
+combined view such as "items low in stock that also failed quality" is read
+in O(1) instead of being rebuilt from several agent tasks per request.
+Views cache their JSON-ready snapshot per version.
+
+    bus.publish("inventory", "basil", {"qty": 4, "low": True, ...})
+    bus.snapshot("attention_items")
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+# Topics the built-in agents publish
+INVENTORY = "inventory"  # sku -> {qty, unit, supplier, value, reorder_point, low}
+VERDICTS = "quality.verdicts"  # sku (stocked items only) -> {recommendation, overall_score, source, checked_at}
+CONDITIONS = "quality.conditions"  # "current" -> {readings, compliance_score, alerts}
+
+
+class Change:
+    """One key of one topic changing from old to new (None = absent)"""
+    __slots__ = ("topic", "key", "old", "new", "version")
+
+    def __init__(self, topic: str, key: Hashable, old: Any, new: Any, version: int):
+        self.topic = topic
+        self.key = key
+        self.old = old
+        self.new = new
+        self.version = version
+
+
+class MaterializedView:
+    """Derived data kept up to date from bus changes
+
+    Subclasses list their topics, fold each change into their state in
+    apply() (returning False when it made no difference) and build the
+    JSON-ready result in data().
+    """
+    name = ""
+    description = ""
+    topics: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.version = 0  # bus version of the last change that affected the view
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def apply(self, change: Change) -> bool:
+        raise NotImplementedError
+
+    def data(self) -> Any:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"view", "version", "data"} - built at most once per version"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot["version"] != self.version:
+            snapshot = self._snapshot = {"view": self.name, "version": self.version, "data": self.data()}
+        return snapshot
+
+
+class DataBus:
+    """Versioned keyed topics plus the views derived from them
+
+    Writes and view updates serialize on one lock; tables handed to readers
+    are read-only copies cached per topic version.
+    """
+
+    def __init__(self, site_id: str):
+        self.site_id = site_id
+        self.version = 0
+        self._tables: Dict[str, Dict[Hashable, Any]] = {}
+        self._table_versions: Dict[str, int] = {}
+        self._table_snapshots: Dict[str, Tuple[int, Mapping[Hashable, Any]]] = {}
+        self._subscribers: Dict[str, List[Callable[[Change], None]]] = {}
+        self._views: Dict[str, MaterializedView] = {}
+        self._lock = threading.RLock()
+        self.published = 0
+        self.unchanged = 0
+
+    # ---- publishing -------------------------------------------------------
+
+    def publish(self, topic: str, key: Hashable, value: Any) -> bool:
+        """Set (or with None, delete) one key; returns whether anything changed"""
+        with self._lock:
+            table = self._tables.setdefault(topic, {})
+            old = table.get(key)
+            if old == value:
+                self.unchanged += 1
+                return False
+            if value is None:
+                del table[key]
+            else:
+                table[key] = value
+            self.version += 1
+            self._table_versions[topic] = self.version
+            self.published += 1
+            change = Change(topic, key, old, value, self.version)
+            for view in self._views.values():
+                if topic in view.topics and view.apply(change):
+                    view.version = self.version
+            for callback in self._subscribers.get(topic, ()):
+                callback(change)
+            return True
+
+    def publish_many(self, topic: str, values: Mapping[Hashable, Any]) -> int:
+        """Publish several keys of one topic; returns how many changed"""
+        with self._lock:
+            return sum(self.publish(topic, key, value) for key, value in values.items())
+
+    def subscribe(self, topics: Iterable[str], callback: Callable[[Change], None]) -> Callable[[], None]:
+        """Call callback(change) on every change to the topics; returns an unsubscribe function"""
+        topics = list(topics)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                for topic in topics:
+                    self._subscribers[topic].remove(callback)
+        return unsubscribe
+
+    # ---- reading ----------------------------------------------------------
+
+    def get(self, topic: str, key: Hashable) -> Any:
+        return self._tables.get(topic, {}).get(key)
+
+    def table(self, topic: str) -> Mapping[Hashable, Any]:
+        """Read-only copy of a whole topic, rebuilt at most once per change to it"""
+        version = self._table_versions.get(topic, 0)
+        cached = self._table_snapshots.get(topic)
+        if cached is None or cached[0] != version:
+            with self._lock:
+                cached = (version, MappingProxyType(dict(self._tables.get(topic, {}))))
+                self._table_snapshots[topic] = cached
+        return cached[1]
+
+    # ---- views ------------------------------------------------------------
+
+    def add_view(self, view: MaterializedView) -> MaterializedView:
+        """Register a view and fold the topics' current contents into it"""
+        with self._lock:
+            if view.name in self._views:
+                raise ValueError(f"View {view.name} is already registered")
+            for topic in view.topics:
+                for key, value in self._tables.get(topic, {}).items():
+                    if view.apply(Change(topic, key, None, value, self.version)):
+                        view.version = self.version
+            self._views[view.name] = view
+            return view
+
+    def snapshot(self, name: str) -> Dict[str, Any]:
+        """A view's current snapshot; only a stale one is rebuilt, under the write lock"""
+        view = self.view(name)
+        snapshot = view._snapshot
+        if snapshot is None or snapshot["version"] != view.version:
+            with self._lock:
+                snapshot = view.snapshot()
+        return snapshot
+
+    def view(self, name: str) -> MaterializedView:
+        if name not in self._views:
+            raise KeyError(f"Unknown view '{name}' (choose from {', '.join(self._views)})")
+        return self._views[name]
+
+    def views(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": view.name, "description": view.description, "topics": list(view.topics),
+             "version": view.version}
+            for view in self._views.values()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "site_id": self.site_id,
+            "version": self.version,
+            "topics": {topic: len(table) for topic, table in self._tables.items()},
+            "published": self.published,
+            "unchanged": self.unchanged,
+            "views": {name: view.version for name, view in self._views.items()}
+        }
+
+
+# ===========================================
+# BUILT-IN VIEWS
+# ===========================================
+
+class AttentionItems(MaterializedView):
+    """Items at or below their reorder point whose latest quality check failed
+
+    Keeps the joined entry for every member, so a change costs O(1) and a
+    snapshot is one copy of the member list, in the order items joined it.
+    """
+    name = "attention_items"
+    description = "Items low in stock whose latest quality check was rejected"
+    topics = (INVENTORY, VERDICTS)
+
+    def __init__(self):
+        super().__init__()
+        self.low: Dict[Hashable, Dict[str, Any]] = {}
+        self.rejected: Dict[Hashable, Dict[str, Any]] = {}
+        self.members: Dict[Hashable, Dict[str, Any]] = {}
+
+    def apply(self, change: Change) -> bool:
+        key = change.key
+        if change.topic == INVENTORY:
+            side, member = self.low, change.new is not None and change.new.get("low")
+        else:
+            side, member = self.rejected, change.new is not None and change.new.get("recommendation") == "rejected"
+        if member:
+            side[key] = change.new
+        else:
+            side.pop(key, None)
+
+        if key not in self.low or key not in self.rejected:
+            return self.members.pop(key, None) is not None
+        stock, verdict = self.low[key], self.rejected[key]
+        entry = {
+            "item": key,
+            "qty": stock["qty"],
+            "unit": stock.get("unit"),
+            "reorder_point": stock.get("reorder_point"),
+            "supplier": stock.get("supplier"),
+            "overall_score": verdict.get("overall_score"),
+            "checked_at": verdict.get("checked_at")
+        }
+        if self.members.get(key) == entry:
+            return False
+        self.members[key] = entry
+        return True
+
+    def data(self) -> List[Dict[str, Any]]:
+        return list(self.members.values())
+
+
+class KitchenOverview(MaterializedView):
+    """Running stock totals, verdict counts and current conditions for the site"""
+    name = "kitchen_overview"
+    description = "Stock value and low items, quality verdicts and current kitchen conditions"
+    topics = (INVENTORY, VERDICTS, CONDITIONS)
+
+    def __init__(self):
+        super().__init__()
+        self.items = 0
+        self.stock_value = 0.0
+        self.low: Dict[Hashable, float] = {}
+        self.verdicts: Dict[str, int] = {}
+        self.last_checked: Optional[float] = None
+        self.conditions: Optional[Dict[str, Any]] = None
+
+    def apply(self, change: Change) -> bool:
+        old, new = change.old, change.new
+        if change.topic == INVENTORY:
+            self.items += (new is not None) - (old is not None)
+            self.stock_value += (new or {}).get("value", 0.0) - (old or {}).get("value", 0.0)
+            if new is not None and new.get("low"):
+                self.low[change.key] = new["qty"]
+            else:
+                self.low.pop(change.key, None)
+        elif change.topic == VERDICTS:
+            for verdict, step in (((old or {}).get("recommendation"), -1),
+                                  ((new or {}).get("recommendation"), 1)):
+                if verdict is not None:
+                    self.verdicts[verdict] = self.verdicts.get(verdict, 0) + step
+            if new is not None:
+                self.last_checked = max(self.last_checked or 0.0, new.get("checked_at", 0.0))
+        else:
+            self.conditions = new
+        return True
+
+    def data(self) -> Dict[str, Any]:
+        return {
+            "inventory": {
+                "items": self.items,
+                "stock_value": round(self.stock_value, 2),
+                "low_stock": dict(sorted(self.low.items()))
+            },
+            "quality": {
+                "verdicts": {verdict: count for verdict, count in self.verdicts.items() if count},
+                "last_checked": self.last_checked
+            },
+            "conditions": self.conditions
+        }
+
+
+DEFAULT_VIEWS = (AttentionItems, KitchenOverview)
+
+
+def site_data_bus(site_id: str) -> DataBus:
+    """A site's bus with the built-in views registered"""
+    bus = DataBus(site_id)
+    for view in DEFAULT_VIEWS:
+        bus.add_view(view())
+    return bus
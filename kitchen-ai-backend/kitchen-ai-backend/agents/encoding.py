@@ -0,0 +1,55 @@
+"""
+JSON encoding fast path for Kitchen AI
+orjson-backed encoding (stdlib json when orjson isn't installed) and a cache
+of pre-encoded bytes for payloads that rarely change
+"""
+
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json produces the same documents
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON; unknown types fall back to str(), like jsonable_encoder's output"""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=_ORJSON_OPTIONS)
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class PayloadCache:
+    """Pre-encoded JSON bodies keyed by name and a version
+
+    Callers pass the current version of the data behind a payload (a counter
+    bumped on every mutation); a stale version re-encodes once and replaces
+    the entry, so invalidation is just "bump the version".
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Hashable, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> bytes:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        body = dumps(build())
+        self._entries[key] = (version, body)
+        return body
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
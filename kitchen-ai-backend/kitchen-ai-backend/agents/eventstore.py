@@ -0,0 +1,287 @@
+"""
+Event-sourced persistence for agent state
+An append-only log of memory-mapped segment files plus periodic JSON
+snapshots. Restoring loads the newest snapshot and replays only the events
+logged after it, so startup cost tracks the snapshot interval, not history.
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows - no cross-process lock, one writer is assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# payload length, crc32 of payload, sequence number
+RECORD_HEADER = struct.Struct("<IIQ")
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_SNAPSHOT_EVERY = 1000
+
+_SEGMENT_NAME = re.compile(r"^events-(\d{16})\.log$")
+_SNAPSHOT_NAME = re.compile(r"^snapshot-(\d{16})\.json$")
+
+
+class EventLog:
+    """Append-only log split into fixed-size, memory-mapped segments
+
+    Segments are preallocated with zeros and records are copied straight into
+    the mapping, so an append is a memcpy rather than a write syscall. Each
+    record is [length, crc32, seq] + JSON payload; the header is written last,
+    so a torn append reads back as a zero or bad-crc header and marks the end.
+    Segment files are named after the first sequence number they hold.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.segments: List[int] = sorted(
+            int(match.group(1)) for match in map(_SEGMENT_NAME.match, os.listdir(directory)) if match
+        )
+        self.last_seq = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._offset = 0
+
+        if self.segments:
+            first = self.segments[-1]
+            self.last_seq = first - 1
+            self._open_segment(first)
+            for seq, _, end in self._scan(self._map):
+                self.last_seq, self._offset = seq, end
+        else:
+            self._open_segment(1)
+            self.segments.append(1)
+
+    def _path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"events-{first_seq:016d}.log")
+
+    def _open_segment(self, first_seq: int, min_bytes: int = 0):
+        self._close_segment()
+        self._file = open(self._path(first_seq), "a+b")
+        size = max(self.segment_bytes, min_bytes, os.fstat(self._file.fileno()).st_size)
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._offset = 0
+
+    def _close_segment(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            # Drop the unused preallocated tail; reopening extends it again
+            self._file.truncate(self._offset)
+            self._file.close()
+            self._map = self._file = None
+
+    @staticmethod
+    def _scan(buffer, offset: int = 0) -> Iterator[Tuple[int, bytes, int]]:
+        """Yield (seq, payload, end_offset) for every intact record"""
+        size = len(buffer)
+        while offset + RECORD_HEADER.size <= size:
+            length, crc, seq = RECORD_HEADER.unpack_from(buffer, offset)
+            start = offset + RECORD_HEADER.size
+            if length == 0 or start + length > size:
+                return
+            payload = bytes(buffer[start:start + length])
+            if zlib.crc32(payload) != crc:
+                logger.warning(f"⚠️ Torn event record at offset {offset}; ignoring the rest of the segment")
+                return
+            offset = start + length
+            yield seq, payload, offset
+
+    def append(self, event: Dict[str, Any]) -> int:
+        """Append one event and return its sequence number"""
+        payload = json.dumps(event, separators=(",", ":")).encode()
+        needed = RECORD_HEADER.size + len(payload)
+        if self._offset + needed > len(self._map):
+            self.roll(min_bytes=needed)
+
+        seq = self.last_seq + 1
+        start = self._offset + RECORD_HEADER.size
+        self._map[start:start + len(payload)] = payload
+        RECORD_HEADER.pack_into(self._map, self._offset, len(payload), zlib.crc32(payload), seq)
+        self._offset += needed
+        self.last_seq = seq
+        return seq
+
+    def roll(self, min_bytes: int = 0):
+        """Start a new segment at the next sequence number"""
+        first = self.last_seq + 1
+        if self._offset == 0 and self.segments[-1] == first:
+            # Current segment is still empty - just make sure the record fits
+            if min_bytes > len(self._map):
+                self._open_segment(first, min_bytes)
+            return
+        self._open_segment(first, min_bytes)
+        self.segments.append(first)
+
+    def replay(self, after_seq: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (seq, event) for every event with seq > after_seq, oldest first"""
+        for index, first in enumerate(self.segments):
+            following = self.segments[index + 1] if index + 1 < len(self.segments) else None
+            if following is not None and following <= after_seq + 1:
+                continue  # every record in this segment is covered
+            if first == self.segments[-1]:
+                records = list(self._scan(self._map[:self._offset]))
+            else:
+                with open(self._path(first), "rb") as f:
+                    records = list(self._scan(f.read()))
+            for seq, payload, _ in records:
+                if seq > after_seq:
+                    yield seq, json.loads(payload)
+
+    def compact(self, upto_seq: int) -> int:
+        """Delete closed segments whose events are all <= upto_seq; returns how many"""
+        removed = 0
+        while len(self.segments) > 1 and self.segments[1] <= upto_seq + 1:
+            os.remove(self._path(self.segments.pop(0)))
+            removed += 1
+        return removed
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        self._close_segment()
+
+
+class EventStore:
+    """Event log plus snapshots for one agent's state
+
+    Writes to the mapping survive a process crash as soon as append returns;
+    flush (msync) runs on every snapshot and on close. snapshot_in_background
+    serializes and fsyncs on a writer thread, one snapshot at a time, and
+    drops covered history back on the event loop once the file is durable.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, "LOCK"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(f"Event store {directory} is open in another process")
+        self.log = EventLog(directory, segment_bytes)
+        self.snapshot_seq = self._latest_snapshot_seq()
+        self.events_since_snapshot = self.log.last_seq - self.snapshot_seq
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Tuple[int, Future]] = None  # snapshot being written
+
+    def _snapshot_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{seq:016d}.json")
+
+    def _snapshot_seqs(self) -> List[int]:
+        return sorted(int(match.group(1)) for match in map(_SNAPSHOT_NAME.match, os.listdir(self.directory)) if match)
+
+    def _latest_snapshot_seq(self) -> int:
+        seqs = self._snapshot_seqs()
+        return seqs[-1] if seqs else 0
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+        """Latest snapshot state (None if there is none) and the events logged after it"""
+        state = None
+        if self.snapshot_seq:
+            with open(self._snapshot_path(self.snapshot_seq)) as f:
+                state = json.load(f)["state"]
+        return state, (event for _, event in self.log.replay(self.snapshot_seq))
+
+    def append(self, event: Dict[str, Any]) -> int:
+        seq = self.log.append(event)
+        self.events_since_snapshot += 1
+        return seq
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self._pending is None and self.events_since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state: Dict[str, Any]):
+        """Persist state as of the last appended event, then drop history it covers"""
+        self._settle(wait=True)
+        seq = self.log.last_seq
+        self.log.flush()
+        self._write_snapshot(seq, state)
+        self._commit_snapshot(seq)
+
+    def snapshot_in_background(self, state: Dict[str, Any]) -> asyncio.Future:
+        """Like snapshot, but the file is written off the event loop
+
+        state must already be captured - nothing may mutate it while the
+        writer thread serializes it. Call from the loop, when snapshot_due.
+        """
+        seq = self.log.last_seq
+        self.log.flush()
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
+        written = self._writer.submit(self._write_snapshot, seq, state)
+        self._pending = (seq, written)
+        future = asyncio.wrap_future(written)
+        future.add_done_callback(lambda _: self._settle())
+        return future
+
+    async def wait_for_snapshot(self):
+        """Wait until a background snapshot, if one is running, is written and committed"""
+        if self._pending is not None:
+            await asyncio.wait((asyncio.wrap_future(self._pending[1]),))
+            self._settle(wait=True)
+
+    def _settle(self, wait: bool = False):
+        """Commit the background snapshot once it is on disk (wait=True blocks for it)"""
+        if self._pending is None:
+            return
+        seq, written = self._pending
+        if not (wait or written.done()):
+            return
+        self._pending = None
+        try:
+            written.result()
+        except Exception as e:
+            # History is kept, so the next event retries the snapshot
+            logger.error(f"❌ Snapshot at event {seq} failed: {e}")
+            return
+        self._commit_snapshot(seq)
+
+    def _write_snapshot(self, seq: int, state: Dict[str, Any]):
+        path = self._snapshot_path(seq)
+        temp = path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump({"seq": seq, "created_at": time.time(), "state": state}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+
+    def _commit_snapshot(self, seq: int):
+        """Make seq the restore point and drop the history it covers"""
+        for old in self._snapshot_seqs():
+            if old < seq:
+                os.remove(self._snapshot_path(old))
+        self.log.roll()
+        self.log.compact(seq)
+        self.snapshot_seq = seq
+        self.events_since_snapshot = self.log.last_seq - seq
+        logger.info(f"💾 Snapshot at event {seq} written to {self.directory}")
+
+    def close(self):
+        self._settle(wait=True)
+        if self._writer is not None:
+            self._writer.shutdown()
+            self._writer = None
+        self.log.close()
+        self._lock_file.close()
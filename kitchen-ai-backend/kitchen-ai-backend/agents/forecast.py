@@ -0,0 +1,313 @@
+"""
+Demand forecasting for the Sourcing Agent
+Per-SKU consumption is bucketed by meal period (breakfast, lunch, afternoon,
+dinner, overnight) and stored as a compact float32 ring buffer of history.
+Each SKU keeps an additive Holt-Winters style model: a smoothed level plus one
+seasonal offset per (weekday, meal period) slot. The model updates in O(1)
+whenever a bucket closes, so it is never refit from the stored history.
+"""
+
+import base64
+import math
+import time
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# (name, first hour) in day order; the last period runs past midnight
+MEAL_PERIODS: Tuple[Tuple[str, int], ...] = (
+    ("breakfast", 5), ("lunch", 11), ("afternoon", 15), ("dinner", 18), ("overnight", 23)
+)
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+DEFAULT_HISTORY_DAYS = 365
+# 1970-01-01 was a Thursday; with Monday = 0, day 0 is weekday 3
+_EPOCH_WEEKDAY = 3
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _period_table(periods: Tuple[Tuple[str, int], ...]) -> List[int]:
+    """hour -> period index, wrapping the last period round midnight"""
+    table = []
+    for hour in range(24):
+        index = len(periods) - 1
+        for i, (_, start) in enumerate(periods):
+            if hour >= start:
+                index = i
+        table.append(index)
+    return table
+
+
+class SkuSeries:
+    """History ring and model state for one SKU"""
+    __slots__ = ("level", "season", "mae", "open_bucket", "open_total", "history",
+                 "first_bucket", "last_bucket", "buckets_closed")
+
+    def __init__(self, slots: int, capacity: int):
+        self.level = 0.0
+        self.season = array("d", bytes(8 * slots))
+        self.mae = 0.0
+        self.open_bucket = -1        # bucket still collecting consumption
+        self.open_total = 0.0
+        self.history = array("f", bytes(4 * capacity))
+        self.first_bucket = -1       # oldest bucket written to history
+        self.last_bucket = -1        # newest bucket written to history
+        self.buckets_closed = 0
+
+
+class DemandForecaster:
+    """Incrementally updated seasonal consumption forecasts for many SKUs
+
+    record() adds consumption to the open bucket. When an event lands in a
+    later bucket, the open one (and any empty buckets since) is closed into
+    history and the model: level += alpha * error, slot offset += gamma *
+    error, and the mean absolute error tracks forecast accuracy.
+    """
+
+    def __init__(self, periods: Tuple[Tuple[str, int], ...] = MEAL_PERIODS, alpha: float = 0.2,
+                 gamma: float = 0.15, error_smoothing: float = 0.05,
+                 history_days: int = DEFAULT_HISTORY_DAYS, utc_offset_hours: Optional[float] = None):
+        self.periods = periods
+        self.per_day = len(periods)
+        self.slots = 7 * self.per_day
+        self.alpha = alpha
+        self.gamma = gamma
+        self.error_smoothing = error_smoothing
+        self.capacity = history_days * self.per_day
+        if utc_offset_hours is None:
+            offset = datetime.now().astimezone().utcoffset()
+            utc_offset_hours = offset.total_seconds() / 3600 if offset else 0.0
+        self.utc_offset = utc_offset_hours * 3600
+        self._period_of_hour = _period_table(periods)
+        self._period_starts = [start for _, start in periods]
+        self.series: Dict[str, SkuSeries] = {}
+        self.events = 0
+
+    # ---- time buckets ----------------------------------------------------
+
+    def bucket(self, ts: float) -> int:
+        """Global meal-period index for a timestamp (overnight belongs to the day it started)"""
+        local = ts + self.utc_offset
+        day, seconds = divmod(int(local), 86400)
+        hour = seconds // 3600
+        period = self._period_of_hour[hour]
+        if hour < self._period_starts[0]:
+            day -= 1  # small hours are the previous day's last period
+        return day * self.per_day + period
+
+    def _slot(self, bucket: int) -> int:
+        day, period = divmod(bucket, self.per_day)
+        return ((day + _EPOCH_WEEKDAY) % 7) * self.per_day + period
+
+    def _bucket_start(self, bucket: int) -> float:
+        day, period = divmod(bucket, self.per_day)
+        return day * 86400 + self._period_starts[period] * 3600 - self.utc_offset
+
+    # ---- updates ---------------------------------------------------------
+
+    def record(self, sku: str, qty: float, ts: Optional[float] = None):
+        """Add consumption (a positive quantity) at ts"""
+        series = self.series.get(sku)
+        if series is None:
+            series = self.series[sku] = SkuSeries(self.slots, self.capacity)
+        bucket = self.bucket(ts if ts is not None else time.time())
+        if bucket > series.open_bucket:
+            if series.open_bucket >= 0:
+                self._close_until(series, bucket)
+            series.open_bucket = bucket
+            series.open_total = 0.0
+        elif bucket < series.open_bucket:
+            # Late event for an already closed bucket: keep it in history only
+            age = series.last_bucket - bucket
+            if 0 <= age < self.capacity:
+                series.history[bucket % self.capacity] += qty
+                series.first_bucket = min(series.first_bucket, bucket)
+            self.events += 1
+            return
+        series.open_total += qty
+        self.events += 1
+
+    def _close_until(self, series: SkuSeries, bucket: int):
+        """Close the open bucket and every empty bucket before `bucket`"""
+        first = series.open_bucket
+        # Idle longer than the history window: older buckets would be overwritten anyway
+        start = max(first, bucket - self.capacity)
+        if start > first:
+            self._close(series, first, series.open_total)
+        for closing in range(start, bucket):
+            self._close(series, closing, series.open_total if closing == first else 0.0)
+
+    def _close(self, series: SkuSeries, bucket: int, actual: float):
+        slot = self._slot(bucket)
+        # Clear buckets skipped over in the ring, then write this one
+        if bucket - series.last_bucket > self.capacity:
+            series.history = array("f", bytes(4 * self.capacity))
+            series.first_bucket = bucket
+        else:
+            for stale in range(series.last_bucket + 1, bucket):
+                series.history[stale % self.capacity] = 0.0
+        series.history[bucket % self.capacity] = actual
+        series.last_bucket = bucket
+        if series.first_bucket < 0:
+            series.first_bucket = bucket
+
+        if series.buckets_closed == 0:
+            series.level = actual
+        else:
+            error = actual - (series.level + series.season[slot])
+            series.level += self.alpha * error
+            series.season[slot] += self.gamma * (1 - self.alpha) * error
+            series.mae += self.error_smoothing * (abs(error) - series.mae)
+        series.buckets_closed += 1
+
+    # ---- queries ---------------------------------------------------------
+
+    def _expected(self, series: SkuSeries, bucket: int) -> float:
+        return max(series.level + series.season[self._slot(bucket)], 0.0)
+
+    def forecast(self, sku: str, horizon_days: int = 7, now: Optional[float] = None,
+                 on_hand: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Expected consumption per day and per meal period, from now to the end of
+        the horizon (today's remaining periods count as the first day)
+
+        With on_hand, also estimates when that stock runs out.
+        """
+        series = self.series.get(sku)
+        if series is None:
+            return None
+        now = now if now is not None else time.time()
+        current = self.bucket(now)
+        if current > series.open_bucket >= 0:
+            # Nothing recorded since - close the open bucket so the model is current
+            self._close_until(series, current)
+            series.open_bucket, series.open_total = current, 0.0
+
+        first_day = current // self.per_day
+        end = (first_day + horizon_days) * self.per_day
+        daily = [0.0] * horizon_days
+        by_period = [0.0] * self.per_day
+        total = 0.0
+        remaining = on_hand
+        stockout_at: Optional[float] = None
+        # Until a period has closed, the open period's usage is the only estimate
+        provisional = series.buckets_closed == 0
+        for bucket in range(current, end):
+            expected = series.open_total if provisional else self._expected(series, bucket)
+            if bucket == series.open_bucket:
+                expected = max(expected - series.open_total, 0.0)  # part already used
+            total += expected
+            by_period[bucket % self.per_day] += expected
+            daily[bucket // self.per_day - first_day] += expected
+            if remaining is not None and stockout_at is None and expected > 0:
+                if expected >= remaining:
+                    start = max(self._bucket_start(bucket), now)
+                    stockout_at = start + 86400 / self.per_day * remaining / expected
+                remaining -= expected
+
+        # Mean absolute error -> rough standard deviation per bucket, summed in quadrature
+        spread = 1.96 * 1.25 * series.mae * math.sqrt(end - current)
+        result = {
+            "item": sku,
+            "horizon_days": horizon_days,
+            "expected_total": round(total, 2),
+            "interval_95": [round(max(total - spread, 0.0), 2), round(total + spread, 2)],
+            "daily": [
+                {
+                    "date": date.fromordinal(_EPOCH_ORDINAL + first_day + i).isoformat(),
+                    "weekday": WEEKDAYS[(first_day + i + _EPOCH_WEEKDAY) % 7],
+                    "expected": round(value, 2)
+                }
+                for i, value in enumerate(daily)
+            ],
+            "by_meal_period": {
+                name: round(value, 2) for (name, _), value in zip(self.periods, by_period)
+            },
+            "level_per_period": round(series.level, 3),
+            "mean_abs_error": round(series.mae, 3),
+            "periods_observed": series.buckets_closed,
+            # A full week of slots is needed before seasonal offsets mean much
+            "seasonal": series.buckets_closed >= self.slots
+        }
+        if on_hand is not None:
+            result["on_hand"] = on_hand
+            result["days_until_stockout"] = (round((stockout_at - now) / 86400, 2)
+                                             if stockout_at is not None else None)
+        return result
+
+    def history(self, sku: str, days: int = 28) -> List[float]:
+        """Daily consumption totals for the last `days` closed days, oldest first"""
+        series = self.series.get(sku)
+        if series is None or series.last_bucket < 0:
+            return []
+        last_day = series.last_bucket // self.per_day
+        days = min(days, self.capacity // self.per_day)
+        totals = []
+        for day in range(last_day - days + 1, last_day + 1):
+            total = 0.0
+            for bucket in range(day * self.per_day, (day + 1) * self.per_day):
+                if series.last_bucket - self.capacity < bucket <= series.last_bucket:
+                    total += series.history[bucket % self.capacity]
+            totals.append(round(total, 3))
+        return totals
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    # ---- persistence -----------------------------------------------------
+
+    def _history_span(self, series: SkuSeries) -> Tuple[int, array]:
+        """(first bucket, values oldest first) for the populated part of the ring"""
+        if series.last_bucket < 0:
+            return series.last_bucket + 1, array("f")
+        start = max(series.first_bucket, series.last_bucket - self.capacity + 1)
+        head, tail = start % self.capacity, series.last_bucket % self.capacity + 1
+        if head < tail:
+            return start, series.history[head:tail]
+        return start, series.history[head:] + series.history[:tail]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-ready state; arrays are stored as base64 bytes
+
+        Only the populated span of each history ring is saved, so a SKU seen
+        for a week costs a week of buckets, not the whole window.
+        """
+        state = {}
+        for sku, series in self.series.items():
+            history_start, history = self._history_span(series)
+            state[sku] = {
+                "level": series.level,
+                "mae": series.mae,
+                "open_bucket": series.open_bucket,
+                "open_total": series.open_total,
+                "last_bucket": series.last_bucket,
+                "buckets_closed": series.buckets_closed,
+                "season": base64.b64encode(series.season.tobytes()).decode(),
+                "history_start": history_start,
+                "history": base64.b64encode(history.tobytes()).decode()
+            }
+        return state
+
+    def restore(self, state: Dict[str, Any]):
+        self.series = {}
+        for sku, saved in state.items():
+            series = SkuSeries(self.slots, self.capacity)
+            season = array("d", base64.b64decode(saved["season"]))
+            history = array("f", base64.b64decode(saved["history"]))
+            if len(season) != self.slots or len(history) > self.capacity:
+                continue  # saved with different periods or history length - rebuild from events
+            series.season = season
+            if "history_start" in saved:
+                for offset, value in enumerate(history):
+                    series.history[(saved["history_start"] + offset) % self.capacity] = value
+                series.first_bucket = saved["history_start"]
+            elif len(history) == self.capacity:
+                series.history = history  # older snapshots saved the whole ring
+                series.first_bucket = max(saved["last_bucket"] - self.capacity + 1, -1)
+            else:
+                continue
+            series.level = saved["level"]
+            series.mae = saved["mae"]
+            series.open_bucket = saved["open_bucket"]
+            series.open_total = saved["open_total"]
+            series.last_bucket = saved["last_bucket"]
+            series.buckets_closed = saved["buckets_closed"]
+            self.series[sku] = series
@@ -0,0 +1,129 @@
+"""
+Intent routing for voice commands
+Tokenizes a transcript once and matches it against a precompiled phrase trie,
+so routing cost depends on transcript length, not vocabulary size
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class Intent:
+    """Routing decision for a transcript: target agent, intent name and slots"""
+    __slots__ = ("name", "agent_id", "slots", "matched")
+
+    def __init__(self, name: str, agent_id: Optional[str], slots: Optional[Dict[str, List[str]]] = None,
+                 matched: Optional[List[str]] = None):
+        self.name = name
+        self.agent_id = agent_id
+        self.slots = slots or {}
+        self.matched = matched or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "agent_id": self.agent_id, "slots": self.slots, "matched": self.matched}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Intent":
+        return cls(data["name"], data.get("agent_id"), data.get("slots"), data.get("matched"))
+
+
+class _Node:
+    __slots__ = ("children", "payloads")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.payloads: List[Tuple] = []
+
+
+class IntentRouter:
+    """Phrase trie over word tokens
+
+    Intents registered earlier win ties, so registration order encodes
+    precedence (agents first, then each agent's intents in declared order).
+    Slot phrases ("cherry tomatoes" -> item=cherry_tomatoes) live in the same
+    trie and are collected in the same pass.
+    """
+
+    def __init__(self, default_agent: Optional[str] = None, fallback_intent: str = "help"):
+        self.default_agent = default_agent
+        self.fallback_intent = fallback_intent
+        self._root = _Node()
+        self._rank = 0
+        self.phrase_count = 0
+
+    def _insert(self, phrase: str, payload: Tuple):
+        tokens = tokenize(phrase)
+        if not tokens:
+            raise ValueError(f"Phrase '{phrase}' has no words")
+        node = self._root
+        for token in tokens:
+            node = node.children.setdefault(token, _Node())
+        node.payloads.append(payload)
+        self.phrase_count += 1
+
+    def register_intent(self, agent_id: str, intent: str, phrases: Iterable[str]):
+        rank = self._rank
+        self._rank += 1
+        for phrase in phrases:
+            self._insert(phrase, ("intent", rank, agent_id, intent))
+
+    def register_agent(self, agent_id: str, intents: Dict[str, Iterable[str]],
+                       slots: Optional[Dict[str, Dict[str, str]]] = None):
+        """Register an agent's intents (in precedence order) and slot vocabularies"""
+        for intent, phrases in intents.items():
+            self.register_intent(agent_id, intent, phrases)
+        for slot, values in (slots or {}).items():
+            self.register_slot(slot, values)
+
+    def register_slot(self, slot: str, values: Dict[str, str]):
+        """values maps spoken phrase -> slot value"""
+        for phrase, value in values.items():
+            self._insert(phrase, ("slot", slot, value))
+
+    def route(self, transcript: str, agent_id: Optional[str] = None) -> Intent:
+        """Leftmost-longest phrase matching in one pass over the tokens
+
+        When agent_id is given only that agent's intents are considered.
+        """
+        tokens = tokenize(transcript)
+        best: Optional[Tuple[int, str, str]] = None
+        slots: Dict[str, List[str]] = {}
+        matched: List[str] = []
+
+        i = 0
+        while i < len(tokens):
+            node = self._root
+            longest_end, longest_payloads = i, None
+            j = i
+            while j < len(tokens):
+                node = node.children.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if node.payloads:
+                    longest_end, longest_payloads = j, node.payloads
+            if longest_payloads is None:
+                i += 1
+                continue
+
+            matched.append(" ".join(tokens[i:longest_end]))
+            for payload in longest_payloads:
+                if payload[0] == "slot":
+                    values = slots.setdefault(payload[1], [])
+                    if payload[2] not in values:
+                        values.append(payload[2])
+                else:
+                    _, rank, owner, intent = payload
+                    if (agent_id is None or owner == agent_id) and (best is None or rank < best[0]):
+                        best = (rank, owner, intent)
+            i = longest_end
+
+        if best is None:
+            return Intent(self.fallback_intent, agent_id or self.default_agent, slots, matched)
+        return Intent(best[2], best[1], slots, matched)
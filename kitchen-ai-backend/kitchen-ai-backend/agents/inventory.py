@@ -0,0 +1,178 @@
+"""
+Indexed inventory store for the Sourcing Agent
+Keeps a qty-sorted index, per-supplier indexes and running valuation totals
+so low-stock, by-supplier and valuation queries never rescan every SKU.
+Records are replaced rather than mutated, so a snapshot handed to a reader
+stays consistent while writers carry on.
+"""
+
+import bisect
+import math
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+_SKU_SEPARATORS = re.compile(r"[\s\-]+")
+
+
+class StockError(ValueError):
+    """Raised for invalid stock movements"""
+
+
+def normalize_sku(name: Any) -> Optional[str]:
+    """SKU form of an item name ("Cherry Tomatoes" -> "cherry_tomatoes"), None if it has none"""
+    if not isinstance(name, str):
+        return None
+    return _SKU_SEPARATORS.sub("_", name.strip().lower()) or None
+
+
+class InventoryStore:
+    """SKU records plus incrementally maintained indexes
+
+    - _by_qty: sorted list of (qty, sku); low-stock is a bisect + prefix slice
+    - _by_supplier: supplier -> set of SKUs
+    - totals: overall and per-supplier stock value, updated per change
+    Writes serialize on a lock; snapshot() is rebuilt at most once per change.
+    """
+
+    def __init__(self, items: Optional[Dict[str, Dict[str, Any]]] = None,
+                 low_stock_threshold: float = 20):
+        self.low_stock_threshold = low_stock_threshold
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._by_qty: List[Tuple[float, str]] = []
+        self._by_supplier: Dict[str, Set[str]] = {}
+        self._supplier_value: Dict[str, float] = {}
+        self.total_value = 0.0
+        self.version = 0
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        for sku, record in (items or {}).items():
+            self.upsert(sku, **record)
+
+    # ---- read API -------------------------------------------------------
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def get(self, sku: str) -> Optional[Dict[str, Any]]:
+        record = self._items.get(sku)
+        return dict(record) if record is not None else None
+
+    def items(self):
+        return self._items.items()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"version", "items", "total_value"} from one instant - read-only
+
+        Shared by every reader until the next change, so a read costs O(1)
+        and a change costs one O(n) reference copy on the next read.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot["version"] != self.version:
+            with self._lock:
+                snapshot = {"version": self.version, "items": dict(self._items), "total_value": self.total_value}
+                self._snapshot = snapshot
+        return snapshot
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-ready copy of every record (the records themselves are never mutated)"""
+        return dict(self.snapshot()["items"])
+
+    def low_stock(self, threshold: Optional[float] = None) -> List[str]:
+        """SKUs with qty below threshold, lowest first - O(log n + k)"""
+        limit = self.low_stock_threshold if threshold is None else threshold
+        end = bisect.bisect_left(self._by_qty, (limit, ""))
+        return [sku for _, sku in self._by_qty[:end]]
+
+    def by_supplier(self, supplier: str) -> List[str]:
+        return sorted(self._by_supplier.get(supplier, ()))
+
+    def supplier_value(self, supplier: str) -> float:
+        return self._supplier_value.get(supplier, 0.0)
+
+    def valuation(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_value": round(self.total_value, 2),
+                "by_supplier": {
+                    supplier: round(value, 2) for supplier, value in self._supplier_value.items()
+                },
+                "total_items": len(self._items)
+            }
+
+    # ---- write API ------------------------------------------------------
+
+    def upsert(self, sku: str, qty: float, unit: str, cost: float, supplier: str):
+        """Create or replace a SKU record"""
+        if not (math.isfinite(qty) and math.isfinite(cost)):
+            raise StockError(f"Quantity and cost for {sku} must be finite numbers")
+        if qty < 0:
+            raise StockError(f"Quantity for {sku} cannot be negative")
+        with self._lock:
+            if sku in self._items:
+                self._unindex(sku)
+            self._items[sku] = {"qty": qty, "unit": unit, "cost": cost, "supplier": supplier}
+            self._index(sku)
+            self.version += 1
+
+    def remove(self, sku: str):
+        with self._lock:
+            if sku not in self._items:
+                raise KeyError(sku)
+            self._unindex(sku)
+            del self._items[sku]
+            self.version += 1
+
+    def apply_movement(self, sku: str, delta: float) -> Dict[str, Any]:
+        """Adjust stock by delta (negative = consumption), returning the new record"""
+        # NaN passes every comparison below and would poison the index and totals for good
+        if not math.isfinite(delta):
+            raise StockError(f"Movement for {sku} must be a finite number, got {delta}")
+        with self._lock:
+            record = self._items.get(sku)
+            if record is None:
+                raise StockError(f"Unknown item {sku}")
+            new_qty = record["qty"] + delta
+            if new_qty < 0:
+                raise StockError(f"Movement of {delta} would take {sku} below zero ({record['qty']} on hand)")
+
+            self._unindex(sku)
+            record = self._items[sku] = {**record, "qty": round(new_qty, 3)}
+            self._index(sku)
+            self.version += 1
+            return dict(record)
+
+    # ---- index maintenance ---------------------------------------------
+
+    def _index(self, sku: str):
+        record = self._items[sku]
+        bisect.insort(self._by_qty, (record["qty"], sku))
+        supplier = record["supplier"]
+        self._by_supplier.setdefault(supplier, set()).add(sku)
+        value = record["qty"] * record["cost"]
+        self._supplier_value[supplier] = self._supplier_value.get(supplier, 0.0) + value
+        self.total_value += value
+
+    def _unindex(self, sku: str):
+        record = self._items[sku]
+        entry = (record["qty"], sku)
+        position = bisect.bisect_left(self._by_qty, entry)
+        del self._by_qty[position]
+
+        supplier = record["supplier"]
+        skus = self._by_supplier[supplier]
+        skus.discard(sku)
+        value = record["qty"] * record["cost"]
+        if skus:
+            self._supplier_value[supplier] -= value
+        else:
+            # Drop empty suppliers so float residue doesn't linger
+            del self._by_supplier[supplier]
+            del self._supplier_value[supplier]
+        self.total_value -= value
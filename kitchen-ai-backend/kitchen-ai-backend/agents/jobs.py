@@ -0,0 +1,212 @@
+"""
+Async job tracking for Kitchen AI
+Long-running agent tasks (camera food analysis, audits) are submitted as jobs:
+the caller gets a job id straight away and polls for the result, can cancel,
+and every job carries a timeout. Finished jobs are kept in a bounded store
+that expires results, so memory stays flat however many jobs are submitted.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .adk_base import Task, wall_time
+from .scheduler import AdmissionError, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+REJECTED = "rejected"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED, TIMED_OUT, REJECTED)
+
+DEFAULT_TIMEOUT = 60.0
+MAX_TIMEOUT = 600.0
+DEFAULT_RESULT_TTL = 300.0
+
+# (site_id, agent_id, task) -> result, e.g. ShardRouter.execute
+Executor = Callable[[str, str, Task], Awaitable[Dict[str, Any]]]
+
+
+class JobLimitError(QueueFullError):
+    """Too many jobs are already queued or running"""
+
+
+class Job:
+    """One submitted task and its outcome"""
+    __slots__ = ("id", "site_id", "agent_id", "task", "timeout", "status", "result", "error",
+                 "submitted_at", "finished_at", "_runner")
+
+    def __init__(self, site_id: str, agent_id: str, task: Task, timeout: float):
+        self.id = task.id
+        self.site_id = site_id
+        self.agent_id = agent_id
+        self.task = task
+        self.timeout = timeout
+        self.status = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def state(self) -> str:
+        # Local agents stamp started_at when a worker picks the task up
+        if self.status == QUEUED and self.task.started_at is not None:
+            return RUNNING
+        return self.status
+
+    def to_dict(self) -> Dict[str, Any]:
+        started_at = wall_time(self.task.started_at) if self.task.started_at is not None else None
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.state,
+            "agent_id": self.agent_id,
+            "site_id": self.site_id,
+            "task_type": self.task.type,
+            "timeout": self.timeout,
+            "submitted_at": self.submitted_at,
+            "started_at": started_at,
+            "finished_at": self.finished_at,
+            "elapsed_ms": round((end - self.submitted_at) * 1000, 2),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """Runs jobs in the background and keeps their results for a while
+
+    At most max_active jobs are queued or running at once; beyond that submit
+    raises JobLimitError (a 429). Finished jobs are kept for result_ttl seconds
+    and at most max_finished of them, oldest evicted first.
+    """
+
+    def __init__(self, executor: Executor, max_active: int = 1000, max_finished: int = 10000,
+                 result_ttl: float = DEFAULT_RESULT_TTL, default_timeout: float = DEFAULT_TIMEOUT,
+                 max_timeout: float = MAX_TIMEOUT):
+        self.executor = executor
+        self.max_active = max_active
+        self.max_finished = max_finished
+        self.result_ttl = result_ttl
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self._active: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, Job]" = OrderedDict()  # in finish order
+        self.counts: Dict[str, int] = {state: 0 for state in FINISHED_STATES}
+        self.submitted = 0
+        self.expired = 0
+
+    def submit(self, agent_id: str, task_type: str, data: Dict[str, Any],
+               site_id: str, timeout: Optional[float] = None) -> Job:
+        """Start a job and return it without waiting for the result"""
+        self._expire()
+        if len(self._active) >= self.max_active:
+            raise JobLimitError("jobs", f"Too many jobs in progress ({self.max_active})")
+        timeout = min(timeout or self.default_timeout, self.max_timeout)
+        # The job's timeout replaces the engine's (shorter) default task deadline
+        job = Job(site_id, agent_id, Task(f"job_{uuid.uuid4().hex}", task_type, data, timeout=timeout), timeout)
+        self._active[job.id] = job
+        self.submitted += 1
+        job._runner = asyncio.create_task(self._run(job), name=job.id)
+        return job
+
+    async def _run(self, job: Job):
+        try:
+            result = await asyncio.wait_for(
+                self.executor(job.site_id, job.agent_id, job.task), job.timeout
+            )
+        except asyncio.TimeoutError:
+            self._finish(job, TIMED_OUT, error=f"Job exceeded its {job.timeout:g}s timeout")
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED, error="Job was cancelled")
+        except AdmissionError as e:
+            self._finish(job, REJECTED, error=str(e))
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} failed: {e}")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            if "error" in result:
+                self._finish(job, FAILED, result=result, error=str(result["error"]))
+            else:
+                self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job: Job, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job._runner = None
+        self._active.pop(job.id, None)
+        self._finished[job.id] = job
+        self.counts[status] += 1
+        self._expire()
+
+    def _expire(self):
+        """Drop results past their TTL, then the oldest beyond max_finished"""
+        cutoff = time.time() - self.result_ttl
+        while self._finished:
+            job = next(iter(self._finished.values()))
+            if job.finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            self._finished.popitem(last=False)
+            self.expired += 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job, or None if it is unknown or its result has expired"""
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+        self._expire()
+        return self._finished.get(job_id)
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        """Wait up to timeout seconds for a job to finish (long polling)"""
+        runner = job._runner
+        if runner is not None and timeout > 0:
+            await asyncio.wait((runner,), timeout=timeout)
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged"""
+        job = self.get(job_id)
+        if job is not None and job._runner is not None:
+            runner = job._runner
+            runner.cancel()
+            await asyncio.wait((runner,))
+            logger.info(f"🛑 Job {job_id} cancelled")
+        return job
+
+    async def shutdown(self):
+        """Cancel every job still in progress"""
+        runners = [job._runner for job in self._active.values() if job._runner is not None]
+        for runner in runners:
+            runner.cancel()
+        if runners:
+            await asyncio.wait(runners)
+
+    def stats(self) -> Dict[str, Any]:
+        active = list(self._active.values())
+        running = sum(1 for job in active if job.state == RUNNING)
+        return {
+            "queued": len(active) - running,
+            "running": running,
+            "stored_results": len(self._finished),
+            "submitted": self.submitted,
+            "expired": self.expired,
+            **self.counts
+        }
@@ -0,0 +1,248 @@
+"""
+Lightweight metrics for Kitchen AI
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus text
+exposition format. Recording is a dict lookup plus a bisect, cheap enough to
+leave on for every task.
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds - spans cache hits (~µs) through slow model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        return []
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, *labels: str, value: float):
+        """Mirror a count maintained elsewhere (e.g. from a scrape-time collector)"""
+        self._values[self._key(labels)] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, *labels: str, value: float):
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; per-bucket counts are made cumulative at render time"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, *labels: str, value: float):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def _samples(self) -> Iterable[str]:
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh gauges right before a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered with a different shape")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class EngineMetrics:
+    """AgentEngine observer recording latency, queue wait, outcomes and in-flight tasks
+
+    Given the engine, it also mirrors scheduler queue depth and result cache
+    counters into the registry at scrape time.
+    """
+
+    def __init__(self, registry: MetricsRegistry, engine=None):
+        self.registry = registry
+        self.engine = engine
+        labels = ("agent", "site", "task_type")
+        self.duration = registry.histogram(
+            "kitchen_task_duration_seconds", "Time spent processing a task", labels)
+        self.queue_wait = registry.histogram(
+            "kitchen_task_queue_wait_seconds", "Time a task waited for an agent worker", ("agent", "site"))
+        self.tasks = registry.counter(
+            "kitchen_tasks_total", "Tasks finished, by outcome", labels + ("outcome",))
+        self.errors = registry.counter(
+            "kitchen_task_errors_total", "Tasks that failed", labels)
+        self.rejected = registry.counter(
+            "kitchen_tasks_rejected_total", "Tasks refused by admission control", ("agent", "site", "reason"))
+        self.in_flight = registry.gauge(
+            "kitchen_tasks_in_flight", "Tasks currently being processed", ("agent", "site"))
+        if engine is not None:
+            self.queued = registry.gauge(
+                "kitchen_queue_depth", "Tasks waiting in an agent's queue", ("agent", "site"))
+            self.cache_entries = registry.gauge("kitchen_cache_entries", "Results held in the cache")
+            self.cache_bytes = registry.gauge("kitchen_cache_bytes", "Approximate size of cached results")
+            self.cache_lookups = registry.counter(
+                "kitchen_cache_lookups_total", "Result cache lookups, by outcome", ("result",))
+            self.cache_evictions = registry.counter("kitchen_cache_evictions_total", "Cache entries evicted")
+            registry.add_collector(self.collect)
+
+    def collect(self):
+        queues = self.engine.scheduler.stats()
+        for agent_id, agent in list(self.engine.agents.items()):
+            self.queued.set(agent.agent_type, agent.site_id, value=queues.get(agent_id, {}).get("queued", 0))
+        cache = self.engine.cache
+        if cache is not None:
+            stats = cache.stats()
+            self.cache_entries.set(value=stats["entries"])
+            self.cache_bytes.set(value=stats["bytes"])
+            for result in ("hits", "misses", "coalesced"):
+                self.cache_lookups.set_total(result, value=stats[result])
+            self.cache_evictions.set_total(value=stats["evictions"])
+
+    def on_task_start(self, agent, task, queue_wait: float):
+        self.queue_wait.observe(agent.agent_type, agent.site_id, value=queue_wait)
+        self.in_flight.inc(agent.agent_type, agent.site_id)
+
+    def on_task_end(self, agent, task, duration: float, ok: bool):
+        task_label = agent.task_label(task)
+        self.in_flight.dec(agent.agent_type, agent.site_id)
+        self.duration.observe(agent.agent_type, agent.site_id, task_label, value=duration)
+        self.tasks.inc(agent.agent_type, agent.site_id, task_label, "success" if ok else "error")
+        if not ok:
+            self.errors.inc(agent.agent_type, agent.site_id, task_label)
+
+    def on_task_rejected(self, agent, task, error: Exception):
+        # task is None when a whole batch was refused
+        self.rejected.inc(agent.agent_type, agent.site_id, type(error).__name__)
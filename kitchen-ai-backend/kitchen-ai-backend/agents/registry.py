@@ -0,0 +1,108 @@
+"""
+Agent registry for Kitchen AI
+Agents are registered by import path ("package.module:Class") and only
+imported and constructed on first use, so process start-up doesn't pay for
+agents (and their heavy dependencies) that haven't been needed yet. A
+background warm-up can import them ahead of the first request.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type
+
+from .adk_base import Agent
+
+logger = logging.getLogger(__name__)
+
+# Built-in HeySalad agents
+DEFAULT_AGENTS = {
+    "heysalad_sourcing": "agents.sourcing_agent:SourcingAgent",
+    "heysalad_quality": "agents.quality_agent:QualityAgent"
+}
+
+
+class AgentRegistry:
+    """agent_id -> agent class, imported lazily and at most once
+
+    Loading is thread-safe, so a warm-up thread and a request that needs
+    the same agent never import it twice.
+    """
+
+    def __init__(self, agents: Optional[Dict[str, str]] = None):
+        self._paths: Dict[str, str] = {}
+        self._classes: Dict[str, Type[Agent]] = {}
+        self._load_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.warmup_ms: Optional[float] = None
+        for agent_id, path in (agents or {}).items():
+            self.register(agent_id, path)
+
+    def register(self, agent_id: str, path: str):
+        """Register an agent class by "package.module:Class" without importing it"""
+        if ":" not in path:
+            raise ValueError(f"Agent path '{path}' must look like 'package.module:Class'")
+        self._paths[agent_id] = path
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._paths)
+
+    def is_loaded(self, agent_id: str) -> bool:
+        return agent_id in self._classes
+
+    def load(self, agent_id: str) -> Type[Agent]:
+        """The agent's class, importing its module on first call"""
+        agent_class = self._classes.get(agent_id)
+        if agent_class is not None:
+            return agent_class
+        with self._lock:
+            if agent_id not in self._classes:
+                module_name, _, class_name = self._paths[agent_id].partition(":")
+                started = time.perf_counter()
+                agent_class = getattr(importlib.import_module(module_name), class_name)
+                self._load_ms[agent_id] = round((time.perf_counter() - started) * 1000, 2)
+                self._classes[agent_id] = agent_class
+                logger.info(f"📦 Agent {agent_id} loaded in {self._load_ms[agent_id]}ms")
+            return self._classes[agent_id]
+
+    def classes(self, agent_ids: Optional[Iterable[str]] = None) -> Dict[str, Type[Agent]]:
+        """Load and return agent classes (all by default) in registration order"""
+        return {agent_id: self.load(agent_id) for agent_id in (agent_ids or self._paths)}
+
+    def factory(self, agent_id: str) -> Callable[[str], Agent]:
+        """site_id -> new agent instance, loading the class on first call"""
+        if agent_id not in self._paths:
+            raise KeyError(agent_id)
+        return lambda site_id: self.load(agent_id)(site_id)
+
+    def factories(self) -> Dict[str, Callable[[str], Agent]]:
+        return {agent_id: self.factory(agent_id) for agent_id in self._paths}
+
+    async def warm_up(self, agent_ids: Optional[Iterable[str]] = None):
+        """Import agent modules on a thread so the event loop keeps serving meanwhile"""
+        started = time.perf_counter()
+        await asyncio.to_thread(self.classes, agent_ids)
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"🔥 Agents warmed up in {self.warmup_ms}ms")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "agents": {
+                agent_id: {"loaded": agent_id in self._classes, "load_ms": self._load_ms.get(agent_id)}
+                for agent_id in self._paths
+            },
+            "warmup_ms": self.warmup_ms
+        }
+
+
+def default_registry() -> AgentRegistry:
+    return AgentRegistry(DEFAULT_AGENTS)
@@ -0,0 +1,262 @@
+"""
+Reorder planning for the Sourcing Agent
+Reorder points and order quantities per SKU from its consumption rate, the
+chosen supplier's lead time and the item's cost. Plans are cached per SKU and
+only recomputed for SKUs marked dirty by a stock movement, consumption or a
+supplier change, so a movement costs O(1) however many SKUs a site carries.
+Consumption rates also decay while nothing happens, so every SKU with a rate
+is replanned once its plans are older than a small fraction of tau_days.
+"""
+
+import math
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .inventory import InventoryStore
+
+DEFAULT_LEAD_HOURS = 24.0
+_LEAD_TIME = re.compile(r"(\d+(?:\.\d+)?)\s*(m|min|mins|minutes?|h|hrs?|hours?|d|days?|w|weeks?)\b")
+_LEAD_UNITS = {"m": 1 / 60, "h": 1.0, "d": 24.0, "w": 168.0}
+_LEAD_PHRASES = {"same day": 8.0, "next day": 24.0, "overnight": 12.0}
+
+
+def parse_lead_time(delivery: Any) -> Optional[float]:
+    """'2 hours', '45 minutes', '1-2 days', 'next day' or a number of hours -> hours"""
+    if isinstance(delivery, (int, float)):
+        return float(delivery)
+    if not isinstance(delivery, str):
+        return None
+    text = delivery.strip().lower()
+    if text in _LEAD_PHRASES:
+        return _LEAD_PHRASES[text]
+    # Ranges ("1-2 days") take the upper bound - plan for the slow delivery
+    matches = _LEAD_TIME.findall(text.replace("-", " - "))
+    if not matches:
+        return None
+    value, unit = matches[-1]
+    return float(value) * _LEAD_UNITS[unit[0]]
+
+
+class ConsumptionRate:
+    """Exponentially decayed consumption for one SKU
+
+    Usage decays with time constant `tau_days`, so recent weeks dominate.
+    Dividing by the decayed length of the observed period gives an unbiased
+    daily rate early on as well as once history is longer than tau. Periods
+    shorter than `min_window_days` count as that long, so one early burst
+    isn't extrapolated into a huge rate.
+    """
+    __slots__ = ("decayed", "last_ts", "first_ts")
+
+    def __init__(self, decayed: float = 0.0, last_ts: float = 0.0, first_ts: float = 0.0):
+        self.decayed = decayed
+        self.last_ts = last_ts
+        self.first_ts = first_ts
+
+    def record(self, qty: float, ts: float, tau_days: float):
+        if not self.first_ts:
+            self.first_ts = self.last_ts = ts
+        elif ts > self.last_ts:
+            self.decayed *= math.exp(-(ts - self.last_ts) / 86400 / tau_days)
+            self.last_ts = ts
+        self.decayed += qty
+
+    def per_day(self, now: float, tau_days: float, min_window_days: float) -> float:
+        decayed = self.decayed * math.exp(-max(now - self.last_ts, 0) / 86400 / tau_days)
+        age_days = max((now - self.first_ts) / 86400, min_window_days)
+        return decayed / (tau_days * (1 - math.exp(-age_days / tau_days)))
+
+
+class ReorderPlanner:
+    """Per-SKU (reorder point, order quantity) plans, recomputed incrementally
+
+    For a SKU using d units/day from a supplier with lead time L days:
+    - safety stock = z * (cv * d) * sqrt(L)   (cv: coefficient of variation of daily demand)
+    - reorder point = d * L + safety stock
+    - order qty = EOQ sqrt(2 * annual demand * order cost / annual holding cost),
+      capped at max_cover_days of usage (produce is perishable), and never less
+      than what it takes to get back above the reorder point
+    Suppliers are chosen from the SKU's current supplier and others with the
+    same specialty, by rating minus `lead_penalty` rating points per day of lead
+    time. SKUs without consumption history fall back to the inventory's
+    low-stock threshold. Plans of SKUs with a rate go stale as it decays, so
+    they are all recomputed every `replan_days` (default tau_days / 28, six
+    hours for a week, when the rate has drifted by under 4%).
+    """
+
+    def __init__(self, inventory: InventoryStore, suppliers: Dict[str, Dict[str, Any]],
+                 service_z: float = 1.65, demand_cv: float = 0.5, order_cost: float = 15.0,
+                 holding_rate: float = 0.25, max_cover_days: float = 7.0,
+                 lead_penalty: float = 1.0, tau_days: float = 7.0, min_window_days: float = 1.0,
+                 replan_days: Optional[float] = None):
+        self.inventory = inventory
+        self.service_z = service_z
+        self.demand_cv = demand_cv
+        self.order_cost = order_cost
+        self.holding_rate = holding_rate
+        self.max_cover_days = max_cover_days
+        self.lead_penalty = lead_penalty
+        self.tau_days = tau_days
+        self.min_window_days = min_window_days
+        self.replan_seconds = (tau_days / 28 if replan_days is None else replan_days) * 86400
+        self._replanned_at = 0.0                     # last time every rated SKU was recomputed
+        self.rates: Dict[str, ConsumptionRate] = {}
+        self.plans: Dict[str, Dict[str, Any]] = {}
+        self._due: Set[str] = set()                  # SKUs at or below their reorder point
+        self._dirty: Set[str] = set(inventory)
+        self.suppliers: Dict[str, Dict[str, Any]] = {}
+        self._by_specialty: Dict[str, List[str]] = {}
+        self._best_by_specialty: Dict[str, str] = {}
+        self._lead_days: Dict[str, float] = {}
+        self.set_suppliers(suppliers)
+        self.recomputed = 0
+
+    # ---- change tracking -------------------------------------------------
+
+    def record_movement(self, sku: str, delta: float, ts: Optional[float] = None):
+        """A stock movement; negative deltas are consumption"""
+        if delta < 0:
+            rate = self.rates.get(sku)
+            if rate is None:
+                rate = self.rates[sku] = ConsumptionRate()
+            rate.record(-delta, ts or time.time(), self.tau_days)
+        self._dirty.add(sku)
+
+    def mark_dirty(self, skus: Iterable[str]):
+        self._dirty.update(skus)
+
+    def set_suppliers(self, suppliers: Dict[str, Dict[str, Any]], changed: Optional[str] = None):
+        """Swap in the supplier table; with `changed`, only SKUs that could use it are replanned"""
+        specialties = set()
+        for table in (self.suppliers, suppliers):  # before and after the change
+            if changed in table and table[changed].get("specialty"):
+                specialties.add(table[changed]["specialty"])
+        self.suppliers = suppliers
+        # Lead times and each specialty's best supplier are resolved once per
+        # supplier change, so planning a SKU doesn't re-parse delivery strings
+        self._lead_days = {name: self._parse_lead_days(info) for name, info in suppliers.items()}
+        self._by_specialty = {}
+        self._best_by_specialty = {}
+        for name, info in suppliers.items():
+            specialty = info.get("specialty")
+            if specialty:
+                self._by_specialty.setdefault(specialty, []).append(name)
+                best = self._best_by_specialty.get(specialty)
+                if best is None or self._score(name) > self._score(best):
+                    self._best_by_specialty[specialty] = name
+        if changed is None:
+            self._dirty.update(self.inventory)
+            return
+        # Its own SKUs, plus SKUs of every supplier in a specialty it joined or left
+        affected = {changed}
+        for specialty in specialties:
+            affected.update(self._by_specialty.get(specialty, ()))
+        for name in affected:
+            self._dirty.update(self.inventory.by_supplier(name))
+
+    # ---- planning --------------------------------------------------------
+
+    @staticmethod
+    def _parse_lead_days(info: Dict[str, Any]) -> float:
+        hours = parse_lead_time(info.get("delivery"))
+        return (DEFAULT_LEAD_HOURS if hours is None else hours) / 24
+
+    def _score(self, name: str) -> Tuple[float, str]:
+        rating = self.suppliers.get(name, {}).get("rating", 0.0)
+        return rating - self.lead_penalty * self._lead_days.get(name, DEFAULT_LEAD_HOURS / 24), name
+
+    def choose_supplier(self, current: str) -> Tuple[str, float]:
+        """Best (supplier, lead days) among the current supplier and its specialty peers"""
+        best = self._best_by_specialty.get(self.suppliers.get(current, {}).get("specialty"))
+        if best is None or self._score(current) > self._score(best):
+            best = current
+        return best, self._lead_days.get(best, DEFAULT_LEAD_HOURS / 24)
+
+    def _plan(self, sku: str, now: float) -> Dict[str, Any]:
+        record = self.inventory.get(sku)
+        qty = record["qty"]
+        supplier, lead_days = self.choose_supplier(record["supplier"])
+        rate = self.rates.get(sku)
+        daily = rate.per_day(now, self.tau_days, self.min_window_days) if rate is not None else 0.0
+
+        if daily > 0:
+            safety_stock = self.service_z * self.demand_cv * daily * math.sqrt(lead_days)
+            reorder_point = daily * lead_days + safety_stock
+            holding_cost = max(record["cost"], 0.01) * self.holding_rate
+            eoq = math.sqrt(2 * daily * 365 * self.order_cost / holding_cost)
+            order_qty = max(min(eoq, daily * self.max_cover_days), reorder_point + daily * lead_days - qty)
+            days_of_cover = qty / daily
+            basis = "consumption"
+        else:
+            # No usage seen yet - keep the fixed low-stock threshold
+            safety_stock = 0.0
+            reorder_point = self.inventory.low_stock_threshold
+            order_qty = 2 * reorder_point - qty
+            days_of_cover = None
+            basis = "threshold"
+
+        return {
+            "item": sku,
+            "current_qty": qty,
+            "unit": record["unit"],
+            "daily_usage": round(daily, 3),
+            "days_of_cover": round(days_of_cover, 2) if days_of_cover is not None else None,
+            "supplier": supplier,
+            "current_supplier": record["supplier"],
+            "lead_time_hours": round(lead_days * 24, 2),
+            "safety_stock": round(safety_stock, 2),
+            "reorder_point": round(reorder_point, 2),
+            "order_qty": round(max(order_qty, 0.0), 1),
+            "order_cost": round(max(order_qty, 0.0) * record["cost"], 2),
+            "reorder": qty <= reorder_point,
+            "basis": basis
+        }
+
+    def refresh(self, now: Optional[float] = None) -> int:
+        """Recompute plans for dirty SKUs only; returns how many were recomputed
+
+        Once the decayed rates behind the plans are replan_seconds old, every
+        SKU with a rate counts as dirty.
+        """
+        now = now or time.time()
+        if now - self._replanned_at >= self.replan_seconds:
+            self._dirty.update(self.rates)
+            self._replanned_at = now
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        for sku in dirty:
+            if sku not in self.inventory:
+                self.plans.pop(sku, None)
+                self.rates.pop(sku, None)
+                self._due.discard(sku)
+                continue
+            plan = self._plan(sku, now)
+            self.plans[sku] = plan
+            if plan["reorder"]:
+                self._due.add(sku)
+            else:
+                self._due.discard(sku)
+        self.recomputed += len(dirty)
+        return len(dirty)
+
+    def reorders(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Plans for every SKU at or below its reorder point, furthest below first"""
+        self.refresh(now)
+        due = [self.plans[sku] for sku in self._due]
+        due.sort(key=lambda plan: plan["current_qty"] / max(plan["reorder_point"], 1e-9))
+        return due
+
+    def plan(self, sku: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        self.refresh(now)
+        return self.plans.get(sku)
+
+    # ---- persistence -----------------------------------------------------
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        return {sku: [rate.decayed, rate.last_ts, rate.first_ts] for sku, rate in self.rates.items()}
+
+    def restore(self, state: Dict[str, List[float]]):
+        self.rates = {sku: ConsumptionRate(*values) for sku, values in state.items()}
+        self._dirty.update(self.inventory)
@@ -0,0 +1,210 @@
+"""
+Deadlines, circuit breakers and hedging for Kitchen AI
+Every task an AgentEngine runs gets a deadline, counted from when it is
+submitted, so a hung agent can't hold a request forever. The task's own
+timeout (background jobs set one) wins, then the agent's per-task-type
+deadline, then its default, then the engine's.
+
+Each agent also gets a circuit breaker. It watches recent outcomes and opens
+when too many fail, time out or run slow. Only agent faults count as
+failures: a task that raised or timed out. An error answer to a bad request
+("Unknown item") is still a healthy agent. While open, tasks are rejected
+straight away with CircuitOpenError (503 + Retry-After) instead of queueing
+behind a sick agent. After a cooldown a few trial tasks are let through,
+and the breaker closes again if they succeed.
+
+Task types an agent lists in hedged_tasks are hedged: if the first attempt
+hasn't finished after the hedge delay, a second attempt starts on another
+worker and whichever finishes first is used.
+
+    TASK_DEADLINE_SECONDS=30 BREAKER_FAILURE_RATE=0.5 BREAKER_SLOW_CALL_SECONDS=5 python main.py
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .scheduler import AgentUnavailableError
+
+DEFAULT_DEADLINE = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(AgentUnavailableError):
+    """The agent's circuit breaker is open - it is failing, so work is shed"""
+    status_code = 503
+
+
+def agent_fault(message: str) -> Dict[str, Any]:
+    """Error result for a task the agent failed to run (it raised or timed out)"""
+    return {"error": message, "agent_fault": True}
+
+
+def is_agent_fault(result: Dict[str, Any]) -> bool:
+    """Whether a result counts against the agent's breaker - domain errors don't"""
+    return bool(result.get("agent_fault"))
+
+
+class CircuitBreaker:
+    """Failure- and latency-rate breaker over a sliding time window
+
+    Trips when at least min_calls finished in the last window_seconds and
+    either failure_rate of them failed or slow_rate took longer than
+    slow_call_seconds. Only used from the event loop, so it takes no lock.
+    """
+
+    def __init__(self, name: str, window_seconds: float = 30.0, min_calls: int = 20,
+                 failure_rate: float = 0.5, slow_call_seconds: Optional[float] = None,
+                 slow_rate: float = 0.8, cooldown_seconds: float = 5.0, half_open_calls: int = 3):
+        if not 0 < failure_rate <= 1 or not 0 < slow_rate <= 1:
+            raise ValueError("failure_rate and slow_rate must be in (0, 1]")
+        if min_calls < 1 or half_open_calls < 1:
+            raise ValueError("min_calls and half_open_calls must be >= 1")
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()  # (finished_at, failed, slow)
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._trials = 0  # admitted while half-open
+        self._trial_successes = 0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Admit a task or raise CircuitOpenError"""
+        if self.state == OPEN:
+            remaining = self._opened_at + self.cooldown_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    self.name, f"Agent {self.name} is failing; circuit open for {remaining:.1f}s more",
+                    retry_after=max(1, round(remaining))
+                )
+            self.state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+        if self.state == HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, f"Agent {self.name} is recovering; trial tasks in flight")
+            self._trials += 1
+
+    def record(self, ok: bool, duration: float):
+        """Outcome of one admitted task"""
+        slow = self.slow_call_seconds is not None and duration > self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if not ok or slow:
+                self._open()
+            else:
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._close()
+            return
+        if self.state == OPEN:
+            return  # a straggler from before the trip
+
+        now = time.monotonic()
+        self._outcomes.append((now, not ok, slow))
+        self._failures += not ok
+        self._slow += slow
+        self._prune(now)
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and (self._failures >= self.failure_rate * calls
+                                        or self._slow >= self.slow_rate * calls):
+            self._open()
+
+    def release(self):
+        """An admitted task ended without an outcome (caller gone, queue full)"""
+        if self.state == HALF_OPEN and self._trials > self._trial_successes:
+            self._trials -= 1
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            _, failed, slow = self._outcomes.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+        self._failures = self._slow = 0
+
+    def _close(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = self._slow = 0
+
+    def stats(self) -> Dict[str, Any]:
+        self._prune(time.monotonic())
+        calls = len(self._outcomes)
+        stats = {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window_calls": calls,
+            "failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+            "slow_rate": round(self._slow / calls, 3) if calls else 0.0
+        }
+        if self.state == OPEN:
+            stats["retry_in"] = round(max(0.0, self._opened_at + self.cooldown_seconds - time.monotonic()), 2)
+        return stats
+
+
+class AgentGuard:
+    """One agent's breaker plus its timeout and hedging counts"""
+    __slots__ = ("breaker", "timed_out", "hedged", "hedge_wins")
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.timed_out = 0
+        self.hedged = 0  # tasks that started a second attempt
+        self.hedge_wins = 0  # ... where the second attempt finished first
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "timed_out": self.timed_out,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins
+        }
+
+
+def resilience_settings() -> Dict[str, Any]:
+    """AgentEngine keyword arguments from the environment
+
+    TASK_DEADLINE_SECONDS (0 = none), HEDGING=0 and BREAKER_WINDOW_SECONDS,
+    BREAKER_MIN_CALLS, BREAKER_FAILURE_RATE, BREAKER_SLOW_CALL_SECONDS,
+    BREAKER_SLOW_RATE, BREAKER_COOLDOWN_SECONDS
+    """
+    deadline = float(os.getenv("TASK_DEADLINE_SECONDS", str(DEFAULT_DEADLINE)))
+    breaker: Dict[str, Any] = {}
+    for name, setting, convert in (
+        ("BREAKER_WINDOW_SECONDS", "window_seconds", float),
+        ("BREAKER_MIN_CALLS", "min_calls", int),
+        ("BREAKER_FAILURE_RATE", "failure_rate", float),
+        ("BREAKER_SLOW_CALL_SECONDS", "slow_call_seconds", float),
+        ("BREAKER_SLOW_RATE", "slow_rate", float),
+        ("BREAKER_COOLDOWN_SECONDS", "cooldown_seconds", float)
+    ):
+        if os.getenv(name):
+            breaker[setting] = convert(os.environ[name])
+    return {
+        "default_deadline": deadline or None,
+        "breaker": breaker,
+        "hedging": os.getenv("HEDGING", "1") != "0"
+    }
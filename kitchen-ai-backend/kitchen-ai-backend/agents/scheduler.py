@@ -0,0 +1,198 @@
+"""
+Per-agent task scheduler for Kitchen AI
+Bounded priority queues, worker pools and admission control
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_QUEUE_SIZE = 100
+
+
+class AdmissionError(Exception):
+    """Raised when the scheduler refuses to accept a task"""
+    status_code = 503
+
+    def __init__(self, agent_id: str, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.agent_id = agent_id
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    """The agent's queue is at capacity - caller should back off and retry"""
+    status_code = 429
+
+
+class AgentUnavailableError(AdmissionError):
+    """The agent's worker pool is shut down or not accepting work"""
+    status_code = 503
+
+
+class AgentWorkerPool:
+    """Fixed pool of worker coroutines draining one agent's bounded priority queue"""
+
+    def __init__(self, agent_id: str, concurrency: int = DEFAULT_CONCURRENCY,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be >= 1")
+        self.agent_id = agent_id
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: list = []
+        self._sequence = itertools.count()
+        self._closed = False
+        self.pending = 0  # queued + running
+        self.running = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return self.pending - self.running
+
+    def _ensure_started(self):
+        # Workers are bound to the running loop, so they start on first submit
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"{self.agent_id}-worker-{i}")
+                for i in range(self.concurrency)
+            ]
+            logger.info(f"🧵 Worker pool for {self.agent_id} started ({self.concurrency} workers)")
+
+    def submit(self, job: Callable[[], Awaitable[Any]], priority: int = PRIORITY_NORMAL) -> asyncio.Future:
+        """Enqueue a job, returning a future for its result. Raises AdmissionError when full."""
+        if self._closed:
+            raise AgentUnavailableError(self.agent_id, f"Agent {self.agent_id} is shutting down")
+        # Capacity covers tasks on workers plus the ones waiting behind them
+        if self.pending >= self.concurrency + self.queue_size:
+            self.rejected += 1
+            raise QueueFullError(
+                self.agent_id,
+                f"Agent {self.agent_id} queue is full ({self.queue_size} tasks waiting)"
+            )
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._sequence), job, future))
+        self.pending += 1
+        self.accepted += 1
+        return future
+
+    async def _worker(self):
+        while True:
+            _, _, job, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                self.running += 1
+                # Run the job as its own task so a caller that gives up (cancel,
+                # timeout) stops the work instead of leaving it to finish unseen
+                work = asyncio.ensure_future(job())
+                future.add_done_callback(lambda f, work=work: work.cancel() if f.cancelled() else None)
+                try:
+                    await asyncio.wait((work,))
+                except asyncio.CancelledError:
+                    work.cancel()
+                    future.cancel()
+                    raise
+                finally:
+                    self.running -= 1
+                if future.done():
+                    continue
+                if work.cancelled():
+                    future.cancel()
+                elif work.exception() is not None:
+                    future.set_exception(work.exception())
+                else:
+                    future.set_result(work.result())
+            finally:
+                self.pending -= 1
+                self._queue.task_done()
+
+    async def shutdown(self):
+        """Stop accepting work and cancel the workers"""
+        self._closed = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._queue is not None:
+            # Fail anything still waiting so callers don't hang
+            while not self._queue.empty():
+                _, _, _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(
+                        AgentUnavailableError(self.agent_id, f"Agent {self.agent_id} was shut down")
+                    )
+        self._queue = None
+        self.pending = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "queued": self.queued,
+            "running": self.running,
+            "accepted": self.accepted,
+            "rejected": self.rejected
+        }
+
+
+class TaskScheduler:
+    """Holds one worker pool per registered agent"""
+
+    def __init__(self, default_concurrency: int = DEFAULT_CONCURRENCY,
+                 default_queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.default_concurrency = default_concurrency
+        self.default_queue_size = default_queue_size
+        self.pools: Dict[str, AgentWorkerPool] = {}
+
+    def configure(self, agent_id: str, concurrency: Optional[int] = None,
+                  queue_size: Optional[int] = None) -> AgentWorkerPool:
+        """Create (or replace) the worker pool for an agent
+
+        None falls back to the scheduler defaults; anything below 1 is a
+        configuration error and raises ValueError.
+        """
+        pool = AgentWorkerPool(
+            agent_id,
+            concurrency=self.default_concurrency if concurrency is None else concurrency,
+            queue_size=self.default_queue_size if queue_size is None else queue_size
+        )
+        self.pools[agent_id] = pool
+        return pool
+
+    async def submit(self, agent_id: str, job: Callable[[], Awaitable[Any]],
+                     priority: int = PRIORITY_NORMAL) -> Any:
+        """Queue a job on the agent's pool and wait for its result"""
+        pool = self.pools.get(agent_id)
+        if pool is None:
+            pool = self.configure(agent_id)
+        future = pool.submit(job, priority)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Caller went away - drop the job if it hasn't started yet
+            future.cancel()
+            raise
+
+    async def shutdown(self):
+        await asyncio.gather(*(pool.shutdown() for pool in self.pools.values()))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {agent_id: pool.stats() for agent_id, pool in self.pools.items()}
@@ -0,0 +1,280 @@
+"""
+Sensor ingestion for the Quality Agent
+Per-sensor ring buffers backed by compact arrays, with rolling statistics
+maintained incrementally as readings arrive
+"""
+
+import bisect
+import math
+import os
+import time
+from array import array
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+METRICS = ("temperature", "humidity", "cleanliness", "air_quality")
+MAX_REPORTED_VIOLATIONS = 50  # per ingest call; the count is always exact
+# Distinct sensors per site - each window holds ~10 KB of readings
+MAX_SENSORS = int(os.getenv("MAX_SENSORS_PER_SITE", "200"))
+
+
+class RollingWindow:
+    """Last `capacity` readings of one sensor with O(1) rolling stats
+
+    - mean: running sum (re-summed once per full cycle to shed float drift)
+    - min/max: monotonic deques, amortised O(1) per reading
+    - compliance: running count of readings outside [low, high]
+    - percentiles: sorted mirror of the window; bisect to find the slot,
+      then a memmove-backed insert/delete into the array
+    """
+
+    def __init__(self, capacity: int = 600, low: Optional[float] = None, high: Optional[float] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.low = low
+        self.high = high
+        self._values = array("d", bytes(8 * capacity))
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._sorted = array("d")
+        self._min: deque = deque()  # (sequence, value), values increasing
+        self._max: deque = deque()  # (sequence, value), values decreasing
+        self._sequence = 0          # total readings ever pushed
+        self._sum = 0.0
+        self._violations = 0
+
+    def __len__(self) -> int:
+        return min(self._sequence, self.capacity)
+
+    def _in_range(self, value: float) -> bool:
+        if self.low is not None and value < self.low:
+            return False
+        if self.high is not None and value > self.high:
+            return False
+        return True
+
+    def push(self, value: float, timestamp: Optional[float] = None) -> bool:
+        """Add a reading, evicting the oldest when full. Returns whether it is in range.
+
+        NaN and infinities are refused: NaN would break the sorted mirror's
+        bisect and either would poison the running sum and min/max.
+        """
+        if not math.isfinite(value):
+            raise ValueError(f"Reading {value} is not a finite number")
+        slot = self._sequence % self.capacity
+        if self._sequence >= self.capacity:
+            old = self._values[slot]
+            self._sum -= old
+            if not self._in_range(old):
+                self._violations -= 1
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+
+        self._values[slot] = value
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        self._sum += value
+        in_range = self._in_range(value)
+        if not in_range:
+            self._violations += 1
+        self._sorted.insert(bisect.bisect_left(self._sorted, value), value)
+
+        oldest_live = self._sequence - self.capacity + 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((self._sequence, value))
+        while self._min[0][0] < oldest_live:
+            self._min.popleft()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._sequence, value))
+        while self._max[0][0] < oldest_live:
+            self._max.popleft()
+
+        self._sequence += 1
+        if self._sequence % self.capacity == 0:
+            self._sum = sum(self._values)
+        return in_range
+
+    def history(self) -> List[Tuple[float, float]]:
+        """(value, timestamp) pairs in the window, oldest first"""
+        count = len(self)
+        start = self._sequence - count
+        return [
+            (self._values[i % self.capacity], self._timestamps[i % self.capacity])
+            for i in range(start, self._sequence)
+        ]
+
+    @property
+    def latest(self) -> Optional[float]:
+        if not self._sequence:
+            return None
+        return self._values[(self._sequence - 1) % self.capacity]
+
+    @property
+    def last_seen(self) -> Optional[float]:
+        if not self._sequence:
+            return None
+        return self._timestamps[(self._sequence - 1) % self.capacity]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / len(self) if self._sequence else None
+
+    @property
+    def minimum(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile over the window"""
+        if not self._sequence:
+            return None
+        rank = max(0, min(len(self._sorted) - 1, int(round(p / 100 * (len(self._sorted) - 1)))))
+        return self._sorted[rank]
+
+    @property
+    def violations(self) -> int:
+        return self._violations
+
+    @property
+    def in_range_ratio(self) -> float:
+        count = len(self)
+        return (count - self._violations) / count if count else 1.0
+
+    def stats(self) -> Dict[str, Any]:
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 2) if value is not None else None
+
+        return {
+            "count": len(self),
+            "latest": rounded(self.latest),
+            "min": rounded(self.minimum),
+            "max": rounded(self.maximum),
+            "mean": rounded(self.mean),
+            "p50": rounded(self.percentile(50)),
+            "p95": rounded(self.percentile(95)),
+            "in_range_pct": round(self.in_range_ratio * 100, 1),
+            "last_seen": self.last_seen
+        }
+
+
+class SensorHub:
+    """Rolling windows for every sensor at a site"""
+
+    def __init__(self, standards: Dict[str, Dict[str, float]], window_size: int = 600,
+                 max_sensors: int = MAX_SENSORS):
+        self.standards = standards
+        self.window_size = window_size
+        self.max_sensors = max_sensors
+        self.sensors: Dict[str, Tuple[str, RollingWindow]] = {}  # sensor_id -> (metric, window)
+        self.latest: Dict[str, float] = {}                       # metric -> most recent value
+        self.total_readings = 0
+
+    def _window_for(self, sensor_id: str, metric: str) -> RollingWindow:
+        entry = self.sensors.get(sensor_id)
+        if entry is None:
+            bounds = self.standards.get(metric, {})
+            window = RollingWindow(self.window_size, bounds.get("min"), bounds.get("max"))
+            self.sensors[sensor_id] = (metric, window)
+            return window
+        if entry[0] != metric:
+            raise ValueError(f"Sensor {sensor_id} reports {entry[0]}, not {metric}")
+        return entry[1]
+
+    def ingest(self, readings: List[Dict[str, Any]],
+               journal: Optional[List[List[Any]]] = None) -> Dict[str, Any]:
+        """Push a batch of readings; returns counts and per-reading rejections/violations
+
+        Accepted readings are appended to journal, when given, as
+        [sensor_id, metric, value, timestamp] rows that replay() re-applies exactly.
+        """
+        accepted = 0
+        rejected = []
+        violations = []
+        violation_count = 0
+        for index, reading in enumerate(readings):
+            try:
+                metric = reading["metric"]
+                if metric not in METRICS:
+                    raise ValueError(f"Unknown metric {metric}")
+                sensor_id = str(reading.get("sensor_id") or metric)
+                value = float(reading["value"])
+                timestamp = reading.get("timestamp")
+                timestamp = float(timestamp) if timestamp is not None else time.time()
+                if not (math.isfinite(value) and math.isfinite(timestamp)):
+                    raise ValueError("Value and timestamp must be finite numbers")
+                if sensor_id not in self.sensors and len(self.sensors) >= self.max_sensors:
+                    raise ValueError(f"Sensor limit reached ({self.max_sensors} sensors per site)")
+                window = self._window_for(sensor_id, metric)
+            except (KeyError, TypeError, ValueError) as e:
+                rejected.append({"index": index, "error": str(e)})
+                continue
+
+            if not window.push(value, timestamp):
+                violation_count += 1
+                if len(violations) < MAX_REPORTED_VIOLATIONS:
+                    violations.append({"sensor_id": sensor_id, "metric": metric, "value": value})
+            self.latest[metric] = value
+            accepted += 1
+            if journal is not None:
+                journal.append([sensor_id, metric, value, timestamp])
+
+        self.total_readings += accepted
+        return {
+            "accepted": accepted,
+            "rejected": rejected,
+            "violation_count": violation_count,
+            "violations": violations
+        }
+
+    def replay(self, rows: List[List[Any]]):
+        """Re-apply journaled [sensor_id, metric, value, timestamp] rows"""
+        for sensor_id, metric, value, timestamp in rows:
+            self._window_for(sensor_id, metric).push(value, timestamp)
+            self.latest[metric] = value
+        self.total_readings += len(rows)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-ready copy of every window's contents"""
+        return {
+            "total_readings": self.total_readings,
+            "latest": dict(self.latest),
+            "sensors": {
+                sensor_id: {"metric": metric, "history": window.history()}
+                for sensor_id, (metric, window) in self.sensors.items()
+            }
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Rebuild the windows from a snapshot; rolling stats are recomputed on push"""
+        self.sensors = {}
+        for sensor_id, entry in state["sensors"].items():
+            window = self._window_for(sensor_id, entry["metric"])
+            for value, timestamp in entry["history"]:
+                window.push(value, timestamp)
+        self.latest = dict(state["latest"])
+        self.total_readings = state["total_readings"]
+
+    def rolling_compliance(self) -> Dict[str, float]:
+        """Per-metric share of windowed readings within standards, in percent"""
+        totals: Dict[str, List[int]] = {}
+        for metric, window in self.sensors.values():
+            counts = totals.setdefault(metric, [0, 0])
+            counts[0] += len(window) - window.violations
+            counts[1] += len(window)
+        return {
+            metric: round(in_range / seen * 100, 1) if seen else 100.0
+            for metric, (in_range, seen) in totals.items()
+        }
+
+    def stats(self, sensor_id: Optional[str] = None) -> Dict[str, Any]:
+        if sensor_id is None:
+            sensors = self.sensors
+        else:
+            sensors = {sensor_id: self.sensors[sensor_id]} if sensor_id in self.sensors else {}
+        return {
+            sid: {"metric": metric, **window.stats()}
+            for sid, (metric, window) in sensors.items()
+        }
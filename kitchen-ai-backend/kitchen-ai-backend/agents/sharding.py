@@ -0,0 +1,485 @@
+"""
+Multi-site sharding for Kitchen AI
+Consistent-hash routing of sites to shards that own their agents' state.
+Shards run in-process or as standalone shard servers in their own processes.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import ipaddress
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .adk_base import Agent, AgentEngine, Task, site_agent_id
+from .alerts import AlertBus
+from .databus import DataBus, site_data_bus
+from .eventstore import EventStore
+from .resilience import resilience_settings
+from .scheduler import AdmissionError, AgentUnavailableError, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+AgentFactory = Callable[[str], Agent]  # site_id -> agent
+
+SITE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT_MAX_SITES = 100
+
+
+class SiteLimitError(ValueError):
+    """The site isn't served - not on the allowlist, or the shard's site cap is reached"""
+
+
+def shard_authkey() -> bytes:
+    """The secret shared by routers and shard servers (KITCHEN_SHARD_AUTHKEY)
+
+    Shard connections unpickle what they receive, so anyone holding the key
+    can run code on the shard - there is deliberately no default.
+    """
+    authkey = os.getenv("KITCHEN_SHARD_AUTHKEY", "")
+    if not authkey:
+        raise RuntimeError("KITCHEN_SHARD_AUTHKEY must be set to a shared secret to use shard servers")
+    return authkey.encode()
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def validate_site_id(site_id: str) -> str:
+    if not SITE_ID_PATTERN.match(site_id):
+        raise ValueError(f"Invalid site id '{site_id}' (letters, digits, '-' and '_' only)")
+    return site_id
+
+
+def site_settings() -> Dict[str, Any]:
+    """LocalShard site limits: KITCHEN_SITES="default,kitchen-2" is an allowlist,
+    KITCHEN_MAX_SITES caps how many sites one shard provisions (0 = no cap)"""
+    sites = os.getenv("KITCHEN_SITES", "").split(",")
+    allowed = {validate_site_id(site.strip()) for site in sites if site.strip()}
+    max_sites = int(os.getenv("KITCHEN_MAX_SITES", str(DEFAULT_MAX_SITES)))
+    return {"allowed_sites": allowed or None, "max_sites": max_sites or None}
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes
+
+    Adding or removing a shard only moves the sites that hashed to its points.
+    """
+
+    def __init__(self, nodes: Optional[List[str]] = None, replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes or []:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def add_node(self, node: str):
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            position = bisect.bisect(self._points, point)
+            self._points.insert(position, point)
+            self._owners.insert(position, node)
+
+    def remove_node(self, node: str):
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def get_node(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+        position = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[position]
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners))
+
+
+class LocalShard:
+    """Shard whose sites' agents live in this process, on one AgentEngine
+
+    Each site gets its own agent instances (and so its own inventory and sensor
+    state), created on first use and registered as "<agent_id>@<site_id>".
+    With a data_dir, each agent's state is restored from and logged to
+    <data_dir>/<site_id>/<agent_id>. With an alert_bus, agents publish their
+    alert changes to it. Each site's agents share state through the site's
+    DataBus, which also holds its materialized views.
+
+    Sites are never evicted, so a shard only provisions sites on its
+    allowed_sites list (when given) and at most max_sites of them.
+    """
+
+    def __init__(self, name: str, engine: AgentEngine, agent_factories: Dict[str, AgentFactory],
+                 agent_limits: Optional[Dict[str, Dict[str, int]]] = None,
+                 data_dir: Optional[str] = None, alert_bus: Optional[AlertBus] = None,
+                 allowed_sites: Optional[Iterable[str]] = None, max_sites: Optional[int] = DEFAULT_MAX_SITES):
+        self.name = name
+        self.engine = engine
+        self.agent_factories = agent_factories
+        self.agent_limits = agent_limits or {}
+        self.data_dir = data_dir
+        self.alert_bus = alert_bus
+        self.allowed_sites = set(allowed_sites) if allowed_sites is not None else None
+        self.max_sites = max_sites
+        self.sites: Set[str] = set()
+        self.data_buses: Dict[str, DataBus] = {}
+
+    def ensure_site(self, site_id: str):
+        """Create and register a site's agents if this is its first request
+
+        Raises SiteLimitError for a site this shard may not provision.
+        """
+        if site_id in self.sites:
+            return
+        if self.allowed_sites is not None and site_id not in self.allowed_sites:
+            raise SiteLimitError(f"Site {site_id} is not served here (see KITCHEN_SITES)")
+        if self.max_sites is not None and len(self.sites) >= self.max_sites:
+            raise SiteLimitError(f"Shard {self.name} already serves its limit of {self.max_sites} sites")
+        bus = self.data_buses.setdefault(site_id, site_data_bus(site_id))
+        for agent_id, factory in self.agent_factories.items():
+            if site_agent_id(agent_id, site_id) not in self.engine.agents:
+                agent = factory(site_id)
+                if self.data_dir:
+                    agent.attach_store(EventStore(os.path.join(self.data_dir, site_id, agent_id)))
+                agent.alert_bus = self.alert_bus
+                agent.attach_data_bus(bus)
+                self.engine.register_agent(agent, **self.agent_limits.get(agent_id, {}))
+        self.sites.add(site_id)
+        logger.info(f"🏪 Site {site_id} attached to shard {self.name}")
+
+    async def execute(self, site_id: str, agent_id: str, task: Task) -> Dict[str, Any]:
+        self.ensure_site(site_id)
+        return await self.engine.execute_task(site_agent_id(agent_id, site_id), task)
+
+    async def execute_batch(self, site_id: str, agent_id: str, tasks: List[Task]) -> List[Dict[str, Any]]:
+        self.ensure_site(site_id)
+        return await self.engine.execute_batch(site_agent_id(agent_id, site_id), tasks)
+
+    def data_bus(self, site_id: str) -> DataBus:
+        self.ensure_site(site_id)
+        return self.data_buses[site_id]
+
+    async def view(self, site_id: str, name: str) -> Dict[str, Any]:
+        return self.data_bus(site_id).snapshot(name)
+
+    async def status(self) -> Dict[str, Any]:
+        return {"shard": self.name, "mode": "local", "sites": sorted(self.sites)}
+
+    async def close(self):
+        await self.engine.shutdown()
+        for agent in self.engine.agents.values():
+            if agent.store is not None:
+                await agent.store.wait_for_snapshot()
+            agent.close_store()
+
+
+class RemoteShard:
+    """Client for a shard server running in another process
+
+    Connections are pooled; blocking socket I/O runs on a small thread pool so
+    the event loop never waits on the shard.
+    """
+
+    def __init__(self, name: str, address: Tuple[str, int], authkey: Optional[bytes] = None,
+                 pool_size: int = 16):
+        self.name = name
+        self.address = address
+        self.authkey = authkey or shard_authkey()
+        self._idle: "queue.SimpleQueue[Connection]" = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix=f"shard-{name}")
+
+    def _call(self, request: Tuple) -> Any:
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = Client(self.address, authkey=self.authkey)
+            conn.send(request)
+            status, payload = conn.recv()
+        except Exception as e:
+            # Whatever failed, the connection is mid-exchange and can't be reused
+            if conn is not None:
+                conn.close()
+            if isinstance(e, multiprocessing.AuthenticationError):
+                message = f"Shard {self.name} at {self.address} rejected the shard authkey"
+            elif isinstance(e, (EOFError, OSError)):
+                message = f"Shard {self.name} at {self.address} is unreachable"
+            else:
+                message = f"Request to shard {self.name} at {self.address} failed: {e!r}"  # e.g. unpickling
+            raise AgentUnavailableError(self.name, message) from e
+        self._idle.put(conn)
+
+        if status == "ok":
+            return payload
+        error_type, agent_id, message = payload
+        if error_type == "queue_full":
+            raise QueueFullError(agent_id, message)
+        if error_type == "unavailable":
+            raise AgentUnavailableError(agent_id, message)
+        if error_type == "invalid":
+            raise ValueError(message)
+        raise RuntimeError(message)
+
+    async def _request(self, *request) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, request)
+
+    async def execute(self, site_id: str, agent_id: str, task: Task) -> Dict[str, Any]:
+        return await self._request("execute", site_id, agent_id, task)
+
+    async def execute_batch(self, site_id: str, agent_id: str, tasks: List[Task]) -> List[Dict[str, Any]]:
+        return await self._request("execute_batch", site_id, agent_id, tasks)
+
+    async def view(self, site_id: str, name: str) -> Dict[str, Any]:
+        return await self._request("view", site_id, name)
+
+    async def status(self) -> Dict[str, Any]:
+        try:
+            status = await self._request("status")
+        except AdmissionError as e:
+            return {"shard": self.name, "mode": "remote", "error": str(e)}
+        return {**status, "mode": "remote", "address": f"{self.address[0]}:{self.address[1]}"}
+
+    async def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._executor.shutdown(wait=False)
+
+
+class SiteView:
+    """A site's slice of the router, usable wherever an AgentEngine-like executor is expected"""
+
+    def __init__(self, router: "ShardRouter", site_id: str):
+        self.router = router
+        self.site_id = site_id
+
+    async def execute_task(self, agent_id: str, task: Task) -> Dict[str, Any]:
+        return await self.router.execute(self.site_id, agent_id, task)
+
+    async def execute_batch(self, agent_id: str, tasks: List[Task]) -> List[Dict[str, Any]]:
+        return await self.router.execute_batch(self.site_id, agent_id, tasks)
+
+
+class ShardRouter:
+    """Routes each site to the shard that owns it"""
+
+    def __init__(self, shards: List[Any], replicas: int = 64):
+        self.shards = {shard.name: shard for shard in shards}
+        self.ring = HashRing(list(self.shards), replicas=replicas)
+
+    def shard_for(self, site_id: str):
+        return self.shards[self.ring.get_node(validate_site_id(site_id))]
+
+    def site(self, site_id: str) -> SiteView:
+        return SiteView(self, validate_site_id(site_id))
+
+    async def execute(self, site_id: str, agent_id: str, task: Task) -> Dict[str, Any]:
+        return await self.shard_for(site_id).execute(site_id, agent_id, task)
+
+    async def execute_batch(self, site_id: str, agent_id: str, tasks: List[Task]) -> List[Dict[str, Any]]:
+        return await self.shard_for(site_id).execute_batch(site_id, agent_id, tasks)
+
+    async def view(self, site_id: str, name: str) -> Dict[str, Any]:
+        """A site's materialized view (KeyError for an unknown name)"""
+        return await self.shard_for(site_id).view(site_id, name)
+
+    async def status(self) -> List[Dict[str, Any]]:
+        """Each shard's status; one failing shard is reported, not raised"""
+        statuses = await asyncio.gather(*(shard.status() for shard in self.shards.values()),
+                                        return_exceptions=True)
+        return [
+            {"shard": name, "error": str(status) or type(status).__name__} if isinstance(status, Exception) else status
+            for name, status in zip(self.shards, statuses)
+        ]
+
+    async def close(self):
+        await asyncio.gather(*(shard.close() for shard in self.shards.values()))
+
+
+def parse_shard_spec(spec: str) -> List[Tuple[str, Tuple[str, int]]]:
+    """Parse "s0=127.0.0.1:7101,s1=127.0.0.1:7102" into (name, address) pairs"""
+    shards = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, address = entry.partition("=")
+        host, _, port = address.rpartition(":")
+        if not name or not host or not port.isdigit():
+            raise ValueError(f"Invalid shard entry '{entry}' (expected name=host:port)")
+        shards.append((name, (host, int(port))))
+    return shards
+
+
+# ===========================================
+# SHARD SERVER
+# ===========================================
+
+def default_agent_factories() -> Dict[str, AgentFactory]:
+    from .registry import default_registry
+    return default_registry().factories()
+
+
+class ShardServer:
+    """Serves one shard's agents to routers in other processes
+
+    Requests arrive pickled, so the server needs an authkey and only binds
+    to a loopback address unless allow_remote is set.
+    """
+
+    def __init__(self, name: str, address: Tuple[str, int], authkey: Optional[bytes] = None,
+                 engine: Optional[AgentEngine] = None,
+                 agent_factories: Optional[Dict[str, AgentFactory]] = None,
+                 data_dir: Optional[str] = None, allow_remote: bool = False):
+        if not allow_remote and not is_loopback(address[0]):
+            raise ValueError(f"Refusing to serve shard {name} on non-loopback address {address[0]} "
+                             f"(pass --allow-remote or set KITCHEN_SHARD_ALLOW_REMOTE=1)")
+        self.address = address
+        self.authkey = authkey or shard_authkey()
+        self.shard = LocalShard(name, engine or AgentEngine(**resilience_settings()),
+                                agent_factories or default_agent_factories(), data_dir=data_dir,
+                                **site_settings())
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _handle(self, request: Tuple) -> Any:
+        op = request[0]
+        if op == "execute":
+            _, site_id, agent_id, task = request
+            return await self.shard.execute(site_id, agent_id, task)
+        if op == "execute_batch":
+            _, site_id, agent_id, tasks = request
+            return await self.shard.execute_batch(site_id, agent_id, tasks)
+        if op == "view":
+            _, site_id, name = request
+            return await self.shard.view(site_id, name)
+        if op == "status":
+            return {**(await self.shard.status()), "agents": self.shard.engine.get_agent_status()}
+        raise ValueError(f"Unknown shard operation {op}")
+
+    def _serve_connection(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                future = asyncio.run_coroutine_threadsafe(self._handle(request), self._loop)
+                try:
+                    response = ("ok", future.result())
+                except QueueFullError as e:
+                    response = ("error", ("queue_full", e.agent_id, str(e)))
+                except AdmissionError as e:
+                    response = ("error", ("unavailable", e.agent_id, str(e)))
+                except ValueError as e:
+                    response = ("error", ("invalid", self.shard.name, str(e)))
+                except Exception as e:
+                    logger.error(f"❌ Shard request {request[0]} failed: {e}")
+                    response = ("error", ("internal", self.shard.name, str(e)))
+                try:
+                    conn.send(response)
+                except (EOFError, OSError):
+                    return
+
+    def _accept_loop(self, listener: Listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return
+            except Exception as e:
+                # Bad authkey or handshake - keep serving everyone else
+                logger.warning(f"⚠️ Rejected shard connection: {e}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    async def serve_forever(self):
+        self._loop = asyncio.get_running_loop()
+        listener = Listener(self.address, authkey=self.authkey)
+        logger.info(f"🧩 Shard {self.shard.name} listening on {self.address[0]}:{self.address[1]}")
+        threading.Thread(target=self._accept_loop, args=(listener,), daemon=True).start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            listener.close()
+            await self.shard.close()
+
+
+def run_shard_server(name: str, host: str, port: int, authkey: bytes, allow_remote: bool = False):
+    """Process entry point for one shard server"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"🍅 HeySalad [{name}] | %(levelname)s | %(asctime)s | %(message)s",
+        datefmt="%H:%M:%S"
+    )
+    server = ShardServer(name, (host, port), authkey, data_dir=os.getenv("KITCHEN_DATA_DIR"),
+                         allow_remote=allow_remote)
+    asyncio.run(server.serve_forever())
+
+
+def spawn_shard_servers(count: int, host: str = "127.0.0.1", base_port: int = 7101,
+                        allow_remote: bool = False) -> Tuple[List[multiprocessing.Process], str]:
+    """Start count shard server processes, returning them and the KITCHEN_SHARDS spec
+
+    Raises before starting anything without KITCHEN_SHARD_AUTHKEY, or for a
+    non-loopback host unless allow_remote is set.
+    """
+    authkey = shard_authkey()
+    if not allow_remote and not is_loopback(host):
+        raise ValueError(f"Refusing to serve shards on non-loopback address {host} "
+                         f"(pass --allow-remote or set KITCHEN_SHARD_ALLOW_REMOTE=1)")
+    processes = []
+    for index in range(count):
+        process = multiprocessing.Process(
+            target=run_shard_server,
+            args=(f"shard{index}", host, base_port + index, authkey, allow_remote),
+            name=f"kitchen-shard-{index}",
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+    spec = ",".join(f"shard{index}={host}:{base_port + index}" for index in range(count))
+    return processes, spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Kitchen AI shard servers")
+    parser.add_argument("--count", type=int, default=1, help="number of shard processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=7101)
+    parser.add_argument("--allow-remote", action="store_true",
+                        default=os.getenv("KITCHEN_SHARD_ALLOW_REMOTE") == "1",
+                        help="allow binding to a non-loopback address (keep the port firewalled)")
+    args = parser.parse_args()
+
+    try:
+        processes, spec = spawn_shard_servers(args.count, args.host, args.base_port, args.allow_remote)
+    except (RuntimeError, ValueError) as e:
+        parser.error(str(e))
+    print(f"🧩 {args.count} shard server(s) running")
+    print(f"   export KITCHEN_SHARDS=\"{spec}\"")
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Simulation settings for Kitchen AI
+The demo agents stand in for real models and integrations: they make up
+readings and scores, and wait a while to mimic processing. Both are
+controlled here so runs can be reproduced. Each agent instance gets its own
+random.Random, seeded from KITCHEN_SEED plus the agent and site. Processing
+delays come from a service-time model per agent type instead of a hardcoded
+sleep.
+
+    KITCHEN_SEED=42
+    KITCHEN_SERVICE_TIMES="heysalad_sourcing=lognormal:0.5,0.25;heysalad_quality=fixed:0.4"
+
+Models: fixed:<s>, uniform:<lo>,<hi>, exp:<mean>, lognormal:<median>,<sigma>
+and none. Without KITCHEN_SEED every agent is seeded from the OS, as before.
+"""
+
+import hashlib
+import math
+import os
+import random
+from typing import Any, Dict, Optional, Tuple
+
+
+class ServiceTimeModel:
+    """Distribution of simulated processing time, in seconds"""
+    KINDS = {"none": 0, "fixed": 1, "uniform": 2, "exp": 1, "lognormal": 2}
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown service time model '{kind}' (choose from {', '.join(self.KINDS)})")
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(f"Service time model '{kind}' takes {self.KINDS[kind]} parameter(s)")
+        if any(param < 0 for param in params):
+            raise ValueError("Service time parameters must be >= 0")
+        self.kind = kind
+        self.params: Tuple[float, ...] = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "ServiceTimeModel":
+        """'lognormal:0.5,0.25' -> model; a bare number means fixed"""
+        kind, _, args = spec.strip().partition(":")
+        try:
+            if not args and kind not in cls.KINDS:
+                return cls("fixed", float(kind))
+            return cls(kind, *(float(arg) for arg in args.split(",") if arg.strip()))
+        except ValueError as e:
+            raise ValueError(f"Invalid service time '{spec}': {e}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] else 0.0
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma) if median else 0.0
+        return 0.0
+
+    @property
+    def mean(self) -> float:
+        if self.kind in ("fixed", "exp"):
+            return self.params[0]
+        if self.kind == "uniform":
+            return sum(self.params) / 2
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return median * math.exp(sigma ** 2 / 2)
+        return 0.0
+
+    def __str__(self) -> str:
+        return self.kind + (":" + ",".join(f"{param:g}" for param in self.params) if self.params else "")
+
+
+def parse_service_times(spec: str) -> Dict[str, ServiceTimeModel]:
+    """'agent=model;agent=model' -> {agent_type: model}"""
+    models = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        agent_type, _, model = entry.partition("=")
+        if not agent_type or not model:
+            raise ValueError(f"Invalid service time entry '{entry}' (expected agent=model)")
+        models[agent_type.strip()] = ServiceTimeModel.parse(model)
+    return models
+
+
+class Simulation:
+    """Seed and service-time models shared by every agent in the process"""
+
+    def __init__(self, seed: Optional[int] = None,
+                 service_times: Optional[Dict[str, ServiceTimeModel]] = None):
+        self.seed = seed
+        self.service_times = service_times or {}
+
+    @classmethod
+    def from_env(cls) -> "Simulation":
+        seed = os.getenv("KITCHEN_SEED")
+        return cls(int(seed) if seed else None, parse_service_times(os.getenv("KITCHEN_SERVICE_TIMES", "")))
+
+    def rng(self, agent_type: str, site_id: str, stream: str = "behavior") -> random.Random:
+        """Independent generator per agent instance and purpose
+
+        Seeds are derived with a hash, not hash(), which is salted per process.
+        Separate streams keep delays from shifting the generated data.
+        """
+        if self.seed is None:
+            return random.Random()
+        digest = hashlib.sha256(f"{self.seed}:{agent_type}:{site_id}:{stream}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def service_time(self, agent_type: str, default: ServiceTimeModel) -> ServiceTimeModel:
+        return self.service_times.get(agent_type, default)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "seed": self.seed,
+            "deterministic": self.seed is not None,
+            "service_times": {agent_type: str(model) for agent_type, model in self.service_times.items()}
+        }
+
+
+# Process-wide settings; agents read them when constructed
+simulation = Simulation.from_env()
+
+
+def get_simulation() -> Simulation:
+    return simulation
+
+
+def configure(seed: Optional[int] = None, service_times: Optional[Dict[str, ServiceTimeModel]] = None):
+    """Replace the process-wide settings (affects agents constructed afterwards)"""
+    global simulation
+    simulation = Simulation(seed, service_times)
@@ -3,98 +3,402 @@ HeySalad Sourcing Agent - ADK Implementation
 Manages inventory and suppliers for B2B kitchens
 """
 
-import asyncio
+import logging
+import time
 from datetime import datetime
-from typing import Dict, List, Any
-from .adk_base import Agent, Task
+from typing import Dict, List, Any, Optional
+from .adk_base import Agent, Task, DEFAULT_SITE
+from .databus import INVENTORY
+from .forecast import DemandForecaster
+from .intents import Intent
+from .inventory import InventoryStore, StockError
+from .reorder import ReorderPlanner
+from .simulation import ServiceTimeModel
+
+logger = logging.getLogger(__name__)
+
+# HeySalad B2B inventory simulation
+DEFAULT_INVENTORY = {
+    "cherry_tomatoes": {"qty": 45, "unit": "kg", "cost": 3.2, "supplier": "Fresh Farms UK"},
+    "lettuce_mix": {"qty": 30, "unit": "kg", "cost": 2.8, "supplier": "Green Gardens"},
+    "premium_chicken": {"qty": 25, "unit": "kg", "cost": 12.5, "supplier": "Quality Proteins"},
+    "mozzarella": {"qty": 18, "unit": "kg", "cost": 15.0, "supplier": "Italian Delights"}
+}
+
+DEFAULT_SUPPLIERS = {
+    "Fresh Farms UK": {"rating": 4.9, "delivery": "2 hours", "specialty": "vegetables"},
+    "Quality Proteins": {"rating": 4.8, "delivery": "1 hour", "specialty": "meats"},
+    "Italian Delights": {"rating": 4.7, "delivery": "3 hours", "specialty": "dairy"}
+}
 
 class SourcingAgent(Agent):
     """🍅 HeySalad Sourcing Agent - Inventory & Supplier Management"""
     
-    def __init__(self):
-        super().__init__("heysalad_sourcing")
-        
-        # HeySalad B2B inventory simulation
-        self.inventory = {
-            "cherry_tomatoes": {"qty": 45, "unit": "kg", "cost": 3.2, "supplier": "Fresh Farms UK"},
-            "lettuce_mix": {"qty": 30, "unit": "kg", "cost": 2.8, "supplier": "Green Gardens"},
-            "premium_chicken": {"qty": 25, "unit": "kg", "cost": 12.5, "supplier": "Quality Proteins"},
-            "mozzarella": {"qty": 18, "unit": "kg", "cost": 15.0, "supplier": "Italian Delights"}
-        }
+    intents = {
+        "inventory_report": ["inventory", "stock", "stocks", "stock levels"],
+        "supplier_report": ["supplier", "suppliers"],
+        "reorder_report": ["reorder", "restock", "what should i order"]
+    }
+    intent_slots = {
+        "item": {sku.replace("_", " "): sku for sku in DEFAULT_INVENTORY},
+        "supplier": {name: name for name in DEFAULT_SUPPLIERS}
+    }
+    
+    capabilities = ["inventory check", "supplier info", "low stock alerts", "reorder planning",
+                    "demand forecasting"]
+    
+    task_types = {
+        "voice_command", "inventory_check", "low_stock_alert", "stock_movement", "supplier_inventory",
+        "inventory_valuation", "supplier_directory", "supplier_update", "reorder_plan", "demand_forecast"
+    }
+    
+    cacheable_tasks = {
+        "supplier_directory": 60.0,
+        "inventory_check": 5.0,
+        "low_stock_alert": 5.0,
+        "supplier_inventory": 5.0,
+        "inventory_valuation": 5.0,
+        "reorder_plan": 5.0,
+        "demand_forecast": 30.0,
+        "voice_command": 10.0
+    }
+    # Stock movements change every inventory view
+    invalidates = {
+        "stock_movement": [
+            "inventory_check", "low_stock_alert", "supplier_inventory",
+            "inventory_valuation", "reorder_plan", "demand_forecast", "voice_command"
+        ],
+        # Supplier ratings and lead times change which supplier a reorder goes to
+        "supplier_update": [
+            "supplier_directory", "supplier_inventory", "low_stock_alert", "reorder_plan", "voice_command"
+        ]
+    }
+    service_time = ServiceTimeModel("fixed", 0.5)
+    hedged_tasks = {"voice_command": 1.0, "inventory_check": 1.0}
+    
+    def __init__(self, site_id: str = DEFAULT_SITE):
+        super().__init__("heysalad_sourcing", site_id)
         
-        self.suppliers = {
-            "Fresh Farms UK": {"rating": 4.9, "delivery": "2 hours", "specialty": "vegetables"},
-            "Quality Proteins": {"rating": 4.8, "delivery": "1 hour", "specialty": "meats"},
-            "Italian Delights": {"rating": 4.7, "delivery": "3 hours", "specialty": "dairy"}
-        }
+        self.inventory = InventoryStore(DEFAULT_INVENTORY, low_stock_threshold=20)
+        self.suppliers = {name: dict(info) for name, info in DEFAULT_SUPPLIERS.items()}
+        self.suppliers_version = 0  # bumped on every supplier change
+        # Reorder points from consumption and lead times; SKUs with no usage
+        # history yet fall back to the inventory's low-stock threshold
+        self.planner = ReorderPlanner(self.inventory, self.suppliers)
+        # Consumption history by meal period with seasonal forecasts
+        self.forecaster = DemandForecaster()
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        return {"inventory": self.inventory.as_dict(), "suppliers": self.suppliers,
+                "consumption": self.planner.snapshot(), "forecast": self.forecaster.snapshot()}
+    
+    def restore_state(self, state: Dict[str, Any]):
+        self.inventory = InventoryStore(state["inventory"], low_stock_threshold=self.inventory.low_stock_threshold)
+        if "suppliers" in state:
+            self.suppliers = state["suppliers"]
+            self.suppliers_version += 1
+        self.planner = ReorderPlanner(self.inventory, self.suppliers)
+        self.planner.restore(state.get("consumption", {}))
+        self.forecaster.restore(state.get("forecast", {}))
+    
+    def publish_state(self):
+        self._publish_stock(list(self.inventory))
+    
+    def _publish_stock(self, skus: List[str]):
+        """Share stock levels and reorder status for these SKUs on the data bus"""
+        if self.data_bus is None:
+            return
+        entries = {}
+        for sku in skus:
+            record = self.inventory.get(sku)
+            if record is None:
+                entries[sku] = None  # removed
+                continue
+            plan = self.planner.plan(sku)
+            entries[sku] = {
+                "qty": record["qty"],
+                "unit": record["unit"],
+                "supplier": record["supplier"],
+                "value": round(record["qty"] * record["cost"], 2),
+                "reorder_point": plan["reorder_point"],
+                "low": plan["reorder"]
+            }
+        self.data_bus.publish_many(INVENTORY, entries)
+    
+    def apply_event(self, event: Dict[str, Any]):
+        if event["type"] == "supplier_update":
+            self._set_supplier(event["supplier"], event["info"])
+        elif event["type"] == "stock_movement":
+            for item, delta in event["movements"]:
+                try:
+                    self.inventory.apply_movement(item, delta)
+                    self._record_consumption(item, delta, event.get("ts"))
+                except StockError as e:
+                    logger.warning(f"⚠️ Skipping logged movement for {item}: {e}")
     
     async def process_task(self, task: Task) -> Dict[str, Any]:
         """Process sourcing tasks"""
-        await asyncio.sleep(0.5)  # Simulate processing
-        
+        await self.simulate_processing()
+        return await self._dispatch(task)
+    
+    async def process_batch(self, tasks: List[Task]) -> List[Dict[str, Any]]:
+        """Process a batch of tasks, paying the processing overhead once"""
+        await self.simulate_processing()
+        return await self._run_batch(tasks, self._dispatch)
+    
+    async def _dispatch(self, task: Task) -> Dict[str, Any]:
+        """Route a task to its handler"""
         if task.type == "voice_command":
-            return await self._handle_voice_command(task.data["transcript"])
+            return await self._handle_voice_command(self.resolve_intent(task))
         elif task.type == "inventory_check":
             return await self._check_inventory()
         elif task.type == "low_stock_alert":
             return await self._check_low_stock()
+        elif task.type == "stock_movement":
+            return await self._apply_stock_movements(task.data.get("movements", []))
+        elif task.type == "supplier_inventory":
+            return await self._supplier_inventory(task.data.get("supplier", ""))
+        elif task.type == "inventory_valuation":
+            return {"status": "inventory_valued", **self.inventory.valuation()}
+        elif task.type == "supplier_directory":
+            return self.supplier_directory()
+        elif task.type == "supplier_update":
+            return self._update_supplier(task.data.get("supplier", ""), task.data.get("info", {}))
+        elif task.type == "reorder_plan":
+            return self.reorder_plan(task.data.get("item"))
+        elif task.type == "demand_forecast":
+            return self.demand_forecast(task.data.get("item"), task.data.get("horizon_days", 7))
         
         return {"status": "unknown_task", "agent": "HeySalad Sourcing"}
     
-    async def _handle_voice_command(self, transcript: str) -> Dict[str, Any]:
+    async def _handle_voice_command(self, intent: Intent) -> Dict[str, Any]:
         """Handle voice commands for sourcing"""
-        transcript = transcript.lower()
-        
-        if "inventory" in transcript or "stock" in transcript:
-            total_value = sum(item["qty"] * item["cost"] for item in self.inventory.values())
-            low_stock = [name for name, item in self.inventory.items() if item["qty"] < 20]
+        if intent.name == "inventory_report":
+            snapshot = self.inventory.snapshot()
+            items = snapshot["items"]
+            reorders = self.planner.reorders()
             
-            return {
+            report = {
                 "status": "inventory_report",
                 "message": "🍅 HeySalad Inventory Status",
-                "total_items": len(self.inventory),
-                "total_value": f"£{total_value:.2f}",
-                "low_stock_items": low_stock,
-                "inventory": self.inventory,
-                "recommendation": "Reorder cherry tomatoes and lettuce mix" if low_stock else "Stock levels good"
+                "total_items": len(items),
+                "total_value": f"£{snapshot['total_value']:.2f}",
+                "low_stock_items": [plan["item"] for plan in reorders],
+                "inventory": items,
+                "recommendation": self._reorder_summary(reorders)
+            }
+            requested = [item for item in intent.slots.get("item", []) if item in items]
+            if requested:
+                report["requested_items"] = {item: items[item] for item in requested}
+            return report
+        
+        elif intent.name == "reorder_report":
+            reorders = self.planner.reorders()
+            return {
+                "status": "reorder_report",
+                "message": "🛒 HeySalad Reorder Plan",
+                "reorders": reorders,
+                "recommendation": self._reorder_summary(reorders)
             }
         
-        elif "supplier" in transcript:
+        elif intent.name == "supplier_report":
+            requested = [name for name in intent.slots.get("supplier", []) if name in self.suppliers]
             return {
                 "status": "supplier_report",
                 "message": "📦 HeySalad Supplier Network",
-                "suppliers": self.suppliers,
+                "suppliers": {name: self.suppliers[name] for name in requested} if requested else self.suppliers,
                 "top_rated": max(self.suppliers.items(), key=lambda x: x[1]["rating"])[0]
             }
         
         return {
             "status": "sourcing_ready",
             "message": "🍅 HeySalad Sourcing Agent ready! Ask about inventory or suppliers.",
-            "capabilities": ["inventory check", "supplier info", "low stock alerts"]
+            "capabilities": self.capabilities
+        }
+    
+    def _reorder_summary(self, reorders: List[Dict[str, Any]], limit: int = 3) -> str:
+        """Spoken recommendation naming the most urgent reorders"""
+        if not reorders:
+            return "Stock levels good"
+        parts = [
+            f"{plan['item'].replace('_', ' ')} ({plan['order_qty']:g} {plan['unit']} from {plan['supplier']})"
+            for plan in reorders[:limit]
+        ]
+        text = "Reorder " + (", ".join(parts[:-1]) + " and " + parts[-1] if len(parts) > 1 else parts[0])
+        if len(reorders) > limit:
+            text += f", plus {len(reorders) - limit} more"
+        return text
+    
+    def reorder_plan(self, item: Optional[str] = None) -> Dict[str, Any]:
+        """Reorder plan for one SKU, or every due reorder grouped into per-supplier orders"""
+        if item:
+            plan = self.planner.plan(item)
+            if plan is None:
+                return {"status": "reorder_plan", "error": f"Unknown item {item}"}
+            return {"status": "reorder_plan", "plan": plan}
+        
+        reorders = self.planner.reorders()
+        orders: Dict[str, Dict[str, Any]] = {}
+        for plan in reorders:
+            order = orders.setdefault(plan["supplier"], {
+                "supplier": plan["supplier"], "lead_time_hours": plan["lead_time_hours"], "items": [], "cost": 0.0
+            })
+            order["items"].append({"item": plan["item"], "qty": plan["order_qty"], "unit": plan["unit"]})
+            order["cost"] = round(order["cost"] + plan["order_cost"], 2)
+        return {
+            "status": "reorder_plan",
+            "reorders": reorders,
+            "orders": list(orders.values()),
+            "total_cost": round(sum(plan["order_cost"] for plan in reorders), 2),
+            "skus_planned": len(self.planner.plans),
+            "recommendation": self._reorder_summary(reorders)
         }
     
+    def _record_consumption(self, item: str, delta: float, ts: Any = None):
+        """Feed an applied stock movement to the reorder planner and the forecaster"""
+        self.planner.record_movement(item, delta, ts)
+        if delta < 0:
+            self.forecaster.record(item, -delta, ts)
+    
+    def demand_forecast(self, item: Optional[str] = None, horizon_days: int = 7) -> Dict[str, Any]:
+        """Forecast consumption for one SKU, or summarize every SKU with history"""
+        horizon_days = max(1, min(int(horizon_days), 28))
+        if item:
+            if item not in self.inventory:
+                return {"status": "demand_forecast", "error": f"Unknown item {item}"}
+            forecast = self.forecaster.forecast(item, horizon_days, on_hand=self.inventory.get(item)["qty"])
+            return {
+                "status": "demand_forecast",
+                "forecast": forecast,
+                "history_days": self.forecaster.history(item, 28) if forecast else [],
+                "message": None if forecast else f"No consumption recorded for {item} yet"
+            }
+        
+        items = []
+        for sku in self.forecaster.series:
+            if sku not in self.inventory:
+                continue
+            forecast = self.forecaster.forecast(sku, horizon_days, on_hand=self.inventory.get(sku)["qty"])
+            items.append({
+                "item": sku,
+                "on_hand": forecast["on_hand"],
+                "expected_total": forecast["expected_total"],
+                "days_until_stockout": forecast["days_until_stockout"],
+                "seasonal": forecast["seasonal"]
+            })
+        # Soonest stockout first; items that last the horizon go last
+        items.sort(key=lambda entry: (entry["days_until_stockout"] is None, entry["days_until_stockout"] or 0))
+        return {"status": "demand_forecast", "horizon_days": horizon_days, "items": items}
+    
+    def supplier_directory(self) -> Dict[str, Any]:
+        """Every supplier with its details - changes only on supplier updates"""
+        return {
+            "status": "supplier_directory",
+            "suppliers": self.suppliers,
+            "top_rated": max(self.suppliers.items(), key=lambda x: x[1]["rating"])[0] if self.suppliers else None,
+            "version": self.suppliers_version
+        }
+    
+    def _set_supplier(self, name: str, info: Dict[str, Any]):
+        # Copy-on-write so results already handed out never change underneath callers
+        self.suppliers = {**self.suppliers, name: {**self.suppliers.get(name, {}), **info}}
+        self.suppliers_version += 1
+        self.planner.set_suppliers(self.suppliers, changed=name)
+    
+    def _update_supplier(self, name: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a supplier or change its rating / delivery time / specialty"""
+        if not name:
+            return {"status": "supplier_rejected", "error": "Supplier name is required"}
+        info = {key: value for key, value in info.items()
+                if key in ("rating", "delivery", "specialty") and value is not None}
+        if name not in self.suppliers and "rating" not in info:
+            return {"status": "supplier_rejected", "error": f"New supplier {name} needs a rating"}
+        self._set_supplier(name, info)
+        self.record_event({"type": "supplier_update", "supplier": name, "info": info, "ts": time.time()})
+        # Lead times move reorder points; the bus drops entries that didn't change
+        self._publish_stock(list(self.inventory))
+        return {"status": "supplier_updated", "supplier": name, "info": self.suppliers[name],
+                "version": self.suppliers_version}
+    
     async def _check_inventory(self) -> Dict[str, Any]:
         """Check current inventory levels"""
         return {
             "status": "inventory_checked",
-            "inventory": self.inventory,
+            "inventory": self.inventory.snapshot()["items"],
             "timestamp": datetime.now().isoformat()
         }
     
     async def _check_low_stock(self) -> Dict[str, Any]:
-        """Check for low stock items"""
-        low_stock = []
-        for item, details in self.inventory.items():
-            if details["qty"] < 20:
-                low_stock.append({
-                    "item": item,
-                    "current_qty": details["qty"],
-                    "supplier": details["supplier"],
-                    "reorder_recommended": True
-                })
+        """Items at or below their reorder point, publishing any change to subscribers"""
+        low_stock = [
+            {
+                "item": plan["item"],
+                "current_qty": plan["current_qty"],
+                "supplier": plan["supplier"],
+                "reorder_recommended": True,
+                "reorder_point": plan["reorder_point"],
+                "order_qty": plan["order_qty"],
+                "days_of_cover": plan["days_of_cover"]
+            }
+            for plan in self.planner.reorders()
+        ]
+        self._publish_low_stock(low_stock)
         
         return {
             "status": "low_stock_checked", 
             "low_stock_items": low_stock,
             "alert_level": "high" if len(low_stock) > 2 else "medium"
         }
+    
+    def _publish_low_stock(self, low_stock: List[Dict[str, Any]]):
+        """One alert per low item - high once it drops below half its reorder point"""
+        self.publish_alerts([
+            {
+                "type": "low_stock_alert",
+                "item": entry["item"],
+                "qty": entry["current_qty"],
+                "message": f"{entry['item']} low: {entry['current_qty']} left (reorder point {entry['reorder_point']:g})",
+                "severity": "high" if entry["current_qty"] < entry["reorder_point"] / 2 else "medium"
+            }
+            for entry in low_stock
+        ])
+    
+    async def _apply_stock_movements(self, movements: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply stock deliveries (+) and consumption (-), reporting each movement"""
+        applied = []
+        logged = []
+        now = time.time()
+        for movement in movements:
+            item = movement.get("item", "")
+            try:
+                delta = float(movement.get("delta", 0))
+                record = self.inventory.apply_movement(item, delta)
+                self._record_consumption(item, delta, now)
+                applied.append({"item": item, "success": True, "qty": record["qty"],
+                                "reason": movement.get("reason", "adjustment")})
+                logged.append([item, delta])
+            except (StockError, TypeError, ValueError) as e:
+                applied.append({"item": item, "success": False, "error": str(e)})
+        if logged:
+            self.record_event({"type": "stock_movement", "movements": logged, "ts": now})
+            self._publish_stock([item for item, _ in logged])
+            await self._check_low_stock()
+        
+        return {
+            "status": "stock_updated",
+            "movements": applied,
+            "low_stock_items": [plan["item"] for plan in self.planner.reorders()],
+            "total_value": f"£{self.inventory.total_value:.2f}",
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def _supplier_inventory(self, supplier: str) -> Dict[str, Any]:
+        """Items and stock value held for one supplier"""
+        items = self.inventory.by_supplier(supplier)
+        return {
+            "status": "supplier_inventory",
+            "supplier": supplier,
+            "supplier_info": self.suppliers.get(supplier),
+            "items": {item: self.inventory.get(item) for item in items},
+            "stock_value": round(self.inventory.supplier_value(supplier), 2)
+        }
@@ -0,0 +1,105 @@
+"""
+Concurrency-safe agent state for Kitchen AI
+Agent state is read by /api/status and by other requests while tasks run.
+Those tasks may be event loop tasks or threads in a pool. Counters change
+under a small lock, so concurrent updates are never lost. Shared readings
+are published as copy-on-write snapshots: a writer builds a new dict and
+swaps it in with one reference assignment. A reader that takes one snapshot
+therefore sees one consistent version, without taking any lock.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Generic, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+IDLE = "idle"
+BUSY = "busy"
+
+
+class ActivityTracker:
+    """In-flight, completed and failed task counts for one agent
+
+    An agent is busy while at least one task is in flight. busy_seconds
+    accumulates the time spent busy, so utilization can be derived from
+    uptime.
+    """
+    __slots__ = ("_lock", "in_flight", "completed", "failed", "busy_seconds", "_busy_since",
+                 "last_finished")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._busy_since: Optional[float] = None
+        self.last_finished: Optional[float] = None  # time.time() of the last task end
+
+    @property
+    def status(self) -> str:
+        return BUSY if self.in_flight else IDLE
+
+    def begin(self, count: int = 1):
+        with self._lock:
+            if not self.in_flight:
+                self._busy_since = time.monotonic()
+            self.in_flight += count
+
+    def end(self, count: int = 1, failed: int = 0):
+        """count tasks left the agent, `failed` of them with an error"""
+        with self._lock:
+            self.in_flight -= count
+            self.completed += count - failed
+            self.failed += failed
+            self.last_finished = time.time()
+            if not self.in_flight and self._busy_since is not None:
+                self.busy_seconds += time.monotonic() - self._busy_since
+                self._busy_since = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All counts from one instant, so they always add up"""
+        with self._lock:
+            busy = self.busy_seconds
+            if self._busy_since is not None:
+                busy += time.monotonic() - self._busy_since
+            return {
+                "status": BUSY if self.in_flight else IDLE,
+                "in_flight": self.in_flight,
+                "tasks_completed": self.completed,
+                "tasks_failed": self.failed,
+                "busy_seconds": round(busy, 3),
+                "last_finished": self.last_finished
+            }
+
+
+class Snapshot(Generic[T]):
+    """Copy-on-write value: get() returns the current version, which is never mutated
+
+    Writers serialize on a lock so two concurrent updates can't drop each
+    other's changes. Readers never lock. They must treat what they get as
+    read-only.
+    """
+    __slots__ = ("_value", "_lock", "version")
+
+    def __init__(self, value: T):
+        self._value = value
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def get(self) -> T:
+        return self._value
+
+    def replace(self, value: T) -> T:
+        with self._lock:
+            self._value = value
+            self.version += 1
+            return value
+
+    def update(self, changes: Mapping[str, Any]) -> T:
+        """New dict version with `changes` merged in"""
+        with self._lock:
+            self._value = {**self._value, **changes}
+            self.version += 1
+            return self._value
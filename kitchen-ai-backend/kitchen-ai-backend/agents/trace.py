@@ -0,0 +1,179 @@
+"""
+Request traces for Kitchen AI
+TraceMiddleware records every HTTP request the API serves - arrival time,
+method, path, query, body, status and latency - as one JSON line each, so a
+real kitchen's request stream can be replayed later at N x speed against a
+new build (benchmarks/replay_trace.py) for capacity planning.
+
+    KITCHEN_TRACE_FILE=traces/lunch-{pid}.jsonl python main.py
+
+{pid} in the path gives each worker process its own file; the replayer
+merges files by arrival time. Metrics, docs, event streams and websockets
+are not recorded.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+TRACE_FORMAT = 1
+SKIP_PREFIXES = ("/metrics", "/docs", "/redoc", "/openapi.json")
+# Bodies beyond this are not replayable; the record keeps only their size
+MAX_BODY_BYTES = 256 * 1024
+
+
+class TraceRecorder:
+    """Appends request records to a JSONL file
+
+    The first line is a header with the recording's start time and the
+    simulation settings it ran with, so a replay can use the same seed.
+    """
+
+    def __init__(self, path: str, max_body_bytes: int = MAX_BODY_BYTES,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.path = path.format(pid=os.getpid())
+        self.max_body_bytes = max_body_bytes
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.truncated = 0
+        self._write({
+            "trace": TRACE_FORMAT,
+            "started_at": datetime.now().isoformat(),
+            "pid": os.getpid(),
+            **(metadata or {})
+        })
+
+    def record(self, record: Dict[str, Any]):
+        self._write(record)
+        self.recorded += 1
+
+    def encode_body(self, body: bytes, record: Dict[str, Any]):
+        """Store body as text when it is UTF-8, otherwise base64"""
+        if not body:
+            return
+        if len(body) > self.max_body_bytes:
+            record["body_size"] = len(body)
+            self.truncated += 1
+            return
+        try:
+            record["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            record["body_b64"] = base64.b64encode(body).decode("ascii")
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "recorded": self.recorded, "bodies_truncated": self.truncated}
+
+
+class TraceMiddleware:
+    """Pure ASGI middleware, so responses pass through unbuffered"""
+
+    def __init__(self, app, recorder: TraceRecorder, skip_prefixes: Iterable[str] = SKIP_PREFIXES):
+        self.app = app
+        self.recorder = recorder
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        start = time.perf_counter()
+        body = bytearray()
+        response = {"status": 500, "streamed": False}
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= self.recorder.max_body_bytes:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        response["streamed"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            if not response["streamed"]:
+                self._record(scope, arrived, start, bytes(body), response["status"])
+
+    def _record(self, scope, arrived: float, start: float, body: bytes, status: int):
+        route = scope.get("route")
+        record = {
+            "ts": round(arrived, 6),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", scope["path"]),
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": status,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+        for name, value in scope.get("headers", ()):
+            if name == b"content-type":
+                record["content_type"] = value.decode("latin-1")
+        self.recorder.encode_body(body, record)
+        self.recorder.record(record)
+
+
+def read_trace(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Request records from one or more trace files, in arrival order"""
+    records: List[Dict[str, Any]] = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if "trace" not in record:
+                        records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return iter(records)
+
+
+def read_headers(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Header lines of the trace files (one per recording process)"""
+    headers = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip() and "\"trace\":" in line:
+                    record = json.loads(line)
+                    if "trace" in record:
+                        headers.append(record)
+    return headers
+
+
+def request_body(record: Dict[str, Any]) -> Optional[bytes]:
+    """The recorded body as bytes; None when it was too large to keep"""
+    if "body_size" in record:
+        return None
+    if "body_b64" in record:
+        return base64.b64decode(record["body_b64"])
+    return record.get("body", "").encode("utf-8")
@@ -0,0 +1,251 @@
+"""
+Food image analysis for the Quality Agent
+Camera frames are decoded and scored in a process pool, so CPU-bound image
+work never blocks the event loop. Frame bytes are handed to the workers
+through one shared memory segment per submission, never pickled through
+the pool's pipe. Only the small score dicts come back.
+
+The analyzer is pluggable: any module-level callable taking an RGB PIL image
+and returning a dict of scores, named as "package.module:function".
+"""
+
+import asyncio
+import importlib
+import importlib.util
+import io
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# NumPy and Pillow are only imported inside the worker processes, so the API
+# process never pays for them. Image analysis is optional; the endpoint
+# reports 503 when they aren't installed
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANALYZER = "agents.vision:score_food_image"
+# Frames are downscaled before scoring - colour statistics don't need full resolution
+ANALYSIS_SIZE = (256, 256)
+MAX_IMAGE_PIXELS = 40_000_000
+
+# (offset, length) of each frame inside the shared segment
+FrameSlice = Tuple[int, int]
+
+_analyzers: Dict[str, Callable[[Any], Dict[str, Any]]] = {}
+
+
+def load_analyzer(spec: str) -> Callable[[Any], Dict[str, Any]]:
+    """Resolve "package.module:function" once per process"""
+    analyzer = _analyzers.get(spec)
+    if analyzer is None:
+        module_name, _, attr = spec.partition(":")
+        if not attr:
+            raise ValueError(f"Analyzer '{spec}' must look like 'package.module:function'")
+        analyzer = getattr(importlib.import_module(module_name), attr)
+        _analyzers[spec] = analyzer
+    return analyzer
+
+
+# ---- default analyzer --------------------------------------------------
+
+def _hsv_mask(h, lo: int, hi: int):
+    return (h >= lo) & (h <= hi)
+
+
+def score_food_image(image: "Image.Image") -> Dict[str, Any]:
+    """Colour-histogram freshness heuristics for a plate or crate of produce
+
+    - freshness: share of food pixels that are not browning or bruised
+    - color: share of vivid, saturated greens and reds
+    - texture: edge density - wilted or soggy produce looks smooth
+    Pixels with little colour or light (plates, steel, shadows) are ignored.
+    """
+    import numpy as np
+
+    hsv = np.asarray(image.convert("HSV"), dtype=np.int16)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    food = (s > 40) & (v > 40)
+    food_pixels = max(int(food.sum()), 1)
+
+    # Hue runs 0-255 here: ~0-17 red, 18-42 orange/brown, 43-170 yellow-green to cyan
+    vivid = food & (s > 100) & (v > 100) & (_hsv_mask(h, 43, 170) | (h <= 12) | (h >= 235))
+    browning = food & _hsv_mask(h, 13, 42) & (v < 170)
+    bruised = (v <= 40) & (s > 40)
+
+    vivid_share = float(vivid.sum()) / food_pixels
+    browning_share = float(browning.sum()) / food_pixels
+    bruised_share = float(bruised.sum()) / v.size
+
+    luminance = v.astype(np.float32)
+    edges = float(np.abs(np.diff(luminance, axis=0)).mean() + np.abs(np.diff(luminance, axis=1)).mean()) / 2
+
+    freshness = 100 - 120 * browning_share - 60 * bruised_share
+    color = 55 + 45 * vivid_share
+    texture = 50 + 50 * min(edges / 16, 1.0)
+    scores = {
+        "freshness": int(round(min(max(freshness, 0), 100))),
+        "color": int(round(min(max(color, 0), 100))),
+        "texture": int(round(min(max(texture, 0), 100)))
+    }
+    scores["overall"] = int(round(0.5 * scores["freshness"] + 0.3 * scores["color"] + 0.2 * scores["texture"]))
+
+    histogram = np.bincount(h[food] * 12 // 256, minlength=12).astype(np.float64)
+    if histogram.sum():
+        histogram /= histogram.sum()
+    return {
+        "quality_scores": scores,
+        "hue_histogram": [round(float(share), 4) for share in histogram],
+        "dominant_hue_deg": int(np.argmax(histogram)) * 30 + 15 if histogram.any() else None,
+        "food_coverage": round(food_pixels / v.size, 4) if food.any() else 0.0,
+        "browning_share": round(browning_share, 4)
+    }
+
+
+# ---- worker side -------------------------------------------------------
+
+def _attach(name: str) -> SharedMemory:
+    """Open the parent's segment without letting this worker's tracker own it"""
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    # Before 3.13 attaching registers the segment with the resource tracker,
+    # which would unlink it (or warn) when this worker exits
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+def _decode(view: memoryview) -> Tuple["Image.Image", Dict[str, Any]]:
+    """Decode a frame at analysis size; also returns its original dimensions"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(view))
+    info = {"width": image.width, "height": image.height, "format": image.format}
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Image is {image.width}x{image.height}, above the {MAX_IMAGE_PIXELS} pixel limit")
+    image.draft("RGB", ANALYSIS_SIZE)  # JPEG: decode at reduced scale
+    image = image.convert("RGB")
+    image.thumbnail(ANALYSIS_SIZE)
+    return image, info
+
+
+def analyze_frames(segment: str, frames: Sequence[FrameSlice], analyzer_spec: str) -> List[Dict[str, Any]]:
+    """Process-pool entry point: score frames straight out of the shared segment"""
+    analyzer = load_analyzer(analyzer_spec)
+    shm = _attach(segment)
+    results = []
+    try:
+        for offset, length in frames:
+            view = shm.buf[offset:offset + length]
+            try:
+                image, info = _decode(view)
+                results.append({**info, **analyzer(image)})
+            except Exception as e:  # undecodable upload or analyzer failure - just this frame
+                results.append({"error": f"Could not analyze image: {e}"})
+            finally:
+                view.release()
+    finally:
+        shm.close()
+    return results
+
+
+# ---- event loop side ---------------------------------------------------
+
+class ImageAnalysisPool:
+    """Scores image frames on a pool of worker processes
+
+    Each submission copies its frames into one shared memory segment and
+    splits them into contiguous chunks, one per worker. Workers decode from
+    the segment directly, and it is unlinked once every chunk is done.
+    """
+
+    def __init__(self, workers: int = 2, analyzer: str = DEFAULT_ANALYZER):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.analyzer = analyzer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._available: Optional[bool] = None
+        self.frames_analyzed = 0
+        self.submissions = 0
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            self._available = all(importlib.util.find_spec(name) is not None for name in ("numpy", "PIL"))
+        return self._available
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+            logger.info(f"🖼️ Image analysis pool started ({self.workers} workers, {self.analyzer})")
+        return self._executor
+
+    async def analyze(self, frames: Sequence[bytes]) -> List[Dict[str, Any]]:
+        """Score each frame; results are in frame order, failures reported per frame"""
+        if not frames:
+            return []
+        if not self.available:
+            raise RuntimeError("Image analysis needs Pillow and NumPy installed")
+        executor = self._ensure_started()
+
+        slices: List[FrameSlice] = []
+        offset = 0
+        for frame in frames:
+            slices.append((offset, len(frame)))
+            offset += len(frame)
+        shm = SharedMemory(create=True, size=max(offset, 1))
+        try:
+            for (start, length), frame in zip(slices, frames):
+                shm.buf[start:start + length] = frame
+
+            chunk_size = -(-len(slices) // self.workers)
+            loop = asyncio.get_running_loop()
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(executor, analyze_frames, shm.name,
+                                     slices[i:i + chunk_size], self.analyzer)
+                for i in range(0, len(slices), chunk_size)
+            ))
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory) - start a fresh pool next time
+            logger.error("❌ Image analysis worker crashed; restarting the pool")
+            self._executor = None
+            executor.shutdown(wait=False)
+            raise RuntimeError("Image analysis worker crashed")
+        finally:
+            shm.close()
+            shm.unlink()
+
+        self.submissions += 1
+        self.frames_analyzed += len(frames)
+        return [result for chunk in chunks for result in chunk]
+
+    def warm_up(self):
+        """Start the worker processes now instead of on the first upload"""
+        if self.available:
+            executor = self._ensure_started()
+            for _ in range(self.workers):
+                executor.submit(load_analyzer, self.analyzer)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "analyzer": self.analyzer,
+            "started": self._executor is not None,
+            "submissions": self.submissions,
+            "frames_analyzed": self.frames_analyzed
+        }
@@ -0,0 +1,175 @@
+"""
+Declarative workflows for Kitchen AI
+Runs a DAG of agent tasks, starting each step as soon as its dependencies finish
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .adk_base import AgentEngine, Task
+
+logger = logging.getLogger(__name__)
+
+# Step data is either a fixed dict or built from (params, results of finished steps)
+StepData = Union[Dict[str, Any], Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]]
+
+
+class WorkflowError(Exception):
+    """Raised for invalid workflow definitions or unknown workflows"""
+
+
+class WorkflowStep:
+    """One agent task inside a workflow"""
+
+    def __init__(self, name: str, agent_id: str, task_type: str,
+                 data: Optional[StepData] = None, depends_on: Optional[List[str]] = None):
+        self.name = name
+        self.agent_id = agent_id
+        self.task_type = task_type
+        self.data = data or {}
+        self.depends_on = list(depends_on or [])
+
+    def build_data(self, params: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+        if callable(self.data):
+            return self.data(params, results)
+        return {**self.data, **params.get(self.name, {})}
+
+
+class Workflow:
+    """A named DAG of workflow steps"""
+
+    def __init__(self, name: str, steps: List[WorkflowStep], description: str = ""):
+        self.name = name
+        self.description = description
+        self.steps: Dict[str, WorkflowStep] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise WorkflowError(f"Duplicate step '{step.name}' in workflow '{name}'")
+            self.steps[step.name] = step
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Validate dependencies and return a topological ordering (Kahn's algorithm)"""
+        remaining = {}
+        for step in self.steps.values():
+            for dep in step.depends_on:
+                if dep not in self.steps:
+                    raise WorkflowError(f"Step '{step.name}' depends on unknown step '{dep}'")
+            remaining[step.name] = len(step.depends_on)
+
+        dependents: Dict[str, List[str]] = {name: [] for name in self.steps}
+        for step in self.steps.values():
+            for dep in step.depends_on:
+                dependents[dep].append(step.name)
+
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for child in dependents[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.steps):
+            raise WorkflowError(f"Workflow '{self.name}' has a dependency cycle")
+        return order
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "steps": [
+                {
+                    "name": name,
+                    "agent_id": self.steps[name].agent_id,
+                    "task_type": self.steps[name].task_type,
+                    "depends_on": self.steps[name].depends_on
+                }
+                for name in self.order
+            ]
+        }
+
+
+class WorkflowEngine:
+    """Registry and executor for named workflows"""
+
+    def __init__(self, engine: AgentEngine):
+        self.engine = engine
+        self.workflows: Dict[str, Workflow] = {}
+        self._run_ids = itertools.count(1)
+
+    def register(self, workflow: Workflow):
+        self.workflows[workflow.name] = workflow
+        logger.info(f"🔀 Workflow {workflow.name} registered ({len(workflow.steps)} steps)")
+
+    async def run(self, name: str, params: Optional[Dict[str, Any]] = None,
+                  executor: Optional[Any] = None) -> Dict[str, Any]:
+        """Run a registered workflow; independent steps execute concurrently
+
+        params maps step names to extra task data. A step whose dependency failed
+        is skipped. Scheduler AdmissionErrors cancel the run and propagate.
+        executor is anything with execute_task(agent_id, task) - e.g. one site's
+        view of the shard router - and defaults to the engine.
+        """
+        executor = executor or self.engine
+        if name not in self.workflows:
+            raise WorkflowError(f"Workflow {name} not found")
+
+        workflow = self.workflows[name]
+        params = params or {}
+        run_id = next(self._run_ids)
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        started = time.perf_counter()
+        runners: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: WorkflowStep) -> bool:
+            deps_ok = await asyncio.gather(*(runners[dep] for dep in step.depends_on))
+            if not all(deps_ok):
+                results[step.name] = {"error": "skipped: dependency failed"}
+                timings[step.name] = {"status": "skipped"}
+                return False
+
+            step_start = time.perf_counter()
+            task = Task(
+                f"wf_{workflow.name}_{run_id}_{step.name}",
+                step.task_type,
+                step.build_data(params, results)
+            )
+            result = await executor.execute_task(step.agent_id, task)
+            step_end = time.perf_counter()
+
+            ok = "error" not in result
+            results[step.name] = result
+            timings[step.name] = {
+                "status": "completed" if ok else "failed",
+                "started_ms": round((step_start - started) * 1000, 1),
+                "duration_ms": round((step_end - step_start) * 1000, 1)
+            }
+            return ok
+
+        # Create runners in topological order so dependencies exist before dependents
+        for step_name in workflow.order:
+            runners[step_name] = asyncio.create_task(run_step(workflow.steps[step_name]))
+
+        try:
+            outcomes = await asyncio.gather(*runners.values())
+        except BaseException:
+            for runner in runners.values():
+                runner.cancel()
+            raise
+
+        return {
+            "workflow": workflow.name,
+            "run_id": run_id,
+            "success": all(outcomes),
+            "steps": {step_name: results[step_name] for step_name in workflow.order},
+            "timings": {step_name: timings[step_name] for step_name in workflow.order},
+            "total_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
@@ -0,0 +1 @@
+"""Kitchen AI performance benchmarks - run from the backend root with python -m benchmarks.<name>"""
@@ -0,0 +1,114 @@
+"""
+Quality-check micro-batching benchmark
+Concurrent clients send food_analysis checks for a small set of items, the
+way prep stations do. Each request goes either straight to the Quality Agent
+or through the micro-batcher at several max-wait / batch-size settings.
+Reports throughput and latency percentiles per setting.
+
+    python -m benchmarks.batching_bench --clients 64 --requests 512 --waits 2,5,10,20 --sizes 16,64
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agents.adk_base import AgentEngine, Task
+from agents.batching import MicroBatcher
+from agents.quality_agent import QualityAgent
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index] if sorted_values else 0.0
+
+
+async def run_clients(send: Callable[[str], Awaitable[Any]], clients: int, requests: int,
+                      items: int, seed: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def client(worker: int):
+        rng = random.Random(seed + worker)
+        for _ in remaining:
+            start = time.perf_counter()
+            await send(f"item_{rng.randrange(items)}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1)
+    }
+
+
+async def benchmark(args: argparse.Namespace, wait_ms: Optional[float], size: int) -> Dict[str, Any]:
+    engine = AgentEngine()
+    engine.register_agent(QualityAgent(), concurrency=args.concurrency, queue_size=args.requests)
+    batcher = MicroBatcher(lambda _, tasks: engine.execute_batch("heysalad_quality", tasks),
+                           max_batch_size=size, max_wait_ms=wait_ms or 0)
+
+    async def send(item: str):
+        task = Task.create("food_analysis", {"item": item, "source": "manual"})
+        if wait_ms is None:
+            return await engine.execute_task("heysalad_quality", task)
+        return await batcher.submit("default", task, key=(item, "manual"))
+
+    try:
+        report = await run_clients(send, args.clients, args.requests, args.items, args.seed)
+    finally:
+        await batcher.shutdown()
+        await engine.shutdown()
+    report["batching"] = batcher.stats() if wait_ms is not None else None
+    return report
+
+
+def parse_numbers(spec: str) -> List[float]:
+    return [float(value) for value in spec.split(",") if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64, help="concurrent callers")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--items", type=int, default=20, help="distinct items being checked")
+    parser.add_argument("--concurrency", type=int, default=8, help="Quality Agent workers")
+    parser.add_argument("--waits", type=parse_numbers, default=parse_numbers("2,5,10,20"),
+                        help="max_wait_ms settings to try")
+    parser.add_argument("--sizes", type=parse_numbers, default=parse_numbers("16,64"),
+                        help="max_batch_size settings to try")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    runs = [{"setting": "unbatched", **asyncio.run(benchmark(args, None, 1))}]
+    for size in args.sizes:
+        for wait in args.waits:
+            report = asyncio.run(benchmark(args, wait, int(size)))
+            runs.append({"setting": f"wait={wait:g}ms size={int(size)}", **report})
+
+    print(f"🧺 Quality-check batching - {args.clients} clients, {args.requests} requests, {args.items} items")
+    for run in runs:
+        batching = run["batching"]
+        extra = (f"  avg batch {batching['avg_batch_size']:>5.1f}  coalesced {batching['coalesced']:>4}"
+                 if batching else "")
+        print(f"   {run['setting']:<22} {run['requests_per_sec']:>8.1f} req/s  p50 {run['p50_ms']:>7.1f}ms  "
+              f"p95 {run['p95_ms']:>7.1f}ms  p99 {run['p99_ms']:>7.1f}ms{extra}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "quality_batching", "config": vars(args), "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compliance scoring benchmark
+Scores the same synthetic readings through the Quality Agent's scalar path
+and the vectorized bulk path, checks they agree row for row, and reports
+throughput for each.
+
+    python -m benchmarks.compliance_bench --rows 1000000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from agents.compliance import bulk_compliance
+from agents.quality_agent import QualityAgent
+
+
+def synthetic_readings(rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    return {
+        "temperature": np.round(rng.normal(5.5, 2.0, rows), 1),
+        "humidity": np.round(rng.normal(65, 4.0, rows), 1),
+        "cleanliness": rng.integers(80, 100, rows).astype(np.float64)
+    }
+
+
+def scalar_scores(agent: QualityAgent, columns, rows: int):
+    scores = np.empty(rows, dtype=np.int16)
+    temperature_alerts = np.empty(rows, dtype=bool)
+    cleanliness_alerts = np.empty(rows, dtype=bool)
+    temperature = columns["temperature"].tolist()
+    humidity = columns["humidity"].tolist()
+    cleanliness = columns["cleanliness"].tolist()
+    for i in range(rows):
+        agent.current_readings = {
+            "temperature": temperature[i],
+            "humidity": humidity[i],
+            "cleanliness": cleanliness[i],
+            "air_quality": 92
+        }
+        scores[i] = agent._calculate_compliance()
+        alert_types = {alert["type"] for alert in agent._get_quality_alerts()}
+        temperature_alerts[i] = "temperature_alert" in alert_types
+        cleanliness_alerts[i] = "cleanliness_alert" in alert_types
+    return scores, temperature_alerts, cleanliness_alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="readings scored by the bulk path")
+    parser.add_argument("--scalar-rows", type=int, default=200_000,
+                        help="readings scored by the (slow) scalar path and cross-checked")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    agent = QualityAgent()
+    columns = synthetic_readings(args.rows, args.seed)
+
+    start = time.perf_counter()
+    bulk = bulk_compliance(columns["temperature"], columns["humidity"], columns["cleanliness"], agent.standards)
+    bulk_seconds = time.perf_counter() - start
+
+    scalar_rows = min(args.scalar_rows, args.rows)
+    subset = {name: column[:scalar_rows] for name, column in columns.items()}
+    start = time.perf_counter()
+    scores, temperature_alerts, cleanliness_alerts = scalar_scores(agent, subset, scalar_rows)
+    scalar_seconds = time.perf_counter() - start
+
+    matches = (
+        np.array_equal(scores, bulk["scores"][:scalar_rows])
+        and np.array_equal(temperature_alerts, bulk["temperature_alert"][:scalar_rows])
+        and np.array_equal(cleanliness_alerts, bulk["cleanliness_alert"][:scalar_rows])
+    )
+
+    results = {
+        "benchmark": "compliance",
+        "rows": args.rows,
+        "scalar_rows": scalar_rows,
+        "bulk_rows_per_sec": round(args.rows / bulk_seconds),
+        "scalar_rows_per_sec": round(scalar_rows / scalar_seconds),
+        "speedup": round((args.rows / bulk_seconds) / (scalar_rows / scalar_seconds), 1),
+        "scores_match": bool(matches)
+    }
+
+    print("🍅 Compliance scoring benchmark")
+    print(f"   Bulk:   {results['bulk_rows_per_sec']:>12,} rows/s ({args.rows:,} rows)")
+    print(f"   Scalar: {results['scalar_rows_per_sec']:>12,} rows/s ({scalar_rows:,} rows)")
+    print(f"   Speedup: {results['speedup']}x")
+    print(f"   {'✅' if matches else '❌'} Bulk and scalar results {'match' if matches else 'DIFFER'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not matches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
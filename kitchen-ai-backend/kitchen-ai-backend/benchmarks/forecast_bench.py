@@ -0,0 +1,106 @@
+"""
+Demand forecasting benchmark
+Streams multi-year synthetic consumption histories (weekday and meal-period
+seasonality plus noise) for many SKUs through the forecaster, then reports
+ingestion throughput, memory per SKU, forecast latency and accuracy on a
+held-out final four weeks against a seasonal-naive baseline.
+
+    python -m benchmarks.forecast_bench --skus 2000 --years 3
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from agents.forecast import DemandForecaster
+
+# Usage events per day: (hour, share of the day's demand)
+MEALS = ((8, 0.2), (12, 0.4), (16, 0.1), (19, 0.3))
+HOLDOUT_DAYS = 28
+
+
+def synthetic_usage(skus: int, days: int, seed: int) -> np.ndarray:
+    """(skus, days, meals) consumption with weekday seasonality and noise"""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(1, 40, skus)[:, None, None]
+    weekly = rng.uniform(0.6, 1.6, (skus, 7))
+    weekday = weekly[:, (np.arange(days) + 3) % 7][:, :, None]  # day 0 is a Thursday
+    meals = np.array([share for _, share in MEALS])[None, None, :]
+    noise = rng.gamma(20, 1 / 20, (skus, days, len(MEALS)))
+    return base * weekday * meals * noise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=2000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    days = int(args.years * 365)
+    usage = synthetic_usage(args.skus, days, args.seed)
+    forecaster = DemandForecaster(utc_offset_hours=0)
+    skus = [f"sku_{i}" for i in range(args.skus)]
+    start_day = 20454  # 2026-01-01
+    train_days = days - HOLDOUT_DAYS
+
+    def ingest(first_day: int, last_day: int) -> float:
+        started = time.perf_counter()
+        for index, sku in enumerate(skus):
+            rows = usage[index].tolist()
+            for day in range(first_day, last_day):
+                midnight = (start_day + day) * 86400
+                for (hour, _), qty in zip(MEALS, rows[day]):
+                    forecaster.record(sku, qty, midnight + hour * 3600)
+        return time.perf_counter() - started
+
+    train_s = ingest(0, train_days)
+    train_events = args.skus * train_days * len(MEALS)
+
+    # Forecast from the start of the first held-out kitchen day (breakfast)
+    cutoff = (start_day + train_days) * 86400 + 5 * 3600
+    started = time.perf_counter()
+    forecasts = [forecaster.forecast(sku, HOLDOUT_DAYS, now=cutoff) for sku in skus]
+    forecast_s = time.perf_counter() - started
+
+    # Holdout accuracy on daily totals; baseline repeats each SKU's last observed week
+    actual = usage[:, train_days:, :].sum(axis=2)
+    predicted = np.array([[day["expected"] for day in forecast["daily"]] for forecast in forecasts])
+    last_week = usage[:, train_days - 7:train_days, :].sum(axis=2)
+    naive = np.tile(last_week, (1, HOLDOUT_DAYS // 7))
+    mape = float(np.mean(np.abs(predicted - actual) / actual) * 100)
+    naive_mape = float(np.mean(np.abs(naive - actual) / actual) * 100)
+
+    ingest(train_days, days)
+    series = next(iter(forecaster.series.values()))
+    bytes_per_sku = series.history.itemsize * len(series.history) + series.season.itemsize * len(series.season)
+
+    results = {
+        "benchmark": "demand_forecast",
+        "skus": args.skus,
+        "history_days": days,
+        "events": forecaster.events,
+        "ingest_events_per_sec": round(train_events / train_s),
+        "forecast_ms_per_sku": round(forecast_s / args.skus * 1000, 3),
+        "array_bytes_per_sku": bytes_per_sku,
+        "holdout_daily_mape_pct": round(mape, 2),
+        "seasonal_naive_mape_pct": round(naive_mape, 2)
+    }
+
+    print(f"📈 Demand forecast - {args.skus} SKUs x {days} days ({forecaster.events:,} events)")
+    print(f"   ingest              {results['ingest_events_per_sec']:>12,} events/s")
+    print(f"   forecast ({HOLDOUT_DAYS}d)       {results['forecast_ms_per_sku']:>12.3f} ms/SKU")
+    print(f"   storage             {bytes_per_sku:>12,} bytes/SKU")
+    print(f"   holdout MAPE        {results['holdout_daily_mape_pct']:>11.2f}%  "
+          f"(seasonal naive {results['seasonal_naive_mape_pct']:.2f}%)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
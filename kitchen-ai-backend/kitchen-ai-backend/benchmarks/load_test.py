@@ -0,0 +1,247 @@
+"""
+Load test for the Kitchen AI backend
+Drives a mixed workload through the FastAPI app in-process (ASGI transport,
+no network) and/or straight through the AgentEngine. A fixed number of
+concurrent clients each run requests back to back; the report covers latency
+percentiles and throughput per operation.
+
+    python -m benchmarks.load_test --target both --concurrency 32 --requests 500 \\
+        --mix voice=6,quality=3,order=1 --output results.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import random
+import subprocess
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+import main
+from agents.adk_base import Task
+from agents.scheduler import AdmissionError
+
+OPERATIONS = ("voice", "quality", "order")
+
+VOICE_COMMANDS = [
+    "check kitchen inventory status",
+    "what is the current temperature",
+    "analyze food quality from camera",
+    "show supplier information",
+    "monitor quality and safety levels"
+]
+QUALITY_ITEMS = ["cherry_tomatoes", "mozzarella", "lettuce_mix", "basil", "olive_oil"]
+
+# One request: returns whether it succeeded and a status label for the report
+Operation = Callable[[random.Random], Awaitable[Tuple[bool, str]]]
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """'voice=6,quality=3,order=1' -> {operation: weight}"""
+    mix = {}
+    for entry in spec.split(","):
+        name, _, weight = entry.strip().partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (choose from {', '.join(OPERATIONS)})")
+        mix[name] = int(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("Workload mix needs at least one positive weight")
+    return mix
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[rank]
+
+
+def summarize(samples: List[Tuple[str, float, bool, str]], elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput, overall and per operation"""
+    def stats(rows: List[Tuple[str, float, bool, str]]) -> Dict[str, Any]:
+        latencies = sorted(row[1] * 1000 for row in rows)
+        statuses: Dict[str, int] = {}
+        for row in rows:
+            statuses[row[3]] = statuses.get(row[3], 0) + 1
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for row in rows if not row[2]),
+            "requests_per_sec": round(len(rows) / elapsed, 1) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+            "statuses": statuses
+        }
+
+    by_operation: Dict[str, List] = {}
+    for sample in samples:
+        by_operation.setdefault(sample[0], []).append(sample)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        **stats(samples),
+        "operations": {name: stats(rows) for name, rows in sorted(by_operation.items())}
+    }
+
+
+def api_operations(client: httpx.AsyncClient) -> Dict[str, Operation]:
+    """Workload through the HTTP layer: validation, routing, serialization included"""
+    async def call(method: str, url: str, **kwargs) -> Tuple[bool, str]:
+        response = await client.request(method, url, **kwargs)
+        return response.status_code == 200, str(response.status_code)
+
+    async def voice(rng: random.Random):
+        return await call("POST", "/api/voice-command", json={"transcript": rng.choice(VOICE_COMMANDS)})
+
+    async def quality(rng: random.Random):
+        return await call("POST", "/api/quality-check", json={"item_name": rng.choice(QUALITY_ITEMS)})
+
+    async def order(rng: random.Random):
+        return await call("POST", "/api/demo/simulate-order")
+
+    return {"voice": voice, "quality": quality, "order": order}
+
+
+def engine_operations() -> Dict[str, Operation]:
+    """The same workload straight through AgentEngine, skipping HTTP"""
+
+    def outcome(result: Dict[str, Any]) -> Tuple[bool, str]:
+        return ("error" not in result, "ok" if "error" not in result else "error")
+
+    async def guarded(coro: Awaitable[Dict[str, Any]]) -> Tuple[bool, str]:
+        try:
+            return outcome(await coro)
+        except AdmissionError as e:
+            return False, str(e.status_code)
+
+    async def voice(rng: random.Random):
+        transcript = rng.choice(VOICE_COMMANDS)
+        intent = main.get_intent_router().route(transcript)
+        task = Task.create("voice_command", {"transcript": transcript, "intent": intent.to_dict()})
+        return await guarded(main.engine.execute_task(intent.agent_id, task))
+
+    async def quality(rng: random.Random):
+        task = Task.create("food_analysis", {"item": rng.choice(QUALITY_ITEMS), "source": "manual"})
+        return await guarded(main.engine.execute_task("heysalad_quality", task))
+
+    async def order(rng: random.Random):
+        try:
+            run = await main.workflows.run("simulate_order")
+        except AdmissionError as e:
+            return False, str(e.status_code)
+        return run["success"], "ok" if run["success"] else "error"
+
+    return {"voice": voice, "quality": quality, "order": order}
+
+
+async def run_load(operations: Dict[str, Operation], mix: Dict[str, int], concurrency: int,
+                   requests: int, seed: int) -> Dict[str, Any]:
+    """Closed loop: `concurrency` clients share a budget of `requests` calls"""
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    remaining = itertools.count()
+    samples: List[Tuple[str, float, bool, str]] = []
+
+    async def client(worker: int):
+        rng = random.Random(seed * 1000 + worker)
+        while next(remaining) < requests:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok, status = await operations[name](rng)
+            except Exception as e:
+                ok, status = False, type(e).__name__
+            samples.append((name, time.perf_counter() - start, ok, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(concurrency)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    await main.startup_event()
+    if main.warmup_task is not None:
+        await main.warmup_task
+    if args.no_cache:
+        main.engine.cache = None
+    results: Dict[str, Any] = {}
+    try:
+        if args.target in ("api", "both"):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+                operations = api_operations(client)
+                await run_load(operations, args.mix, args.concurrency, args.warmup, args.seed)
+                results["api"] = await run_load(operations, args.mix, args.concurrency, args.requests, args.seed)
+        if args.target in ("engine", "both"):
+            operations = engine_operations()
+            await run_load(operations, args.mix, args.concurrency, args.warmup, args.seed)
+            results["engine"] = await run_load(operations, args.mix, args.concurrency, args.requests, args.seed)
+    finally:
+        await main.shutdown_event()
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("api", "engine", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per target")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests run first")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("voice=6,quality=3,order=1"),
+                        help="operation weights, e.g. voice=6,quality=3,order=1")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-cache", action="store_true", help="disable the result cache")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep per-request application logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    results = {
+        "benchmark": "load_test",
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "seed": args.seed,
+            "cache": not args.no_cache
+        },
+        "results": asyncio.run(benchmark(args))
+    }
+
+    print(f"🍅 Load test @ {results['revision']} - {args.concurrency} clients, mix {args.mix}")
+    for target, report in results["results"].items():
+        print(f"   {target:<7} {report['requests_per_sec']:>8.1f} req/s  "
+              f"p50 {report['p50_ms']:>8.1f}ms  p95 {report['p95_ms']:>8.1f}ms  "
+              f"p99 {report['p99_ms']:>8.1f}ms  errors {report['errors']}")
+        for name, op in report["operations"].items():
+            print(f"     {name:<8} {op['requests']:>6} req  p50 {op['p50_ms']:>8.1f}ms  "
+                  f"p95 {op['p95_ms']:>8.1f}ms  p99 {op['p99_ms']:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
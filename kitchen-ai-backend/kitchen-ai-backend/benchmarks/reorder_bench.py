@@ -0,0 +1,96 @@
+"""
+Reorder planner benchmark
+Plans a synthetic catalogue once, then times stock movements that each
+replan incrementally (only the touched SKU) against replanning every SKU.
+
+    python -m benchmarks.reorder_bench --skus 50000 --movements 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from agents.inventory import InventoryStore
+from agents.reorder import ReorderPlanner
+
+SPECIALTIES = ["vegetables", "meats", "dairy", "bakery", "dry goods"]
+
+
+def synthetic_catalogue(skus: int, suppliers: int, seed: int):
+    rng = random.Random(seed)
+    supplier_table = {
+        f"supplier_{i}": {
+            "rating": round(rng.uniform(3.5, 5.0), 1),
+            "delivery": rng.choice(["1 hour", "2 hours", "4 hours", "next day", "2 days"]),
+            "specialty": SPECIALTIES[i % len(SPECIALTIES)]
+        }
+        for i in range(suppliers)
+    }
+    names = list(supplier_table)
+    items = {
+        f"sku_{i}": {"qty": rng.uniform(0, 100), "unit": "kg", "cost": rng.uniform(0.5, 30),
+                     "supplier": rng.choice(names)}
+        for i in range(skus)
+    }
+    return items, supplier_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=50000)
+    parser.add_argument("--suppliers", type=int, default=50)
+    parser.add_argument("--movements", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    items, suppliers = synthetic_catalogue(args.skus, args.suppliers, args.seed)
+    inventory = InventoryStore(items)
+    planner = ReorderPlanner(inventory, suppliers)
+    rng = random.Random(args.seed)
+    now = time.time() - 7 * 86400
+
+    # A week of consumption history so plans are consumption-based
+    for sku in inventory:
+        planner.record_movement(sku, -rng.uniform(0.1, 5), now)
+
+    start = time.perf_counter()
+    planner.refresh()
+    full_s = time.perf_counter() - start
+
+    skus = list(inventory)
+    start = time.perf_counter()
+    for i in range(args.movements):
+        sku = rng.choice(skus)
+        record = inventory.get(sku)
+        delta = -min(record["qty"], rng.uniform(0.1, 2))
+        inventory.apply_movement(sku, delta)
+        planner.record_movement(sku, delta, now + i)
+        planner.reorders()
+    incremental_s = time.perf_counter() - start
+
+    results = {
+        "benchmark": "reorder_planner",
+        "skus": args.skus,
+        "suppliers": args.suppliers,
+        "movements": args.movements,
+        "full_plan_ms": round(full_s * 1000, 2),
+        "incremental_movement_us": round(incremental_s / args.movements * 1e6, 2),
+        "speedup_vs_full_replan": round(full_s / (incremental_s / args.movements), 1),
+        "due_reorders": len(planner.reorders())
+    }
+
+    print(f"🛒 Reorder planner - {args.skus} SKUs, {args.suppliers} suppliers")
+    print(f"   full plan           {results['full_plan_ms']:>10.1f} ms")
+    print(f"   movement + replan   {results['incremental_movement_us']:>10.1f} µs  "
+          f"({results['speedup_vs_full_replan']}x faster than replanning everything)")
+    print(f"   due reorders        {results['due_reorders']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Replay a recorded request trace
+Sends the requests from one or more KITCHEN_TRACE_FILE recordings with their
+original spacing divided by --speed - open loop, so a slow build falls
+behind instead of slowing the offered load down. Reports throughput,
+latency percentiles per route next to the recorded ones, status codes that
+differ from the recording, and how late requests went out.
+
+Runs against the app in-process (ASGI transport, no network) by default, or
+a running server with --url. In-process replays use the recording's
+simulation seed unless --seed is given.
+
+    python -m benchmarks.replay_trace traces/lunch-*.jsonl --speed 4 --output replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from agents.trace import read_headers, read_trace, request_body
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index] if sorted_values else 0.0
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1)
+    }
+
+
+async def replay(client: httpx.AsyncClient, records: List[Dict[str, Any]], speed: float,
+                 timeout: float) -> Dict[str, Any]:
+    samples: List[Dict[str, Any]] = []
+    skipped = 0
+    origin = records[0]["ts"]
+    start = time.perf_counter()
+
+    async def send(record: Dict[str, Any], lateness: float):
+        headers = {"content-type": record["content_type"]} if "content_type" in record else None
+        sent = time.perf_counter()
+        try:
+            response = await client.request(
+                record["method"], record["path"] + ("?" + record["query"] if record["query"] else ""),
+                content=request_body(record), headers=headers, timeout=timeout
+            )
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        samples.append({
+            "route": f"{record['method']} {record['route']}",
+            "latency_ms": (time.perf_counter() - sent) * 1000,
+            "recorded_ms": record["latency_ms"],
+            "status": status,
+            "recorded_status": record["status"],
+            "late_ms": lateness * 1000
+        })
+
+    pending = []
+    for record in records:
+        if request_body(record) is None:
+            skipped += 1
+            continue
+        due = (record["ts"] - origin) / speed
+        delay = due - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        pending.append(asyncio.create_task(send(record, max(0.0, -delay))))
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - start
+
+    routes: Dict[str, Dict[str, Any]] = {}
+    for route in sorted({sample["route"] for sample in samples}):
+        rows = [sample for sample in samples if sample["route"] == route]
+        routes[route] = {
+            "requests": len(rows),
+            **latency_stats([row["latency_ms"] for row in rows]),
+            "recorded": latency_stats([row["recorded_ms"] for row in rows]),
+            "status_mismatches": sum(row["status"] != row["recorded_status"] for row in rows)
+        }
+    recorded_span = records[-1]["ts"] - origin
+    late = sorted(sample["late_ms"] for sample in samples)
+    return {
+        "requests": len(samples),
+        "skipped": skipped,
+        "elapsed_sec": round(elapsed, 3),
+        "offered_per_sec": round(len(samples) / (recorded_span / speed), 1) if recorded_span else None,
+        "requests_per_sec": round(len(samples) / elapsed, 1) if elapsed else None,
+        **latency_stats([sample["latency_ms"] for sample in samples]),
+        "status_mismatches": sum(route["status_mismatches"] for route in routes.values()),
+        "errors": sum(sample["status"] == 0 or sample["status"] >= 500 for sample in samples),
+        "late_p95_ms": round(percentile(late, 95), 1),
+        "late_max_ms": round(late[-1], 1) if late else 0.0,
+        "routes": routes
+    }
+
+
+async def replay_in_process(records: List[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so KITCHEN_SEED / KITCHEN_SERVICE_TIMES are set first
+    import main
+    await main.startup_event()
+    if main.warmup_task is not None:
+        await main.warmup_task
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            return await replay(client, records, args.speed, args.timeout)
+    finally:
+        await main.shutdown_event()
+
+
+async def replay_remote(records: List[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        return await replay(client, records, args.speed, args.timeout)
+
+
+def recorded_seed(headers: List[Dict[str, Any]]) -> Optional[int]:
+    for header in headers:
+        seed = header.get("simulation", {}).get("seed")
+        if seed is not None:
+            return seed
+    return None
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="trace files written with KITCHEN_TRACE_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay N times faster than recorded")
+    parser.add_argument("--url", help="replay against a running server instead of in-process")
+    parser.add_argument("--seed", type=int, help="simulation seed for in-process replays")
+    parser.add_argument("--service-times", help="KITCHEN_SERVICE_TIMES for in-process replays")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    records = list(read_trace(args.traces))[:args.limit]
+    if not records:
+        parser.error("no requests in the trace")
+    headers = read_headers(args.traces)
+
+    seed = args.seed if args.seed is not None else recorded_seed(headers)
+    if not args.url:
+        logging.disable(logging.INFO)
+        os.environ.pop("KITCHEN_TRACE_FILE", None)  # don't record the replay
+        if seed is not None:
+            os.environ["KITCHEN_SEED"] = str(seed)
+        if args.service_times is not None:
+            os.environ["KITCHEN_SERVICE_TIMES"] = args.service_times
+        report = asyncio.run(replay_in_process(records, args))
+    else:
+        report = asyncio.run(replay_remote(records, args))
+
+    target = args.url or "in-process"
+    print(f"📼 Replayed {report['requests']} requests at {args.speed:g}x against {target}"
+          + (f" (seed {seed})" if seed is not None and not args.url else ""))
+    print(f"   offered {report['offered_per_sec']} req/s, served {report['requests_per_sec']} req/s "
+          f"in {report['elapsed_sec']}s")
+    print(f"   p50 {report['p50_ms']}ms  p95 {report['p95_ms']}ms  p99 {report['p99_ms']}ms  "
+          f"late p95 {report['late_p95_ms']}ms  max {report['late_max_ms']}ms")
+    if report["status_mismatches"] or report["errors"] or report["skipped"]:
+        print(f"   ⚠️ {report['status_mismatches']} status mismatches, {report['errors']} errors, "
+              f"{report['skipped']} skipped (body too large to record)")
+    for route, stats in report["routes"].items():
+        print(f"   {route:<42} {stats['requests']:>6}  p50 {stats['p50_ms']:>7.1f}ms  "
+              f"p95 {stats['p95_ms']:>7.1f}ms  (recorded p95 {stats['recorded']['p95_ms']:.1f}ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "replay_trace", "config": vars(args), "seed": seed, **report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,123 @@
+"""
+Hedging and circuit breaker benchmark
+Concurrent clients send voice commands to a Quality Agent whose processing
+time follows a heavy-tailed lognormal model (see agents/simulation.py), once
+without hedging and once with it, and compare tail latency against the extra
+work hedges add. Then the agent hangs, and clients run into the task
+deadline with the circuit breaker disabled and enabled: an open breaker
+turns each wait for the deadline into an immediate 503.
+
+    python -m benchmarks.resilience_bench --clients 16 --requests 800 --service-time lognormal:0.05,1.0
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+from agents import simulation
+from agents.adk_base import AgentEngine, Task
+from agents.quality_agent import QualityAgent
+from agents.resilience import CircuitOpenError
+from agents.simulation import ServiceTimeModel
+
+COMMAND = {"transcript": "what is the current temperature"}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index] if sorted_values else 0.0
+
+
+async def run_clients(engine: AgentEngine, clients: int, requests: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    outcomes = {"ok": 0, "timed_out": 0, "shed": 0}
+    remaining = iter(range(requests))
+
+    async def client():
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                result = await engine.execute_task("heysalad_quality", Task.create("voice_command", COMMAND))
+                outcomes["timed_out" if result.get("timed_out") else "ok"] += 1
+            except CircuitOpenError:
+                outcomes["shed"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        **outcomes
+    }
+
+
+async def benchmark(args: argparse.Namespace, service_time: ServiceTimeModel, hedge_after: float,
+                    breaker: bool, requests: int) -> Dict[str, Any]:
+    simulation.configure(args.seed, {"heysalad_quality": service_time})
+    engine = AgentEngine(
+        default_deadline=args.deadline,
+        # min_calls above the request count keeps the breaker from ever tripping
+        breaker={"min_calls": 10 if breaker else requests + 1, "cooldown_seconds": args.deadline * 4},
+        hedging=hedge_after > 0
+    )
+    agent = QualityAgent()
+    agent.hedged_tasks = {"voice_command": hedge_after}
+    engine.register_agent(agent, concurrency=args.concurrency, queue_size=args.requests)
+    try:
+        report = await run_clients(engine, args.clients, requests)
+    finally:
+        await engine.shutdown()
+    guard = engine.get_agent_status()[agent.agent_id]
+    report.update(hedged=guard["hedged"], hedge_wins=guard["hedge_wins"], trips=guard["breaker"]["trips"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent callers")
+    parser.add_argument("--requests", type=int, default=800)
+    parser.add_argument("--concurrency", type=int, default=32, help="Quality Agent workers")
+    parser.add_argument("--service-time", type=ServiceTimeModel.parse,
+                        default=ServiceTimeModel.parse("lognormal:0.05,1.0"),
+                        help="processing time model for the hedging runs")
+    parser.add_argument("--hedge-after", type=float, default=0.15, help="seconds before the second attempt")
+    parser.add_argument("--deadline", type=float, default=1.0, help="task deadline in seconds")
+    parser.add_argument("--outage-requests", type=int, default=200, help="requests sent while the agent hangs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    hang = ServiceTimeModel("fixed", args.deadline * 100)
+    runs = [
+        {"setting": "no hedging", **asyncio.run(benchmark(args, args.service_time, 0, True, args.requests))},
+        {"setting": f"hedge after {args.hedge_after * 1000:g}ms",
+         **asyncio.run(benchmark(args, args.service_time, args.hedge_after, True, args.requests))},
+        {"setting": "outage, no breaker", **asyncio.run(benchmark(args, hang, 0, False, args.outage_requests))},
+        {"setting": "outage, breaker", **asyncio.run(benchmark(args, hang, 0, True, args.outage_requests))}
+    ]
+
+    print(f"🛡️ Agent resilience - {args.clients} clients, service time {args.service_time}, "
+          f"deadline {args.deadline:g}s")
+    for run in runs:
+        print(f"   {run['setting']:<20} {run['requests_per_sec']:>8.1f} req/s  p50 {run['p50_ms']:>7.1f}ms  "
+              f"p99 {run['p99_ms']:>7.1f}ms  ok {run['ok']:>4}  timed out {run['timed_out']:>4}  "
+              f"shed {run['shed']:>4}  hedged {run['hedged']:>4}  trips {run['trips']}")
+
+    if args.output:
+        config = {**vars(args), "service_time": str(args.service_time)}
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "resilience", "config": config, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Startup benchmark
+Measures cold start in fresh interpreter processes, the way an autoscaled pod
+starts: time to import the app, run its startup handlers, and serve the first
+request (a reorder plan, which loads and builds the sourcing agent). Agents
+simulate processing time, so the first request's cold-start overhead is
+reported against a second, identical request (result cache off). Modes:
+- lazy: no warm-up (KITCHEN_WARMUP=0) - the first request loads the agents
+- warm: the first request waits for the background warm-up to finish
+Also lists the modules that are most expensive to import (python -X importtime).
+
+    python -m benchmarks.startup_bench --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+MODES = ("lazy", "warm")
+
+# Runs in the child process; prints one JSON line of timings in milliseconds
+CHILD = r"""
+import asyncio, json, logging, os, time
+import httpx
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+logging.disable(logging.INFO)
+main.engine.cache = None
+
+async def run():
+    await main.startup_event()
+    ready = time.perf_counter()
+    warmed = ready
+    if os.environ["BENCH_MODE"] == "warm" and main.warmup_task is not None:
+        await main.warmup_task
+        warmed = time.perf_counter()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+        request_started = time.perf_counter()
+        response = await client.get("/api/inventory/reorder-plan")
+        done = time.perf_counter()
+        assert response.status_code == 200, response.text
+        await client.get("/api/inventory/reorder-plan")
+        steady = time.perf_counter() - done
+    await main.shutdown_event()
+    return ready, warmed, request_started, done, steady
+
+ready, warmed, request_started, done, steady = asyncio.run(run())
+ms = lambda seconds: round(seconds * 1000, 2)
+print(json.dumps({
+    "import_ms": ms(imported - started),
+    "startup_ms": ms(ready - imported),
+    "warmup_ms": ms(warmed - ready),
+    "first_request_ms": ms(done - request_started),
+    "cold_overhead_ms": ms(done - request_started - steady),
+    "total_ms": ms(done - started)
+}))
+"""
+
+
+def run_child(mode: str, cwd: str) -> Dict[str, float]:
+    env = {**os.environ, "BENCH_MODE": mode, "KITCHEN_WARMUP": "0" if mode == "lazy" else "1"}
+    env.pop("KITCHEN_SHARDS", None)
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(cwd: str, top: int) -> List[Dict[str, Any]]:
+    """Top-level packages by cumulative import time when importing main"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=cwd,
+                            capture_output=True, text=True, check=True)
+    packages: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        # Only modules main imports directly - nested ones are already in their parent's time
+        if name.startswith("   ") and not name.startswith("     "):
+            packages[name.strip()] = packages.get(name.strip(), 0) + int(cumulative)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": module, "cumulative_ms": round(us / 1000, 2)} for module, us in ranked]
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    return {key: round(statistics.median(run[key] for run in runs), 2) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode (medians reported)")
+    parser.add_argument("--top", type=int, default=10, help="modules listed in the import profile")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results: Dict[str, Any] = {"benchmark": "startup", "runs": args.runs, "modes": {}}
+    for mode in MODES:
+        results["modes"][mode] = summarize([run_child(mode, cwd) for _ in range(args.runs)])
+    results["import_profile"] = import_profile(cwd, args.top)
+
+    print(f"🚀 Startup - median of {args.runs} fresh processes")
+    for mode, report in results["modes"].items():
+        print(f"   {mode:<5} import {report['import_ms']:>7.1f}ms  startup {report['startup_ms']:>6.1f}ms  "
+              f"warm-up {report['warmup_ms']:>6.1f}ms  first request {report['first_request_ms']:>7.1f}ms "
+              f"(+{report['cold_overhead_ms']:.1f}ms cold)  total {report['total_ms']:>7.1f}ms")
+    print("   slowest imports:")
+    for entry in results["import_profile"]:
+        print(f"     {entry['module']:<32} {entry['cumulative_ms']:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Materialized view benchmark
+Fills a site's data bus with a synthetic catalogue of stock entries and
+quality verdicts, then applies a stream of stock and verdict changes with
+reads mixed in. Each read of "items low in stock that also failed quality"
+is served from the attention_items view; as a baseline the same answer is
+recomputed from the full topic tables, the way merging per-agent results
+per request would. Reports the cost per change and per read for each way.
+
+    python -m benchmarks.view_bench --skus 20000 --changes 50000 --read-every 10
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from agents.databus import INVENTORY, VERDICTS, site_data_bus
+
+
+def stock_entry(rng: random.Random) -> Dict[str, Any]:
+    qty = round(rng.uniform(0, 60), 1)
+    return {"qty": qty, "unit": "kg", "supplier": f"supplier_{rng.randrange(20)}",
+            "value": round(qty * 4.0, 2), "reorder_point": 20.0, "low": qty <= 20}
+
+
+def verdict(rng: random.Random) -> Dict[str, Any]:
+    score = rng.randint(70, 98)
+    return {"recommendation": "approved" if score > 85 else "rejected", "overall_score": score,
+            "source": "manual", "checked_at": time.time()}
+
+
+def recompute(bus) -> List[str]:
+    """Join the topic tables from scratch"""
+    stock, verdicts = bus.table(INVENTORY), bus.table(VERDICTS)
+    return sorted(sku for sku, entry in stock.items()
+                  if entry["low"] and verdicts.get(sku, {}).get("recommendation") == "rejected")
+
+
+def run(args: argparse.Namespace, materialized: bool) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    bus = site_data_bus("bench")
+    skus = [f"sku_{i}" for i in range(args.skus)]
+    bus.publish_many(INVENTORY, {sku: stock_entry(rng) for sku in skus})
+    bus.publish_many(VERDICTS, {sku: verdict(rng) for sku in skus})
+
+    write_seconds = read_seconds = 0.0
+    reads = 0
+    answer: List[str] = []
+    for change in range(args.changes):
+        sku = rng.choice(skus)
+        start = time.perf_counter()
+        if change % 2:
+            bus.publish(INVENTORY, sku, stock_entry(rng))
+        else:
+            bus.publish(VERDICTS, sku, verdict(rng))
+        write_seconds += time.perf_counter() - start
+
+        if change % args.read_every == 0:
+            start = time.perf_counter()
+            if materialized:
+                answer = bus.snapshot("attention_items")["data"]
+            else:
+                answer = recompute(bus)
+            read_seconds += time.perf_counter() - start
+            reads += 1
+
+    final = sorted(item["item"] for item in bus.snapshot("attention_items")["data"])
+    assert final == recompute(bus), "view disagrees with a full recompute"
+    return {
+        "write_us": round(write_seconds / args.changes * 1e6, 2),
+        "read_us": round(read_seconds / reads * 1e6, 2),
+        "total_ms": round((write_seconds + read_seconds) * 1000, 1),
+        "attention_items": len(answer)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=20000)
+    parser.add_argument("--changes", type=int, default=50000)
+    parser.add_argument("--read-every", type=int, default=10, help="changes between reads")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = {"materialized": run(args, True), "recompute": run(args, False)}
+
+    print(f"🧾 attention_items view - {args.skus} SKUs, {args.changes} changes, a read every {args.read_every}")
+    for name, result in runs.items():
+        print(f"   {name:<13} write {result['write_us']:>8.2f}us  read {result['read_us']:>10.2f}us  "
+              f"total {result['total_ms']:>9.1f}ms  ({result['attention_items']} items)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "materialized_views", "config": vars(args), "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
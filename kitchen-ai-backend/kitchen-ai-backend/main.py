@@ -5,19 +5,35 @@ Simple ADK-based FastAPI application for hackathon demo
 
 import asyncio
 import logging
+import math
+import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Form, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-import uvicorn
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 
 # Import our HeySalad agents
-from agents.adk_base import AgentEngine, Task
-from agents.sourcing_agent import SourcingAgent
-from agents.quality_agent import QualityAgent
+from agents.adk_base import Agent, AgentEngine, Task, DEFAULT_SITE, site_agent_id, stream_grouped
+from agents.alerts import AlertBus, Subscription
+from agents.batching import MicroBatcher
+from agents.cache import ResultCache
+from agents.databus import DEFAULT_VIEWS
+from agents.encoding import PayloadCache, dumps
+from agents.intents import IntentRouter
+from agents.jobs import JobManager
+from agents.metrics import MetricsRegistry
+from agents.registry import default_registry
+from agents.resilience import resilience_settings
+from agents.scheduler import AdmissionError
+from agents.simulation import get_simulation
+from agents.sharding import (LocalShard, RemoteShard, ShardRouter, SITE_ID_PATTERN, parse_shard_spec, site_settings,
+                             validate_site_id)
+from agents.trace import TraceMiddleware, TraceRecorder
+from agents.vision import DEFAULT_ANALYZER, ImageAnalysisPool
+from agents.workflow import Workflow, WorkflowEngine, WorkflowError, WorkflowStep
 
 # Set up logging
 logging.basicConfig(
@@ -27,11 +43,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson - endpoints that return it directly
+    also skip FastAPI's jsonable_encoder pass over the result"""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class PreEncodedResponse(Response):
+    """Body that is already JSON bytes (from the payload cache)"""
+    media_type = "application/json"
+
 # Initialize FastAPI with HeySalad branding
 app = FastAPI(
     title="🍅 Kitchen AI - HeySalad B2B",
     description="Multi-Agent Kitchen Management System powered by Agent Development Kit",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS for frontend (when we add it later)
@@ -43,41 +70,281 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# KITCHEN_TRACE_FILE records every request for replay (benchmarks/replay_trace.py)
+trace_recorder: Optional[TraceRecorder] = None
+if os.getenv("KITCHEN_TRACE_FILE"):
+    trace_recorder = TraceRecorder(os.environ["KITCHEN_TRACE_FILE"],
+                                   metadata={"simulation": get_simulation().describe()})
+    app.add_middleware(TraceMiddleware, recorder=trace_recorder)
+
 # Global agent engine and agents
-engine = AgentEngine()
+metrics = MetricsRegistry()
+engine = AgentEngine(cache=ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("RESULT_CACHE_BYTES", str(16 * 1024 * 1024)))
+), metrics=metrics, **resilience_settings())
 agents_initialized = False
+warmup_task: Optional[asyncio.Task] = None
+
+# Pre-encoded bodies for static and slowly changing payloads, keyed by data version
+payloads = PayloadCache()
+
+# Alert fan-out for kitchen displays - each subscriber buffers at most ALERT_BUFFER events
+alert_bus = AlertBus(buffer=int(os.getenv("ALERT_BUFFER", "256")))
+ALERT_KEEPALIVE_SECONDS = 15
+
+workflows = WorkflowEngine(engine)
+
+# Order workflow - inventory and quality monitoring are independent, so the
+# three steps run concurrently instead of back to back
+workflows.register(Workflow(
+    "simulate_order",
+    [
+        WorkflowStep("inventory_check", "heysalad_sourcing", "inventory_check"),
+        WorkflowStep("quality_monitoring", "heysalad_quality", "quality_check"),
+        WorkflowStep("food_analysis", "heysalad_quality", "food_analysis",
+                     {"item": "fresh_salad_bowl", "source": "kitchen"})
+    ],
+    description="Check inventory, monitor kitchen conditions and analyse the dish"
+))
+
+# Views every site's data bus maintains (see agents/databus.py)
+VIEW_NAMES = [view.name for view in DEFAULT_VIEWS]
+
+# Per-agent worker pool limits - tasks beyond concurrency + queue_size get a 429
+AGENT_LIMITS = {
+    "heysalad_sourcing": {
+        "concurrency": int(os.getenv("SOURCING_CONCURRENCY", "8")),
+        "queue_size": int(os.getenv("SOURCING_QUEUE_SIZE", "200"))
+    },
+    "heysalad_quality": {
+        "concurrency": int(os.getenv("QUALITY_CONCURRENCY", "8")),
+        "queue_size": int(os.getenv("QUALITY_QUEUE_SIZE", "200"))
+    }
+}
+
+# Agents every site gets. Their modules are imported on first use (or by the
+# background warm-up) and instances are constructed per site on first request
+agent_registry = default_registry()
+
+def build_shard_router() -> ShardRouter:
+    """KITCHEN_SHARDS="s0=host:port,..." routes sites to shard server processes;
+    otherwise every site is served by agents in this process"""
+    spec = os.getenv("KITCHEN_SHARDS", "")
+    if spec:
+        return ShardRouter([RemoteShard(name, address) for name, address in parse_shard_spec(spec)])
+    return ShardRouter([LocalShard("local", engine, agent_registry.factories(), AGENT_LIMITS,
+                                   data_dir=os.getenv("KITCHEN_DATA_DIR"), alert_bus=alert_bus,
+                                   **site_settings())])
+
+shards = build_shard_router()
+
+# Background jobs for long-running tasks: submit, poll, cancel. Finished results
+# are kept for JOB_RESULT_TTL seconds, at most JOB_MAX_RESULTS of them
+jobs = JobManager(
+    shards.execute,
+    max_active=int(os.getenv("JOB_MAX_ACTIVE", "1000")),
+    max_finished=int(os.getenv("JOB_MAX_RESULTS", "10000")),
+    result_ttl=float(os.getenv("JOB_RESULT_TTL", "300")),
+    default_timeout=float(os.getenv("JOB_TIMEOUT", "60"))
+)
+
+_intent_router: Optional[IntentRouter] = None
+
+def get_intent_router() -> IntentRouter:
+    """One precompiled router over every agent's voice vocabulary, built on first
+    use since it needs the agent classes; sourcing is registered first so it
+    wins ties, and is the default for unmatched commands"""
+    global _intent_router
+    if _intent_router is None:
+        router = IntentRouter(default_agent="heysalad_sourcing")
+        for agent_id, agent_class in agent_registry.classes().items():
+            router.register_agent(agent_id, agent_class.intents, agent_class.intent_slots)
+        _intent_router = router
+    return _intent_router
+
+# Quality checks arriving within QUALITY_BATCH_WAIT_MS of each other run as one
+# agent batch (identical checks share a result); QUALITY_BATCH_WAIT_MS=0 turns this off
+QUALITY_BATCH_WAIT_MS = float(os.getenv("QUALITY_BATCH_WAIT_MS", "10"))
+quality_batcher = MicroBatcher(
+    lambda site_id, tasks: shards.execute_batch(site_id, "heysalad_quality", tasks),
+    max_batch_size=int(os.getenv("QUALITY_BATCH_SIZE", "32")),
+    max_wait_ms=QUALITY_BATCH_WAIT_MS
+)
+
+# Camera frames are decoded and scored on worker processes, off the event loop
+image_analysis = ImageAnalysisPool(
+    workers=int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    analyzer=os.getenv("IMAGE_ANALYZER", DEFAULT_ANALYZER)
+)
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+MAX_IMAGE_FRAMES = int(os.getenv("MAX_IMAGE_FRAMES", "16"))
 
 # Request models
 class VoiceCommandRequest(BaseModel):
     transcript: str
     agent_id: Optional[str] = None
+    site_id: str = DEFAULT_SITE
 
 class QualityCheckRequest(BaseModel):
     item_name: str
     source: str = "manual"
+    site_id: str = DEFAULT_SITE
+
+class StockMovement(BaseModel):
+    item: str
+    delta: float
+    reason: str = "adjustment"
+
+class StockMovementRequest(BaseModel):
+    movements: List[StockMovement]
+    site_id: str = DEFAULT_SITE
+
+MAX_STOCK_MOVEMENTS = int(os.getenv("MAX_STOCK_MOVEMENTS", "1000"))
+
+class SupplierUpdateRequest(BaseModel):
+    rating: Optional[float] = Field(None, ge=0, le=5)
+    delivery: Optional[str] = None
+    specialty: Optional[str] = None
+    site_id: str = DEFAULT_SITE
+
+class SensorReading(BaseModel):
+    metric: str
+    value: float
+    sensor_id: Optional[str] = None
+    timestamp: Optional[float] = None
+
+class SensorReadingsRequest(BaseModel):
+    readings: List[SensorReading]
+    site_id: str = DEFAULT_SITE
+
+MAX_SENSOR_BATCH = int(os.getenv("MAX_SENSOR_BATCH", "5000"))
+
+class BulkComplianceRequest(BaseModel):
+    temperature: List[float]
+    humidity: List[float]
+    cleanliness: List[float]
+    include_rows: bool = False
+    site_id: str = DEFAULT_SITE
+
+MAX_COMPLIANCE_ROWS = int(os.getenv("MAX_COMPLIANCE_ROWS", "100000"))
+
+class WorkflowRunRequest(BaseModel):
+    params: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    site_id: str = DEFAULT_SITE
+
+class BatchTaskItem(BaseModel):
+    agent_id: str
+    type: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchTaskRequest(BaseModel):
+    tasks: List[BatchTaskItem]
+    site_id: str = DEFAULT_SITE
+
+MAX_BATCH_TASKS = int(os.getenv("MAX_BATCH_TASKS", "500"))
+
+class JobRequest(BaseModel):
+    agent_id: str
+    type: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+    timeout: Optional[float] = Field(None, gt=0)
+    site_id: str = DEFAULT_SITE
 
 # ===========================================
 # STARTUP - Initialize HeySalad Agents
 # ===========================================
 
+async def warm_up_agents():
+    """Import agent modules, build the intent router and the default site's
+    agents in the background, so the first request doesn't pay for them"""
+    try:
+        await agent_registry.warm_up()
+        await asyncio.to_thread(get_intent_router)
+        local = shards.shards.get("local")
+        if local is not None:
+            local.ensure_site(DEFAULT_SITE)
+        logger.info(f"📊 Agents initialized: {list(engine.agents.keys())}")
+    except Exception as e:
+        # Not fatal - agents load on first use instead, and report the error then
+        logger.error(f"❌ Agent warm-up failed: {e}")
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize HeySalad Kitchen AI agents"""
-    global agents_initialized
+    """Start serving right away; agents are constructed on first use, and
+    warmed up in the background unless KITCHEN_WARMUP=0"""
+    global agents_initialized, warmup_task
     
     logger.info("🚀 Starting HeySalad Kitchen AI Backend...")
     
-    # Initialize agents
-    sourcing_agent = SourcingAgent()
-    quality_agent = QualityAgent()
-    
-    # Register with engine
-    engine.register_agent(sourcing_agent)
-    engine.register_agent(quality_agent)
+    if os.getenv("KITCHEN_WARMUP", "1") != "0":
+        warmup_task = asyncio.create_task(warm_up_agents())
     
     agents_initialized = True
     logger.info("✅ HeySalad Kitchen AI Backend ready!")
-    logger.info(f"📊 Agents initialized: {list(engine.agents.keys())}")
+    logger.info(f"🧩 Shards: {shards.ring.nodes}")
+    if get_simulation().seed is not None:
+        logger.info(f"🎲 Deterministic simulation, seed {get_simulation().seed}")
+    if trace_recorder is not None:
+        logger.info(f"📼 Recording requests to {trace_recorder.path}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cancel outstanding jobs, drain local agent worker pools and close shard connections"""
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await jobs.shutdown()
+    await quality_batcher.shutdown()
+    await shards.close()
+    await asyncio.to_thread(image_analysis.shutdown)
+    if trace_recorder is not None:
+        trace_recorder.close()
+
+def backpressure_error(e: AdmissionError) -> HTTPException:
+    """429 when an agent queue is full, 503 when the agent is unavailable"""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def local_agent(agent_id: str, site_id: str) -> Optional[Agent]:
+    """The site's agent instance when its shard runs in this process, else None"""
+    try:
+        shard = shards.shard_for(site_id)
+        if not isinstance(shard, LocalShard):
+            return None
+        shard.ensure_site(site_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return shard.engine.agents.get(site_agent_id(agent_id, site_id))
+
+async def run_task(agent_id: str, task: Task, site_id: str = DEFAULT_SITE) -> Dict[str, Any]:
+    """Execute a task on the site's shard, turning backpressure into 429/503
+    responses and a missed deadline into a 504"""
+    try:
+        result = await shards.execute(site_id, agent_id, task)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionError as e:
+        logger.warning(f"⏳ Rejected {task.type} for {agent_id}: {e}")
+        raise backpressure_error(e)
+    if result.get("timed_out"):
+        raise HTTPException(status_code=504, detail=result["error"])
+    return result
+
+async def run_batched(batcher: MicroBatcher, task: Task, site_id: str, key: Any = None) -> Dict[str, Any]:
+    """Like run_task, but through a micro-batcher for the site"""
+    try:
+        result = await batcher.submit(validate_site_id(site_id), task, key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionError as e:
+        logger.warning(f"⏳ Rejected batched {task.type}: {e}")
+        raise backpressure_error(e)
+    if result.get("timed_out"):
+        raise HTTPException(status_code=504, detail=result["error"])
+    return result
 
 # ===========================================
 # API ENDPOINTS
@@ -86,14 +353,14 @@ async def startup_event():
 @app.get("/")
 async def root():
     """Health check with HeySalad branding"""
-    return {
+    return PreEncodedResponse(payloads.get("root", agents_initialized, lambda: {
         "message": "🍅 Kitchen AI Backend is running!",
         "brand": "HeySalad B2B Kitchen Management",
         "version": "1.0.0",
-        "agents": list(engine.agents.keys()) if agents_initialized else [],
+        "agents": agent_registry.ids if agents_initialized else [],
         "status": "operational" if agents_initialized else "initializing",
         "hackathon": "Agent Development Kit Hackathon with Google Cloud"
-    }
+    }))
 
 @app.get("/api/status")
 async def get_system_status():
@@ -103,13 +370,30 @@ async def get_system_status():
     
     agent_status = engine.get_agent_status()
     
-    return {
+    return FastJSONResponse({
         "status": "operational",
         "timestamp": datetime.now().isoformat(),
         "total_agents": len(engine.agents),
         "agents": agent_status,
+        "shards": await shards.status(),
+        "cache": engine.cache.stats(),
+        "alerts": alert_bus.stats(),
+        "payloads": payloads.stats(),
+        "jobs": jobs.stats(),
+        "quality_batching": quality_batcher.stats(),
+        "image_analysis": image_analysis.stats(),
+        "simulation": {**get_simulation().describe(),
+                       "trace": trace_recorder.stats() if trace_recorder is not None else None},
+        "registry": {**agent_registry.stats(),
+                     "warming_up": warmup_task is not None and not warmup_task.done()},
+        "active_tasks": len(engine.active_tasks),
         "heysalad_branding": "Powered by HeySalad B2B Technology"
-    }
+    })
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text-format metrics for this process's agents"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/api/voice-command")
 async def process_voice_command(request: VoiceCommandRequest):
@@ -123,34 +407,34 @@ async def process_voice_command(request: VoiceCommandRequest):
         
         logger.info(f"🎤 Processing voice command: {transcript}")
         
-        # Route to specific agent or determine best agent
-        if agent_id and agent_id in engine.agents:
-            target_agent = agent_id
+        # Route to specific agent or determine best agent - one tokenization,
+        # and the agent receives the resolved intent instead of re-scanning
+        intent_router = get_intent_router()
+        if agent_id and agent_id in agent_registry:
+            intent = intent_router.route(transcript, agent_id=agent_id)
         else:
-            # Simple routing logic
-            if any(word in transcript.lower() for word in ["inventory", "stock", "supplier"]):
-                target_agent = "heysalad_sourcing"
-            elif any(word in transcript.lower() for word in ["quality", "safety", "temperature", "analyze"]):
-                target_agent = "heysalad_quality"
-            else:
-                target_agent = "heysalad_sourcing"  # Default
+            intent = intent_router.route(transcript)
+        target_agent = intent.agent_id
         
         # Execute task
-        task = Task(
-            task_id=f"voice_{datetime.now().timestamp()}",
-            task_type="voice_command",
-            data={"transcript": transcript}
+        task = Task.create(
+            "voice_command",
+            data={"transcript": transcript, "intent": intent.to_dict()}
         )
         
-        result = await engine.execute_task(target_agent, task)
+        result = await run_task(target_agent, task, request.site_id)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "transcript": transcript,
             "agent_used": target_agent,
+            "intent": intent.name,
+            "slots": intent.slots,
             "result": result
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Voice command failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -162,48 +446,454 @@ async def process_quality_check(request: QualityCheckRequest):
         raise HTTPException(status_code=503, detail="Agents not initialized")
     
     try:
-        task = Task(
-            task_id=f"quality_{datetime.now().timestamp()}",
-            task_type="food_analysis",
+        task = Task.create(
+            "food_analysis",
             data={
                 "item": request.item_name,
                 "source": request.source
             }
         )
         
-        result = await engine.execute_task("heysalad_quality", task)
+        if QUALITY_BATCH_WAIT_MS > 0:
+            result = await run_batched(quality_batcher, task, request.site_id,
+                                       key=(request.item_name, request.source))
+        else:
+            result = await run_task("heysalad_quality", task, request.site_id)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "item": request.item_name,
             "result": result
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Quality check failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/quality/analyze-image")
+async def analyze_food_images(files: List[UploadFile] = File(...), item_name: str = Form("camera_capture"),
+                              site_id: str = Form(DEFAULT_SITE)):
+    """Score uploaded camera frames of a dish or delivery and return one verdict"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    if not image_analysis.available:
+        raise HTTPException(status_code=503, detail="Image analysis is not installed (needs Pillow and NumPy)")
+    if len(files) > MAX_IMAGE_FRAMES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMAGE_FRAMES} images per request")
+    
+    frames = []
+    for upload in files:
+        frame = await upload.read(MAX_IMAGE_BYTES + 1)
+        if len(frame) > MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds {MAX_IMAGE_BYTES} bytes")
+        if not frame:
+            raise HTTPException(status_code=400, detail=f"{upload.filename} is empty")
+        frames.append(frame)
+    
+    try:
+        analyses = await image_analysis.analyze(frames)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    for upload, analysis in zip(files, analyses):
+        analysis["filename"] = upload.filename
+    
+    task = Task.create(
+        "food_analysis",
+        data={"item": item_name, "source": "camera", "image_analyses": analyses}
+    )
+    result = await run_task("heysalad_quality", task, site_id)
+    if "error" in result:
+        raise HTTPException(status_code=422, detail=result)
+    
+    logger.info(f"📷 Analyzed {len(frames)} image(s) of {item_name}: {result['overall_score']}")
+    return FastJSONResponse({"success": True, "item": item_name, "result": result})
+
+@app.post("/api/tasks/batch")
+async def process_task_batch(request: BatchTaskRequest):
+    """Run many tasks in one request, streaming NDJSON results in submission order"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    if len(request.tasks) > MAX_BATCH_TASKS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_TASKS} tasks")
+    
+    items = [
+        (item.agent_id, Task.create(item.type, item.data))
+        for item in request.tasks
+    ]
+    logger.info(f"📦 Processing batch of {len(items)} tasks")
+    
+    try:
+        site = shards.site(request.site_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def results():
+        async for index, agent_id, result in stream_grouped(items, site.execute_batch):
+            yield dumps({
+                "index": index,
+                "agent_id": agent_id,
+                "task_type": items[index][1].type,
+                "success": "error" not in result,
+                "result": result
+            }) + b"\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/api/inventory/movements")
+async def record_stock_movements(request: StockMovementRequest):
+    """Apply deliveries (positive delta) and consumption (negative delta)"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    if len(request.movements) > MAX_STOCK_MOVEMENTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_STOCK_MOVEMENTS} movements per request")
+    # JSON parsing lets NaN and Infinity through as floats; one would corrupt the store's totals
+    for index, movement in enumerate(request.movements):
+        if not math.isfinite(movement.delta):
+            raise HTTPException(status_code=400, detail=f"Movement {index} has a non-finite delta")
+    
+    task = Task.create(
+        "stock_movement",
+        data={"movements": [movement.model_dump() for movement in request.movements]}
+    )
+    result = await run_task("heysalad_sourcing", task, request.site_id)
+    return {"success": "error" not in result, "result": result}
+
+@app.get("/api/inventory/low-stock")
+async def get_low_stock(site_id: str = DEFAULT_SITE):
+    """Items at or below their reorder point"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    task = Task.create("low_stock_alert")
+    return await run_task("heysalad_sourcing", task, site_id)
+
+@app.get("/api/inventory/reorder-plan")
+async def get_reorder_plan(site_id: str = DEFAULT_SITE, item: Optional[str] = None):
+    """Due reorders grouped into per-supplier orders, or one item's plan"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    task = Task.create("reorder_plan", {"item": item} if item else {})
+    result = await run_task("heysalad_sourcing", task, site_id)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return FastJSONResponse(result)
+
+@app.get("/api/inventory/valuation")
+async def get_inventory_valuation(site_id: str = DEFAULT_SITE):
+    """Total and per-supplier stock value"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    task = Task.create("inventory_valuation")
+    return await run_task("heysalad_sourcing", task, site_id)
+
+@app.get("/api/inventory/suppliers/{supplier}")
+async def get_supplier_inventory(supplier: str, site_id: str = DEFAULT_SITE):
+    """Items and stock value held for a supplier"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    task = Task.create("supplier_inventory", {"supplier": supplier})
+    return await run_task("heysalad_sourcing", task, site_id)
+
+@app.get("/api/inventory/forecast")
+async def get_demand_forecast(site_id: str = DEFAULT_SITE, item: Optional[str] = None,
+                              horizon_days: int = Query(7, ge=1, le=28)):
+    """Seasonal consumption forecast for one item, or stockout outlook for every item"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    data: Dict[str, Any] = {"horizon_days": horizon_days}
+    if item:
+        data["item"] = item
+    task = Task.create("demand_forecast", data)
+    result = await run_task("heysalad_sourcing", task, site_id)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return FastJSONResponse(result)
+
+@app.get("/api/suppliers")
+async def get_suppliers(site_id: str = DEFAULT_SITE):
+    """Supplier directory - served from pre-encoded bytes until a supplier changes"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    agent = local_agent("heysalad_sourcing", site_id)
+    if agent is None:
+        task = Task.create("supplier_directory")
+        return await run_task("heysalad_sourcing", task, site_id)
+    return PreEncodedResponse(payloads.get(("suppliers", site_id), agent.suppliers_version, agent.supplier_directory))
+
+@app.put("/api/suppliers/{supplier}")
+async def update_supplier(supplier: str, request: SupplierUpdateRequest):
+    """Add a supplier or update its rating, delivery time or specialty"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    info = request.model_dump(exclude={"site_id"}, exclude_none=True)
+    task = Task.create("supplier_update", {"supplier": supplier, "info": info})
+    result = await run_task("heysalad_sourcing", task, request.site_id)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@app.get("/api/quality/standards")
+async def get_quality_standards(site_id: str = DEFAULT_SITE):
+    """Environmental standards - served from pre-encoded bytes until they change"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    agent = local_agent("heysalad_quality", site_id)
+    if agent is None:
+        task = Task.create("quality_standards")
+        return await run_task("heysalad_quality", task, site_id)
+    return PreEncodedResponse(payloads.get(("standards", site_id), agent.standards_version, agent.quality_standards))
+
+async def ingest_sensor_readings(site_id: str, readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Push readings into the site's Quality Agent rolling windows"""
+    if len(readings) > MAX_SENSOR_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SENSOR_BATCH} readings per batch")
+    # JSON parsing lets NaN and Infinity through as floats; they would corrupt the rolling stats
+    for index, reading in enumerate(readings):
+        for field in ("value", "timestamp"):
+            number = reading.get(field) if isinstance(reading, dict) else None
+            if isinstance(number, float) and not math.isfinite(number):
+                raise HTTPException(status_code=400, detail=f"Reading {index} has a non-finite {field}")
+    task = Task.create("sensor_readings", {"readings": readings})
+    return await run_task("heysalad_quality", task, site_id)
+
+@app.post("/api/sensors/readings")
+async def post_sensor_readings(request: SensorReadingsRequest):
+    """Bulk sensor ingestion - rolling stats and compliance update per reading"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    readings = [reading.model_dump(exclude_none=True) for reading in request.readings]
+    return await ingest_sensor_readings(request.site_id, readings)
+
+@app.get("/api/sensors/stats")
+async def get_sensor_stats(site_id: str = DEFAULT_SITE, sensor_id: Optional[str] = None):
+    """Rolling window statistics per sensor"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    task = Task.create("sensor_stats", {"sensor_id": sensor_id})
+    return await run_task("heysalad_quality", task, site_id)
+
+@app.post("/api/quality/compliance/bulk")
+async def score_compliance_bulk(request: BulkComplianceRequest):
+    """Vectorized compliance scoring of columnar historical readings (audits)"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    if not (len(request.temperature) == len(request.humidity) == len(request.cleanliness)):
+        raise HTTPException(status_code=422, detail="Reading columns must have the same length")
+    if len(request.temperature) > MAX_COMPLIANCE_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_COMPLIANCE_ROWS} rows per request")
+    
+    task = Task.create(
+        "bulk_compliance",
+        data=request.model_dump(exclude={"site_id"})
+    )
+    return await run_task("heysalad_quality", task, request.site_id)
+
+@app.websocket("/ws/sensors")
+async def sensor_stream(websocket: WebSocket, site_id: str = DEFAULT_SITE):
+    """Streaming sensor ingestion - send a reading, a list of readings or
+    {"readings": [...]}, and get an ingestion ack back for each message"""
+    await websocket.accept()
+    logger.info(f"📡 Sensor stream connected for site {site_id}")
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict):
+                readings = message.get("readings", [message])
+            elif isinstance(message, list):
+                readings = message
+            else:
+                await websocket.send_json({"error": "Expected a reading object or list", "status_code": 400})
+                continue
+            
+            try:
+                result = await ingest_sensor_readings(site_id, readings)
+            except HTTPException as e:
+                await websocket.send_json({"error": e.detail, "status_code": e.status_code})
+                continue
+            await websocket.send_json({
+                "accepted": result.get("accepted", 0),
+                "rejected": result.get("rejected", []),
+                "compliance_score": result.get("compliance_score"),
+                "alerts": result.get("alerts", [])
+            })
+    except WebSocketDisconnect:
+        logger.info(f"📡 Sensor stream closed for site {site_id}")
+
+def subscribe_alerts(site_id: Optional[str], severity: Optional[str]) -> Subscription:
+    """site_id may list several sites ("a,b"); omit it for every site. severity is the minimum."""
+    sites = [site.strip() for site in site_id.split(",") if site.strip()] if site_id else None
+    return alert_bus.subscribe(sites, severity)
+
+@app.get("/api/alerts")
+async def get_active_alerts(site_id: Optional[str] = None, severity: Optional[str] = None):
+    """Currently raised alerts - a cheap snapshot for displays that can't hold a stream open"""
+    sites = [site.strip() for site in site_id.split(",") if site.strip()] if site_id else None
+    try:
+        alerts = alert_bus.active(sites, severity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"alerts": alerts, "count": len(alerts), "timestamp": datetime.now().isoformat()}
+
+@app.get("/api/alerts/stream")
+async def stream_alerts(site_id: Optional[str] = None, severity: Optional[str] = None):
+    """Server-sent events: a snapshot of active alerts, then raised/cleared changes as they happen"""
+    try:
+        subscription = subscribe_alerts(site_id, severity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    active = alert_bus.active(subscription.sites, severity)
+    
+    async def events():
+        try:
+            yield b"event: snapshot\ndata: " + dumps(active) + b"\n\n"
+            while True:
+                event = await subscription.next(timeout=ALERT_KEEPALIVE_SECONDS)
+                yield b": keepalive\n\n" if event is None else event.sse
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/ws/alerts")
+async def alert_socket(websocket: WebSocket, site_id: Optional[str] = None, severity: Optional[str] = None):
+    """WebSocket alert feed - same messages as the SSE stream"""
+    try:
+        subscription = subscribe_alerts(site_id, severity)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+    await websocket.accept()
+    
+    async def drain_client():
+        # Nothing is expected from displays; this just notices the disconnect
+        while True:
+            await websocket.receive_text()
+    
+    watcher = asyncio.create_task(drain_client())
+    try:
+        await websocket.send_json({"event": "snapshot", "alerts": alert_bus.active(subscription.sites, severity)})
+        while True:
+            getter = asyncio.ensure_future(subscription.next())
+            done, _ = await asyncio.wait({getter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if watcher in done:
+                getter.cancel()
+                break
+            await websocket.send_text(getter.result().data)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        subscription.close()
+
+@app.post("/api/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: JobRequest):
+    """Start a task in the background and return its job id for polling"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    if request.agent_id not in agent_registry:
+        raise HTTPException(status_code=404, detail=f"Agent {request.agent_id} not found")
+    
+    try:
+        shards.shard_for(request.site_id)
+        job = jobs.submit(request.agent_id, request.type, request.data, request.site_id, request.timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionError as e:
+        raise backpressure_error(e)
+    
+    logger.info(f"📨 Job {job.id} submitted: {request.type} on {request.agent_id}")
+    return FastJSONResponse(job.to_dict(), status_code=status.HTTP_202_ACCEPTED)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """Job status and, once finished, its result; wait long-polls up to that many seconds"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    if wait:
+        await jobs.wait(job, wait)
+    return FastJSONResponse(job.to_dict())
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = await jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    return FastJSONResponse(job.to_dict())
+
+@app.get("/api/tasks/active")
+async def get_active_tasks():
+    """Tasks running on this process's agent workers right now"""
+    active = engine.list_active_tasks()
+    return FastJSONResponse({"count": len(active), "tasks": active})
+
 @app.get("/api/agents/{agent_id}/status")
 async def get_agent_status(agent_id: str):
-    """Get specific agent status"""
+    """Get specific agent status ("<agent_id>@<site_id>" for another site's instance)
+    
+    Agents the registry declares are known before their first task constructs
+    them, and report not_started until then.
+    """
     if not agents_initialized:
         raise HTTPException(status_code=503, detail="Agents not initialized")
     
-    if agent_id not in engine.agents:
+    declared_id, _, site_id = agent_id.partition("@")
+    site_id = site_id or DEFAULT_SITE
+    if (declared_id not in agent_registry or not SITE_ID_PATTERN.match(site_id)
+            or site_agent_id(declared_id, site_id) != agent_id):
         raise HTTPException(status_code=404, detail=f"Agent {agent_id} not found")
     
-    agent = engine.agents[agent_id]
+    agent = engine.agents.get(agent_id)
+    if agent is None:
+        agent_class = await asyncio.to_thread(agent_registry.load, declared_id)
+        return {
+            "agent_id": agent_id,
+            "status": "not_started",
+            "in_flight": 0,
+            "tasks_completed": 0,
+            "tasks_failed": 0,
+            "uptime": None,
+            "capabilities": agent_class.capabilities
+        }
     
     return {
         "agent_id": agent_id,
-        "status": agent.status,
-        "tasks_completed": agent.tasks_completed,
+        **agent.activity.snapshot(),
         "uptime": str(datetime.now() - agent.created_at),
         "capabilities": getattr(agent, 'capabilities', [])
     }
 
+async def run_workflow(name: str, params: Optional[Dict[str, Any]] = None,
+                       site_id: str = DEFAULT_SITE) -> Dict[str, Any]:
+    """Run a named workflow for a site, mapping backpressure and unknown names to HTTP errors"""
+    try:
+        return await workflows.run(name, params, executor=shards.site(site_id))
+    except WorkflowError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionError as e:
+        logger.warning(f"⏳ Rejected workflow {name}: {e}")
+        raise backpressure_error(e)
+
 @app.post("/api/demo/simulate-order")
-async def simulate_order():
+async def simulate_order(site_id: str = DEFAULT_SITE):
     """Simulate a complete kitchen order workflow"""
     if not agents_initialized:
         raise HTTPException(status_code=503, detail="Agents not initialized")
@@ -211,34 +901,83 @@ async def simulate_order():
     try:
         logger.info("🍽️ Simulating HeySalad order workflow...")
         
-        # Step 1: Check inventory (Sourcing Agent)
-        inventory_task = Task("sim_inventory", "inventory_check", {})
-        inventory_result = await engine.execute_task("heysalad_sourcing", inventory_task)
-        
-        # Step 2: Quality check (Quality Agent)  
-        quality_task = Task("sim_quality", "quality_check", {})
-        quality_result = await engine.execute_task("heysalad_quality", quality_task)
-        
-        # Step 3: Food analysis (Quality Agent)
-        analysis_task = Task("sim_analysis", "food_analysis", {"item": "fresh_salad_bowl", "source": "kitchen"})
-        analysis_result = await engine.execute_task("heysalad_quality", analysis_task)
+        run = await run_workflow("simulate_order", site_id=site_id)
+        attention = await site_view("attention_items", site_id)
         
         return {
             "success": True,
             "message": "🍅 HeySalad order workflow completed successfully!",
-            "workflow_steps": {
-                "inventory_check": inventory_result,
-                "quality_monitoring": quality_result,
-                "food_analysis": analysis_result
-            },
+            "workflow_steps": run["steps"],
+            "step_timings": run["timings"],
+            "total_ms": run["total_ms"],
+            "attention_items": attention["data"],
             "order_status": "ready_for_preparation",
             "estimated_completion": "15 minutes"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Order simulation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def site_view(name: str, site_id: str) -> Dict[str, Any]:
+    """A site's materialized view snapshot, wherever its shard runs"""
+    if name not in VIEW_NAMES:
+        raise HTTPException(status_code=404, detail=f"Unknown view '{name}' (choose from {', '.join(VIEW_NAMES)})")
+    try:
+        shard = shards.shard_for(site_id)
+        if isinstance(shard, LocalShard):
+            return shard.data_bus(site_id).snapshot(name)
+        return await shards.view(site_id, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionError as e:
+        raise backpressure_error(e)
+
+@app.get("/api/views")
+async def list_views():
+    """Materialized views kept up to date from the agents' shared data bus"""
+    return PreEncodedResponse(payloads.get("views", 0, lambda: {
+        "views": [
+            {"name": view.name, "description": view.description, "topics": list(view.topics)}
+            for view in DEFAULT_VIEWS
+        ]
+    }))
+
+@app.get("/api/views/{name}")
+async def get_view(name: str, site_id: str = DEFAULT_SITE):
+    """A site's view - maintained as agents publish changes, never recomputed per request"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    snapshot = await site_view(name, site_id)
+    return PreEncodedResponse(payloads.get(("view", site_id, name), snapshot["version"], lambda: snapshot))
+
+@app.get("/api/workflows")
+async def list_workflows():
+    """List registered workflows and their step graphs"""
+    return PreEncodedResponse(payloads.get("workflows", tuple(workflows.workflows), lambda: {
+        "workflows": [workflow.describe() for workflow in workflows.workflows.values()]
+    }))
+
+@app.post("/api/workflows/{name}")
+async def execute_workflow(name: str, request: Optional[WorkflowRunRequest] = None):
+    """Run a registered workflow; params map step names to extra task data"""
+    if not agents_initialized:
+        raise HTTPException(status_code=503, detail="Agents not initialized")
+    
+    try:
+        logger.info(f"🔀 Running workflow {name}")
+        if request is None:
+            return await run_workflow(name)
+        return await run_workflow(name, request.params, request.site_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Workflow {name} failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ===========================================
 # DEMO ENDPOINTS FOR TESTING
 # ===========================================
@@ -246,7 +985,7 @@ async def simulate_order():
 @app.get("/api/demo/voice-commands")
 async def demo_voice_commands():
     """Demo voice commands to test"""
-    return {
+    return PreEncodedResponse(payloads.get("demo_voice_commands", 0, lambda: {
         "demo_commands": [
             "check kitchen inventory status",
             "what is the current temperature",
@@ -255,17 +994,48 @@ async def demo_voice_commands():
             "monitor quality and safety levels"
         ],
         "usage": "POST /api/voice-command with transcript field"
-    }
+    }))
+
+@app.get("/api/capabilities")
+async def agent_capabilities():
+    """What each agent can do and which voice intents it answers"""
+    return PreEncodedResponse(payloads.get("capabilities", 0, lambda: {
+        "agents": {
+            agent_id: {
+                "capabilities": agent_class.capabilities,
+                "intents": {intent: list(phrases) for intent, phrases in agent_class.intents.items()},
+                "cached_tasks": agent_class.cacheable_tasks
+            }
+            for agent_id, agent_class in agent_registry.classes().items()
+        }
+    }))
+
+def parse_args(argv: Optional[List[str]] = None):
+    import argparse
+    parser = argparse.ArgumentParser(description="HeySalad Kitchen AI Backend")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="server processes (production); each runs its own agents")
+    parser.add_argument("--reload", action="store_true",
+                        help="development mode: restart on code changes (single process)")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    import uvicorn
+    
+    args = parse_args()
     print("🍅 Starting HeySalad Kitchen AI Backend...")
-    print("📖 Visit http://localhost:8000/docs for API documentation")
-    print("🎤 Test voice commands at http://localhost:8000/api/demo/voice-commands")
-    
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    print(f"📖 Visit http://localhost:{args.port}/docs for API documentation")
+    print(f"🎤 Test voice commands at http://localhost:{args.port}/api/demo/voice-commands")
+    
+    if args.reload:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True, log_level=args.log_level)
+    else:
+        if args.workers > 1 and not os.getenv("KITCHEN_SHARDS"):
+            # Each worker process has its own in-memory agents, so site state
+            # would diverge between them - run shard servers for shared state
+            logger.warning(f"⚠️ {args.workers} workers without KITCHEN_SHARDS: each worker keeps separate site state")
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers,
+                    log_level=args.log_level, access_log=False, proxy_headers=True)
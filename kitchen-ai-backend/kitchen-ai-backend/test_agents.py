@@ -3,10 +3,74 @@ Quick test script for Kitchen AI agents
 """
 
 import asyncio
+import base64
+import glob
 import json
-from agents.adk_base import AgentEngine, Task
+import os
+import tempfile
+import threading
+from multiprocessing.connection import Listener
+from agents.adk_base import Agent, AgentEngine, Task, stream_grouped
+from agents.batching import MicroBatcher
+from agents.databus import INVENTORY, VERDICTS, site_data_bus
+from agents.cache import ResultCache
+from agents.eventstore import RECORD_HEADER, EventStore
+from agents.forecast import DemandForecaster
+from agents.inventory import InventoryStore, StockError
+from agents.metrics import MetricsRegistry
+from agents.reorder import ReorderPlanner
+from agents.resilience import CircuitBreaker, CircuitOpenError
+from agents.sensors import RollingWindow, SensorHub
+from agents.sharding import RemoteShard, ShardRouter
+from agents.scheduler import AgentUnavailableError, QueueFullError, TaskScheduler, PRIORITY_HIGH
 from agents.sourcing_agent import SourcingAgent
 from agents.quality_agent import QualityAgent
+from agents.simulation import ServiceTimeModel
+
+class GatedAgent(Agent):
+    """Test agent whose tasks wait until its gate opens"""
+    
+    def __init__(self, agent_id: str = "gated"):
+        super().__init__(agent_id)
+        self.gate = asyncio.Event()
+        self.order = []
+    
+    async def process_task(self, task):
+        await self.gate.wait()
+        self.order.append(task.id)
+        return {"status": "done", "task_id": task.id}
+
+class ScriptedAgent(Agent):
+    """Test agent whose nth call sleeps, then returns, raises or is cancelled per its script"""
+    hedged_tasks = {"lookup": 0.02}
+    
+    def __init__(self, script):
+        super().__init__("scripted")
+        self.script = list(script)  # [(delay, "ok" | "raise" | "cancel")]
+        self.calls = 0
+    
+    async def process_task(self, task):
+        delay, outcome = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if outcome == "raise":
+            raise RuntimeError("sensor bus down")
+        if outcome == "cancel":
+            raise asyncio.CancelledError()
+        return {"status": "done", "call": self.calls}
+
+def fast(agent):
+    """Drop the agent's simulated processing delay"""
+    agent.service_time_model = ServiceTimeModel("none")
+    return agent
+
+async def until(condition, timeout=2.0):
+    """Wait for condition() to hold, yielding to the event loop meanwhile"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not reached in time"
+        await asyncio.sleep(0.001)
 
 async def test_agents():
     print("🍅 Testing HeySalad Kitchen AI Agents...")
@@ -38,8 +102,503 @@ async def test_agents():
         print(f"   Status: {result.get('status', 'unknown')}")
         print(f"   Message: {result.get('message', 'No message')}")
     
+    # Test batch execution
+    print("\n📦 Testing Batch Execution:")
+    batch = [Task(f"batch_{i}", "food_analysis", {"item": item})
+             for i, item in enumerate(["lettuce_mix", "cherry_tomatoes", "mozzarella"])]
+    results = await engine.execute_batch("heysalad_quality", batch)
+    for task, result in zip(batch, results):
+        print(f"   {task.data['item']}: {result.get('recommendation', result.get('error'))}")
+    
     print("\n✅ All tests completed!")
     print(f"📊 Agent Status: {engine.get_agent_status()}")
 
+async def test_admission():
+    print("\n🚦 Testing Admission and Backpressure:")
+    engine = AgentEngine()
+    agent = GatedAgent()
+    engine.register_agent(agent, concurrency=1, queue_size=2)
+    pool = engine.scheduler.pools[agent.agent_id]
+    
+    running = asyncio.ensure_future(engine.execute_task(agent.agent_id, Task("first", "work")))
+    await until(lambda: pool.running == 1)
+    normal = asyncio.ensure_future(engine.execute_task(agent.agent_id, Task("normal", "work")))
+    urgent = asyncio.ensure_future(engine.execute_task(agent.agent_id, Task("urgent", "work", priority=PRIORITY_HIGH)))
+    await until(lambda: pool.queued == 2)
+    
+    # One running plus a full queue - the next task is shed, not queued
+    try:
+        await engine.execute_task(agent.agent_id, Task("overflow", "work"))
+        raise AssertionError("expected QueueFullError")
+    except QueueFullError as e:
+        assert e.status_code == 429
+    
+    agent.gate.set()
+    results = await asyncio.gather(running, normal, urgent)
+    assert [result["task_id"] for result in results] == ["first", "normal", "urgent"]
+    assert agent.order == ["first", "urgent", "normal"], agent.order  # priority beats arrival
+    assert pool.stats()["accepted"] == 3 and pool.stats()["rejected"] == 1
+    print(f"   ✅ queue full -> 429, priority order {agent.order}")
+    
+    await engine.shutdown()
+    try:
+        await engine.execute_task(agent.agent_id, Task("late", "work"))
+        raise AssertionError("expected AgentUnavailableError")
+    except AgentUnavailableError:
+        pass
+    print("   ✅ shut down pool rejects new tasks")
+    
+    scheduler = TaskScheduler()
+    for limits in ({"concurrency": 0}, {"queue_size": 0}, {"concurrency": -1}):
+        try:
+            scheduler.configure("misconfigured", **limits)
+            raise AssertionError(f"expected ValueError for {limits}")
+        except ValueError:
+            pass
+    assert scheduler.configure("defaults").concurrency == scheduler.default_concurrency
+    print("   ✅ pool sizes below 1 are rejected")
+
+async def test_result_cache():
+    print("\n🗃️ Testing Result Cache:")
+    cache = ResultCache()
+    engine = AgentEngine(cache=cache)
+    sourcing = fast(SourcingAgent())
+    engine.register_agent(sourcing)
+    run = lambda task_type, data=None: engine.execute_task(sourcing.agent_id, Task.create(task_type, data))
+    
+    # Identical concurrent requests share one execution
+    first, second = await asyncio.gather(run("inventory_check"), run("inventory_check"))
+    assert first is second and cache.misses == 1 and cache.coalesced == 1
+    
+    # A stock movement drops the stale inventory views
+    before = (await run("inventory_check"))["inventory"]["lettuce_mix"]["qty"]
+    await run("stock_movement", {"movements": [{"item": "lettuce_mix", "delta": -5}]})
+    after = (await run("inventory_check"))["inventory"]["lettuce_mix"]["qty"]
+    assert after == before - 5, (before, after)
+    assert cache.invalidations >= 1
+    print(f"   ✅ coalesced identical requests, stock movement refreshed lettuce_mix {before} -> {after}")
+    
+    # Transcripts are free text; supplier and item names are identifiers
+    hits = cache.hits
+    await run("voice_command", {"transcript": "show supplier information"})
+    await run("voice_command", {"transcript": "  Show SUPPLIER   information"})
+    assert cache.hits == hits + 1
+    exact = await run("supplier_inventory", {"supplier": "Fresh Farms UK"})
+    lowered = await run("supplier_inventory", {"supplier": "fresh farms uk"})
+    assert exact["items"] and not lowered["items"], "supplier names must not share a cache key"
+    print("   ✅ transcripts normalized, supplier names keyed exactly")
+    await engine.shutdown()
+
+async def test_sensor_windows():
+    print("\n📡 Testing Sensor Windows:")
+    window = RollingWindow(capacity=3, low=2, high=8)
+    for value in (5.0, 9.0, 4.0, 3.0):
+        window.push(value)
+    assert (window.minimum, window.maximum, window.mean) == (3.0, 9.0, 16.0 / 3)
+    assert window.violations == 1 and window.percentile(50) == 4.0
+    
+    hub = SensorHub({"temperature": {"min": 2, "max": 8}}, window_size=3, max_sensors=2)
+    result = hub.ingest([
+        {"sensor_id": "fridge-1", "metric": "temperature", "value": 4.0},
+        {"sensor_id": "fridge-1", "metric": "temperature", "value": float("nan")},
+        {"sensor_id": "fridge-1", "metric": "temperature", "value": float("inf")},
+        {"sensor_id": "fridge-1", "metric": "temperature", "value": 5.0, "timestamp": float("nan")},
+        {"sensor_id": "fridge-2", "metric": "temperature", "value": 6.0},
+        {"sensor_id": "fridge-3", "metric": "temperature", "value": 6.0}
+    ])
+    assert result["accepted"] == 2
+    assert [rejected["index"] for rejected in result["rejected"]] == [1, 2, 3, 5]
+    assert hub.stats("fridge-1")["fridge-1"]["mean"] == 4.0 and len(hub.sensors) == 2
+    try:
+        window.push(float("nan"))
+        raise AssertionError("expected ValueError for NaN")
+    except ValueError:
+        pass
+    print("   ✅ rolling stats exact; NaN/inf and sensors over the cap rejected")
+    
+    # Real sensor work skips the simulated delay, batched or not
+    quality = QualityAgent()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await quality.process_batch([Task.create("sensor_stats"), Task.create("quality_standards")])
+    assert all("error" not in result for result in results)
+    assert loop.time() - started < quality.service_time_model.mean / 2
+    print("   ✅ a batch of realtime sensor tasks pays no simulated delay")
+
+async def test_metric_labels():
+    print("\n📈 Testing Metric Labels:")
+    engine = AgentEngine(metrics=MetricsRegistry())
+    quality = fast(QualityAgent())
+    engine.register_agent(quality)
+    await engine.execute_task(quality.agent_id, Task.create("quality_standards"))
+    for i in range(20):
+        await engine.execute_task(quality.agent_id, Task.create(f"made_up_{i}"))
+    text = engine.metrics.render()
+    assert 'task_type="quality_standards"' in text and 'task_type="other"' in text
+    assert "made_up" not in text, "client task types must not become labels"
+    print("   ✅ undeclared task types share the 'other' label")
+    await engine.shutdown()
+
+async def test_event_store_recovery():
+    print("\n💾 Testing Event Store Recovery:")
+    with tempfile.TemporaryDirectory() as directory:
+        engine = AgentEngine()
+        sourcing = fast(SourcingAgent())
+        sourcing.attach_store(EventStore(directory, snapshot_every=3, segment_bytes=4096))
+        engine.register_agent(sourcing)
+        for delta in (-1, -2, -3, -4, 10):
+            task = Task.create("stock_movement", {"movements": [{"item": "mozzarella", "delta": delta}]})
+            await engine.execute_task(sourcing.agent_id, task)
+        await engine.shutdown()
+        expected = sourcing.inventory.get("mozzarella")["qty"]
+        await sourcing.store.wait_for_snapshot()  # written off the loop
+        assert sourcing.store.snapshot_seq == 3 and sourcing.store.events_since_snapshot == 2
+        
+        # Crash: no final snapshot, and a torn record after the last good one
+        sourcing.store.close()
+        segment = sorted(glob.glob(os.path.join(directory, "events-*.log")))[-1]
+        with open(segment, "ab") as f:
+            f.write(RECORD_HEADER.pack(16, 0, 99) + b"x" * 16)
+        
+        restored = SourcingAgent()
+        restored.attach_store(EventStore(directory, snapshot_every=3))
+        assert restored.inventory.get("mozzarella")["qty"] == expected
+        assert restored.store.log.last_seq == 5
+        restored.close_store()
+    print(f"   ✅ snapshot + 2 replayed events restored mozzarella at {expected}kg, torn tail ignored")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store = EventStore(directory, snapshot_every=1)
+        store.append({"n": 1})
+        state = {"n": 1}
+        store.snapshot_in_background(state)
+        store.append({"n": 2})
+        assert store.snapshot_seq == 0 and not store.snapshot_due  # one snapshot in flight at a time
+        await store.wait_for_snapshot()
+        assert store.snapshot_seq == 1 and store.events_since_snapshot == 1 and store.snapshot_due
+        loaded, events = store.load()
+        assert loaded == state and list(events) == [{"n": 2}]
+        store.close()
+    print("   ✅ background snapshot commits the state captured at its event, later events replay")
+
+async def test_micro_batching():
+    print("\n🧺 Testing Micro-Batching:")
+    batches = []
+    
+    async def executor(group, items):
+        batches.append((group, list(items)))
+        return [{"item": item, "group": group} for item in items]
+    
+    batcher = MicroBatcher(executor, max_batch_size=4, max_wait_ms=5)
+    requests = ["kale", "basil", "kale", "mint", "basil"]
+    results = await asyncio.gather(*(batcher.submit("site-a", item, key=item) for item in requests))
+    assert [result["item"] for result in results] == requests
+    assert batches == [("site-a", ["kale", "basil", "mint"])], batches
+    assert batcher.stats()["coalesced"] == 2
+    
+    # A full batch flushes at once; groups never share a batch
+    batches.clear()
+    await asyncio.gather(*(batcher.submit("site-a", i) for i in range(4)), batcher.submit("site-b", 9))
+    assert sorted(batches) == [("site-a", [0, 1, 2, 3]), ("site-b", [9])] and batcher.stats()["flushed_full"] == 1
+    print("   ✅ one batch per window and site, duplicates coalesced, each caller gets its own result")
+    
+    async def short_executor(group, items):
+        return [{"item": items[0]}]
+    
+    short = MicroBatcher(short_executor, max_wait_ms=1)
+    outcomes = await asyncio.wait_for(asyncio.gather(short.submit("s", "a"), short.submit("s", "b"),
+                                                     return_exceptions=True), 1.0)
+    assert outcomes[0] == {"item": "a"} and isinstance(outcomes[1], RuntimeError)
+    
+    async def short_batch(agent_id, tasks):
+        return [{"status": "done"}]
+    
+    items = [("agent", Task.create("work")), ("agent", Task.create("work"))]
+    streamed = [result async for _, _, result in stream_grouped(items, short_batch)]
+    assert streamed[0] == {"status": "done"} and "error" in streamed[1]
+    print("   ✅ items missing from a short result fail instead of hanging")
+
+async def test_circuit_breaker():
+    print("\n🔌 Testing Circuit Breaker:")
+    breaker = CircuitBreaker("flaky", min_calls=4, cooldown_seconds=0.05, half_open_calls=2)
+    for ok in (True, False, False, True):
+        breaker.allow()
+        breaker.record(ok, 0.01)
+    assert breaker.state == "open" and breaker.trips == 1
+    try:
+        breaker.allow()
+        raise AssertionError("expected CircuitOpenError")
+    except CircuitOpenError as e:
+        assert e.status_code == 503 and e.retry_after >= 1
+    
+    await asyncio.sleep(0.06)
+    breaker.allow()
+    assert breaker.state == "half_open"
+    breaker.record(False, 0.01)  # a failed trial re-opens at once
+    assert breaker.state == "open" and breaker.trips == 2
+    await asyncio.sleep(0.06)
+    for _ in range(2):
+        breaker.allow()
+    try:
+        breaker.allow()
+        raise AssertionError("expected CircuitOpenError while trials are in flight")
+    except CircuitOpenError:
+        pass
+    breaker.record(True, 0.01)
+    breaker.record(True, 0.01)
+    assert breaker.state == "closed"
+    print("   ✅ closed -> open -> half_open -> open -> half_open -> closed")
+    
+    engine = AgentEngine(breaker={"min_calls": 5})
+    sourcing = fast(SourcingAgent())
+    broken = ScriptedAgent([(0, "raise")])
+    engine.register_agent(sourcing)
+    engine.register_agent(broken)
+    for i in range(20):
+        result = await engine.execute_task(sourcing.agent_id, Task(f"bad_{i}", "reorder_plan", {"item": "unobtainium"}))
+        assert result["error"] == "Unknown item unobtainium" and not result.get("agent_fault")
+    assert engine.guards[sourcing.agent_id].breaker.state == "closed"
+    for i in range(5):
+        result = await engine.execute_task(broken.agent_id, Task(f"boom_{i}", "work"))
+        assert result["agent_fault"]
+    try:
+        await engine.execute_task(broken.agent_id, Task("shed", "work"))
+        raise AssertionError("expected CircuitOpenError")
+    except CircuitOpenError:
+        pass
+    assert broken.calls == 5
+    print("   ✅ 20 unknown-item answers leave the breaker closed; 5 crashes open it")
+    
+    # An empty batch must not use up one of the half-open trial slots
+    engine.guards[broken.agent_id].breaker = breaker = CircuitBreaker("flaky", cooldown_seconds=0, half_open_calls=1)
+    breaker.state = "open"
+    assert await engine.execute_batch(broken.agent_id, []) == []
+    broken.script = [(0, "ok")]
+    assert await engine.execute_batch(broken.agent_id, [Task("trial", "work")]) == [{"status": "done", "call": 6}]
+    assert breaker.state == "closed"
+    await engine.shutdown()
+    print("   ✅ an empty batch returns [] without taking a breaker slot")
+
+async def test_hedging():
+    print("\n🏇 Testing Hedged Requests:")
+    engine = AgentEngine()
+    agent = ScriptedAgent([(0.5, "ok"), (0, "ok")])
+    engine.register_agent(agent)
+    guard = engine.guards[agent.agent_id]
+    result = await engine.execute_task(agent.agent_id, Task("slow", "lookup"))
+    assert result == {"status": "done", "call": 2}, result
+    assert guard.hedged == 1 and guard.hedge_wins == 1
+    print("   ✅ a straggling first attempt loses to the hedge")
+    
+    # The primary is cancelled under us; the hedge still answers
+    agent.script, agent.calls = [(0.05, "cancel"), (0.1, "ok")], 0
+    result = await engine.execute_task(agent.agent_id, Task("cancelled", "lookup"))
+    assert result["status"] == "done" and guard.hedge_wins == 2
+    agent.script, agent.calls = [(0.05, "cancel")], 0
+    try:
+        await engine.execute_task(agent.agent_id, Task("all_cancelled", "lookup"))
+        raise AssertionError("expected AgentUnavailableError")
+    except AgentUnavailableError:
+        pass
+    assert guard.breaker.state == "closed"
+    print("   ✅ cancelled attempts count as failures, not crashes")
+    await engine.shutdown()
+    
+    quality = QualityAgent()
+    assert quality.hedge_after(Task(1, "voice_command", {"transcript": "what is the temperature"})) == 0.8
+    for task in (Task(2, "food_analysis", {"item": "mozzarella"}),
+                 Task(3, "voice_command", {"transcript": "analyze the salad on camera"}),
+                 Task(4, "sensor_readings", {"readings": []})):
+        assert quality.hedge_after(task) is None, task.type
+    print("   ✅ tasks with side effects are never hedged")
+    
+    # Data the hedge check can't read runs once and fails as an agent error
+    engine = AgentEngine()
+    engine.register_agent(quality)
+    result = await engine.execute_task(quality.agent_id, Task(5, "voice_command", {"transcript": 42}))
+    assert result["agent_fault"] and engine.guards[quality.agent_id].hedged == 0
+    await engine.shutdown()
+
+async def test_views():
+    print("\n🗂️ Testing Materialized Views:")
+    bus = site_data_bus("test")
+    sourcing, quality = fast(SourcingAgent()), fast(QualityAgent())
+    sourcing.attach_data_bus(bus)
+    quality.attach_data_bus(bus)
+    
+    def overview():
+        return bus.snapshot("kitchen_overview")["data"]
+    
+    def attention():
+        return [entry["item"] for entry in bus.snapshot("attention_items")["data"]]
+    
+    def rejected(item):
+        return {"item": item, "recommendation": "rejected", "overall_score": 70, "source": "camera"}
+    
+    # Client spellings map onto the SKU; unstocked items never reach the table
+    quality._publish_verdict(rejected("  Mozzarella "))
+    quality._publish_verdict(rejected("Cherry-Tomatoes"))
+    for item in ("mixed_salad", "fresh salad bowl", 42, ""):
+        quality._publish_verdict(rejected(item))
+    assert sorted(bus.table(VERDICTS)) == ["cherry_tomatoes", "mozzarella"]
+    assert attention() == ["mozzarella"]  # cherry tomatoes failed but aren't low
+    assert overview()["quality"]["verdicts"] == {"rejected": 2}
+    
+    await sourcing.process_task(Task("restock", "stock_movement", {"movements": [{"item": "mozzarella", "delta": 30}]}))
+    assert attention() == []
+    await sourcing.process_task(Task("service", "stock_movement", {"movements": [{"item": "mozzarella", "delta": -40}]}))
+    assert attention() == ["mozzarella"]
+    quality._publish_verdict({**rejected("mozzarella"), "recommendation": "approved", "overall_score": 92})
+    assert attention() == [] and overview()["quality"]["verdicts"] == {"approved": 1, "rejected": 1}
+    
+    stock = bus.table(INVENTORY)
+    inventory = overview()["inventory"]
+    assert inventory["items"] == len(stock) == len(sourcing.inventory)
+    assert inventory["stock_value"] == round(sum(entry["value"] for entry in stock.values()), 2)
+    assert inventory["low_stock"] == {sku: entry["qty"] for sku, entry in sorted(stock.items()) if entry["low"]}
+    print("   ✅ attention items follow stock and verdicts, overview totals match a recompute")
+
+async def test_inventory_store():
+    print("\n📦 Testing Inventory Store:")
+    store = InventoryStore({
+        "basil": {"qty": 12, "unit": "bunch", "cost": 1.5, "supplier": "Herb Co"},
+        "kale": {"qty": 40, "unit": "kg", "cost": 3.0, "supplier": "Fresh Farms"},
+        "mint": {"qty": 5, "unit": "bunch", "cost": 2.0, "supplier": "Herb Co"}
+    })
+    
+    def check_indexes():
+        assert store._by_qty == sorted((record["qty"], sku) for sku, record in store.items())
+        value = sum(record["qty"] * record["cost"] for _, record in store.items())
+        assert abs(store.total_value - value) < 1e-9
+        for supplier in ("Herb Co", "Fresh Farms"):
+            skus = [sku for sku, record in store.items() if record["supplier"] == supplier]
+            assert store.by_supplier(supplier) == sorted(skus)
+            expected = sum(store.get(sku)["qty"] * store.get(sku)["cost"] for sku in skus)
+            assert abs(store.supplier_value(supplier) - expected) < 1e-9
+    
+    assert store.low_stock() == ["mint", "basil"]
+    store.apply_movement("mint", 30)
+    store.apply_movement("kale", -32.5)
+    check_indexes()
+    assert store.low_stock() == ["kale", "basil"] and store.get("kale")["qty"] == 7.5
+    assert store.valuation() == {"total_value": 110.5, "by_supplier": {"Herb Co": 88.0, "Fresh Farms": 22.5},
+                                 "total_items": 3}
+    
+    # A kale supplier switch moves its value between suppliers
+    store.upsert("kale", 7.5, "kg", 3.0, "Herb Co")
+    check_indexes()
+    assert store.by_supplier("Fresh Farms") == [] and store.valuation()["by_supplier"] == {"Herb Co": 110.5}
+    print("   ✅ qty index, low stock, supplier indexes and valuation follow movements")
+    
+    version = store.version
+    for sku, delta in (("basil", -13), ("basil", float("nan")), ("basil", float("inf")),
+                       ("basil", float("-inf")), ("saffron", 1)):
+        try:
+            store.apply_movement(sku, delta)
+            raise AssertionError(f"expected StockError for {sku} {delta}")
+        except StockError:
+            pass
+    for qty, cost in ((float("nan"), 1.0), (1.0, float("inf")), (-1, 1.0)):
+        try:
+            store.upsert("basil", qty, "bunch", cost, "Herb Co")
+            raise AssertionError(f"expected StockError for qty={qty} cost={cost}")
+        except StockError:
+            pass
+    assert store.version == version and store.get("basil")["qty"] == 12
+    check_indexes()
+    print("   ✅ negative, non-finite and unknown-item movements are rejected without side effects")
+
+async def test_demand_forecast():
+    print("\n📈 Testing Demand Forecasting:")
+    forecaster = DemandForecaster(utc_offset_hours=0, history_days=28)
+    start = 20000 * 86400  # a Friday, midnight UTC
+    for day in range(14):
+        for hour, qty in ((12, 4.0), (19, 6.0)):
+            forecaster.record("kale", qty, start + day * 86400 + hour * 3600)
+    series = forecaster.series["kale"]
+    # Each new event closes the buckets before it; the last dinner is still open
+    assert series.buckets_closed == forecaster.bucket(start + 13 * 86400 + 19 * 3600) - forecaster.bucket(start + 12 * 3600)
+    assert series.open_total == 6.0
+    forecaster.record("kale", 2.0, start + 12 * 86400 + 12 * 3600)  # late: history only
+    assert forecaster.history("kale", 3)[:2] == [10.0, 12.0]
+    now = start + 14 * 86400 + 8 * 3600
+    expected = forecaster.forecast("kale", 7, now=now, on_hand=25)
+    assert 60 < expected["expected_total"] < 80 and 1 < expected["days_until_stockout"] < 4, expected
+    print(f"   ✅ buckets close incrementally, ~{expected['expected_total']:g} kale over 7 days")
+    
+    forecaster.record("basil", 1.0, start)  # one open bucket, nothing closed yet
+    state = json.loads(json.dumps(forecaster.snapshot()))
+    assert state["basil"]["history"] == ""
+    populated = series.last_bucket - forecaster.bucket(start + 12 * 3600) + 1
+    assert len(base64.b64decode(state["kale"]["history"])) == 4 * populated < 4 * forecaster.capacity
+    restored = DemandForecaster(utc_offset_hours=0, history_days=28)
+    restored.restore(state)
+    assert restored.history("kale", 28) == forecaster.history("kale", 28)
+    assert restored.forecast("kale", 7, now=now, on_hand=25) == expected
+    assert json.loads(json.dumps(restored.snapshot())) == json.loads(json.dumps(forecaster.snapshot()))
+    assert restored.forecast("basil", 1, now=start)["expected_total"] == forecaster.forecast("basil", 1, now=start)["expected_total"]
+    print("   ✅ snapshot keeps just the populated history and restores the same forecasts")
+
+async def test_shard_errors():
+    print("\n🧩 Testing Shard Connection Errors:")
+    listener = Listener(("127.0.0.1", 0), authkey=b"right-key")
+    
+    def refuse_all():
+        while True:
+            try:
+                listener.accept()
+            except OSError:
+                return
+            except Exception:
+                continue  # wrong authkey
+    
+    threading.Thread(target=refuse_all, daemon=True).start()
+    shard = RemoteShard("misconfigured", listener.address, authkey=b"wrong-key")
+    try:
+        await shard.execute("default", "heysalad_quality", Task.create("quality_check"))
+        raise AssertionError("expected AgentUnavailableError")
+    except AgentUnavailableError as e:
+        assert "authkey" in str(e) and e.status_code == 503
+    assert "authkey" in (await shard.status())["error"]
+    
+    class BrokenShard:
+        name = "broken"
+        
+        async def status(self):
+            raise RuntimeError("shard exploded")
+    
+    statuses = await ShardRouter([shard, BrokenShard()]).status()
+    assert [status["shard"] for status in statuses] == ["misconfigured", "broken"]
+    assert statuses[1]["error"] == "shard exploded"
+    await shard.close()
+    listener.close()
+    print("   ✅ a bad authkey is a 503 for that shard, and status reports each shard's error")
+
+async def test_reorder_decay():
+    print("\n🔁 Testing Reorder Plan Decay:")
+    store = InventoryStore({"kale": {"qty": 30, "unit": "kg", "cost": 3.0, "supplier": "Fresh Farms"}})
+    planner = ReorderPlanner(store, {"Fresh Farms": {"rating": 4.5, "delivery": "2 days"}})
+    start = 1_700_000_000
+    for hour in range(0, 48, 4):
+        planner.record_movement("kale", -5, start + hour * 3600)
+    assert [plan["item"] for plan in planner.reorders(start + 48 * 3600)] == ["kale"]
+    
+    # No movement since: only the passing of time can bring the reorder point down
+    recomputed = planner.recomputed
+    assert planner.reorders(start + 49 * 3600) and planner.recomputed == recomputed  # plans still fresh
+    assert planner.reorders(start + 30 * 86400) == []
+    assert planner.plan("kale", start + 30 * 86400)["daily_usage"] < 1
+    print("   ✅ an item whose consumption stopped drops out of reorders as its rate decays")
+
+TESTS = [test_agents, test_admission, test_result_cache, test_sensor_windows, test_metric_labels,
+         test_event_store_recovery, test_micro_batching, test_circuit_breaker, test_hedging, test_views,
+         test_inventory_store, test_demand_forecast, test_shard_errors,
+         test_reorder_decay]
+
+async def run_tests():
+    for test in TESTS:
+        await test()
+    print(f"\n🎉 {len(TESTS)} test groups passed")
+
 if __name__ == "__main__":
-    asyncio.run(test_agents())
+    asyncio.run(run_tests())